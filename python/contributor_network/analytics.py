@@ -0,0 +1,104 @@
+"""Graph analytics of the contributor network, precomputed at build time.
+
+The network is the bipartite graph of contributors and repositories, with a
+link wherever a contributor committed to a repository. It is kept as a sparse
+adjacency matrix in compressed sparse row form (one row of repository indices
+per contributor), from which the repositories' shared contributors (the
+nonzero entries of ``AᵀA``), the node degrees and per-owner aggregates are
+derived.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from itertools import combinations
+from typing import Any
+
+Row = dict[str, Any]
+
+
+def owner(repo: str) -> str:
+    return repo.split("/", 1)[0]
+
+
+def analyze(repositories: list[Row], links: list[Row]) -> dict[str, Any]:
+    """Compute the analytics of repository and link rows.
+
+    Contributors, repositories and owners are sorted by name and referenced by
+    their index in the result.
+    """
+    contributor_names = sorted({row["author_name"] for row in links})
+    repo_names = sorted(
+        {row["repo"] for row in repositories} | {row["repo"] for row in links}
+    )
+    owner_names = sorted({owner(repo) for repo in repo_names})
+    contributor_ids = {name: index for index, name in enumerate(contributor_names)}
+    repo_ids = {name: index for index, name in enumerate(repo_names)}
+    owner_ids = {name: index for index, name in enumerate(owner_names)}
+    repo_owner = [owner_ids[owner(repo)] for repo in repo_names]
+
+    # Adjacency in compressed sparse row form: the repositories (and commit
+    # counts) of contributor i are at indptr[i]:indptr[i + 1]
+    rows: list[list[tuple[int, int]]] = [[] for _ in contributor_names]
+    for row in links:
+        rows[contributor_ids[row["author_name"]]].append(
+            (repo_ids[row["repo"]], row["commit_count"])
+        )
+    indptr = [0]
+    indices: list[int] = []
+    commits: list[int] = []
+    for entries in rows:
+        entries.sort()
+        indices.extend(repo for repo, _ in entries)
+        commits.extend(count for _, count in entries)
+        indptr.append(len(indices))
+
+    # Off-diagonal nonzeros of AᵀA: every contributor adds one to each pair of
+    # their repositories
+    shared: Counter[tuple[int, int]] = Counter()
+    for start, end in zip(indptr, indptr[1:]):
+        shared.update(combinations(indices[start:end], 2))
+
+    repo_degree = [0] * len(repo_names)
+    repo_commits = [0] * len(repo_names)
+    for repo, count in zip(indices, commits, strict=True):
+        repo_degree[repo] += 1
+        repo_commits[repo] += count
+
+    owner_repos = [0] * len(owner_names)
+    owner_stars = [0] * len(owner_names)
+    owner_forks = [0] * len(owner_names)
+    for row in repositories:
+        index = owner_ids[owner(row["repo"])]
+        owner_repos[index] += 1
+        owner_stars[index] += row["repo_stars"]
+        owner_forks[index] += row["repo_forks"]
+    owner_contributors: list[set[int]] = [set() for _ in owner_names]
+    owner_commits = [0] * len(owner_names)
+    for contributor, (start, end) in enumerate(zip(indptr, indptr[1:])):
+        for repo, count in zip(indices[start:end], commits[start:end], strict=True):
+            owner_contributors[repo_owner[repo]].add(contributor)
+            owner_commits[repo_owner[repo]] += count
+
+    return {
+        "contributors": contributor_names,
+        "repos": repo_names,
+        "owners": owner_names,
+        "adjacency": {"indptr": indptr, "repo": indices, "commit_count": commits},
+        "shared_contributors": [
+            [first, second, count] for (first, second), count in sorted(shared.items())
+        ],
+        "degrees": {
+            "contributors": [end - start for start, end in zip(indptr, indptr[1:])],
+            "repos": repo_degree,
+            "owners": [len(contributors) for contributors in owner_contributors],
+        },
+        "repo_commits": repo_commits,
+        "repo_owner": repo_owner,
+        "owner_aggregates": {
+            "repos": owner_repos,
+            "stars": owner_stars,
+            "forks": owner_forks,
+            "commits": owner_commits,
+        },
+    }
@@ -0,0 +1,251 @@
+"""Benchmarks of ``build`` on synthetic datasets of increasing size.
+
+Each benchmark generates a dataset (see :mod:`.synthetic`) and runs ``build``
+on it in a fresh process twice: cold, without the record cache of a previous
+build, and warm, with nothing changed since. The wall time, the peak memory
+of the process and the size of every output are recorded. Results are saved
+as JSON and can be compared with those of an earlier run to catch
+regressions.
+
+The startup time of short commands (``--help``, ``list-contributors`` and a
+``build`` with nothing to do), which CI steps run many times, is measured the
+same way.
+"""
+
+from __future__ import annotations
+
+import datetime
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from . import synthetic
+from .store import StoreFormat, open_store
+
+FORMAT_VERSION = 1
+CONTENT_HASH = re.compile(r"\.[0-9a-f]{12}\.")
+
+
+@dataclass
+class Result:
+    """Measurements of ``build`` on one dataset."""
+
+    size: str
+    repositories: int
+    contributors: int
+    links: int
+    output_format: str
+    store: str
+    cold_seconds: float
+    warm_seconds: float
+    peak_memory_mb: float
+    output_bytes: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def key(self) -> tuple[str, str, str]:
+        return (self.size, self.output_format, self.store)
+
+
+def run_command(arguments: list[str], cwd: Path) -> tuple[float, float]:
+    """Run a command of the CLI in a new process.
+
+    Returns the wall time in seconds and the peak resident memory in MB.
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-c",
+            "from contributor_network.cli import main; main()",
+            *arguments,
+        ],
+        cwd=cwd,
+        stdout=subprocess.DEVNULL,
+    )
+    # Unlike Popen.wait, wait4 reports the resource usage of this one child
+    _, status, usage = os.wait4(process.pid, 0)
+    seconds = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        raise RuntimeError(
+            f"{' '.join(arguments)} failed with exit code {process.returncode}"
+        )
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return seconds, usage.ru_maxrss * scale / 1e6
+
+
+def run_build(
+    config: Path, data: Path, output_format: str, store: StoreFormat
+) -> tuple[float, float]:
+    """Run ``build`` in a new process, see :func:`run_command`."""
+    return run_command(
+        [
+            "build",
+            "--directory",
+            str(data),
+            "--config",
+            str(config),
+            "--format",
+            output_format,
+            "--store",
+            store,
+        ],
+        config.parent,
+    )
+
+
+def run(
+    size: synthetic.Size,
+    output_format: str = "csv",
+    store: StoreFormat = "json",
+    repeat: int = 3,
+    work_dir: Path | None = None,
+) -> Result:
+    """Benchmark ``build`` on a synthetic dataset, keeping the best of repeats."""
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp:
+        directory = Path(tmp)
+        config = synthetic.generate(directory, size, store_format=store)
+        data = directory / "data"
+        cold = warm = float("inf")
+        peak_memory = 0.0
+        for _ in range(repeat):
+            # build runs in the directory, and keeps its caches there
+            shutil.rmtree(directory / ".cache", ignore_errors=True)
+            seconds, memory = run_build(config, data, output_format, store)
+            cold = min(cold, seconds)
+            peak_memory = max(peak_memory, memory)
+            seconds, memory = run_build(config, data, output_format, store)
+            warm = min(warm, seconds)
+            peak_memory = max(peak_memory, memory)
+
+        with open_store(data, store) as data_store:
+            links = len(data_store.links())
+        return Result(
+            size=size.name,
+            repositories=size.repositories,
+            contributors=size.contributors,
+            links=links,
+            output_format=output_format,
+            store=store,
+            cold_seconds=round(cold, 4),
+            warm_seconds=round(warm, 4),
+            peak_memory_mb=round(peak_memory, 1),
+            output_bytes={
+                # Without the content hash, to compare across versions
+                CONTENT_HASH.sub(".", path.name): path.stat().st_size
+                for path in sorted(data.iterdir())
+                if path.is_file() and not path.name.startswith("data.sqlite")
+            }
+            | {"index.html": (directory / "index.html").stat().st_size},
+        )
+
+
+def startup(repeat: int = 5, work_dir: Path | None = None) -> dict[str, float]:
+    """The wall time of short commands, by name, keeping the best of repeats."""
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp:
+        directory = Path(tmp)
+        config = synthetic.generate(directory, synthetic.SIZES["tiny"])
+        commands = {
+            "help": ["--help"],
+            "list-contributors": ["list-contributors", "--config", str(config)],
+            "build": ["build", "--directory", "data", "--config", str(config)],
+        }
+        # Leaves the measured builds nothing to do
+        run_command(commands["build"], directory)
+        return {
+            name: round(
+                min(run_command(arguments, directory)[0] for _ in range(repeat)), 4
+            )
+            for name, arguments in commands.items()
+        }
+
+
+def environment() -> dict[str, Any]:
+    """A description of the machine and code the benchmarks ran on."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "date": datetime.datetime.now(datetime.UTC).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def report(
+    results: list[Result], startup: dict[str, float] | None = None
+) -> dict[str, Any]:
+    return {
+        "version": FORMAT_VERSION,
+        "environment": environment(),
+        "results": [asdict(result) for result in results],
+        "startup": startup or {},
+    }
+
+
+def load(report: dict[str, Any]) -> list[Result]:
+    return [Result(**result) for result in report["results"]]
+
+
+def load_startup(report: dict[str, Any]) -> dict[str, float]:
+    # Reports of earlier versions have no startup times
+    return report.get("startup", {})
+
+
+def compare(
+    results: list[Result], baseline: list[Result], tolerance: float
+) -> list[str]:
+    """Describe the measurements that are worse than the baseline by more than
+    the tolerance (a fraction, e.g. 0.25 for 25%)."""
+    previous = {result.key: result for result in baseline}
+    regressions = []
+    for result in results:
+        base = previous.get(result.key)
+        if base is None:
+            continue
+        measurements = [
+            ("cold_seconds", result.cold_seconds, base.cold_seconds),
+            ("warm_seconds", result.warm_seconds, base.warm_seconds),
+            ("peak_memory_mb", result.peak_memory_mb, base.peak_memory_mb),
+        ] + [
+            (f"{name} bytes", size, base.output_bytes[name])
+            for name, size in result.output_bytes.items()
+            if name in base.output_bytes
+        ]
+        for name, value, base_value in measurements:
+            if value > base_value * (1 + tolerance):
+                regressions.append(
+                    f"{'/'.join(result.key)}: {name} {base_value} -> {value} "
+                    f"(+{(value / base_value - 1) * 100 if base_value else 100:.0f}%)"
+                )
+    return regressions
+
+
+def compare_startup(
+    startup: dict[str, float], baseline: dict[str, float], tolerance: float
+) -> list[str]:
+    """Describe the startup times that are worse than the baseline by more than
+    the tolerance."""
+    return [
+        f"startup {name}: {baseline[name]} -> {seconds} "
+        f"(+{(seconds / baseline[name] - 1) * 100:.0f}%)"
+        for name, seconds in startup.items()
+        if name in baseline and seconds > baseline[name] * (1 + tolerance)
+    ]
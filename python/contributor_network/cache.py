@@ -0,0 +1,206 @@
+"""A persistent HTTP response cache using conditional requests.
+
+Github answers a conditional request (``If-None-Match`` with the ETag of a
+previous response, or ``If-Modified-Since``) with ``304 Not Modified`` when the
+resource has not changed, and 304 responses do not count against the rate
+limit. Cached responses are stored on disk and evicted least recently used
+first once the cache grows beyond its size limit.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+from requests import PreparedRequest, Response
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from .files import write_atomic
+from .transport import ForwardingAdapter
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Headers of a 304 response that replace the cached ones
+FRESH_HEADERS = ("date", "x-ratelimit-")
+# Headers describing the encoding on the wire, which is undone before caching
+WIRE_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+class CachedResponse:
+    """The parts of a response needed to replay it."""
+
+    def __init__(self, url: str, headers: dict[str, str], body: bytes) -> None:
+        self.url = url
+        self.headers = headers
+        self.body = body
+
+    @property
+    def etag(self) -> str | None:
+        return self.headers.get("etag")
+
+    @property
+    def last_modified(self) -> str | None:
+        return self.headers.get("last-modified")
+
+
+class ResponseCache:
+    """A size-bounded, least recently used cache of responses on disk.
+
+    Each response is stored as a ``<key>.json`` metadata file and a
+    ``<key>.body`` file, where the key is a hash of the request method, URL and
+    accepted media type. Reading an entry updates its modification time, which
+    is used to order evictions.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._sizes: dict[str, int] = {}
+        if directory.exists():
+            for path in directory.glob("*.body"):
+                key = path.stem
+                self._sizes[key] = path.stat().st_size
+                meta = path.with_suffix(".json")
+                if meta.exists():
+                    self._sizes[key] += meta.stat().st_size
+
+    @staticmethod
+    def key(request: PreparedRequest) -> str:
+        accept = request.headers.get("Accept", "")
+        return hashlib.sha256(
+            f"{request.method!s} {request.url!s} {accept!s}".encode()
+        ).hexdigest()
+
+    @property
+    def size(self) -> int:
+        """The total size of the cached entries in bytes."""
+        return sum(self._sizes.values())
+
+    def get(self, key: str) -> CachedResponse | None:
+        meta = self.directory / f"{key}.json"
+        body = self.directory / f"{key}.body"
+        try:
+            data = json.loads(meta.read_text())
+            content = body.read_bytes()
+        except (OSError, ValueError):
+            return None
+        os.utime(body)
+        return CachedResponse(data["url"], data["headers"], content)
+
+    def put(self, key: str, response: CachedResponse) -> None:
+        meta = json.dumps({"url": response.url, "headers": response.headers})
+        write_atomic(self.directory / f"{key}.body", response.body)
+        write_atomic(self.directory / f"{key}.json", meta)
+        with self._lock:
+            self._sizes[key] = len(response.body) + len(meta.encode())
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._sizes):
+                self._remove(key)
+
+    def _evict(self) -> None:
+        total = sum(self._sizes.values())
+        if total <= self.max_bytes:
+            return
+        by_age = sorted(self._sizes, key=self._last_used)
+        for key in by_age:
+            if total <= self.max_bytes:
+                break
+            total -= self._sizes[key]
+            self._remove(key)
+
+    def _last_used(self, key: str) -> float:
+        try:
+            return (self.directory / f"{key}.body").stat().st_mtime
+        except OSError:
+            return 0.0
+
+    def _remove(self, key: str) -> None:
+        self._sizes.pop(key, None)
+        for suffix in (".body", ".json"):
+            (self.directory / f"{key}{suffix}").unlink(missing_ok=True)
+
+
+class CachingAdapter(ForwardingAdapter):
+    """A transport adapter that serves unchanged responses from a cache.
+
+    GET requests for cached resources are sent as conditional requests; a 304
+    response is turned back into the cached 200 response, with the fresh
+    rate limit headers.
+    """
+
+    def __init__(self, cache: ResponseCache, inner: BaseAdapter | None = None) -> None:
+        super().__init__(inner)
+        self.cache = cache
+
+    def send(
+        self,
+        request: PreparedRequest,
+        stream: bool = False,
+        timeout: Any = None,
+        verify: bool | str = True,
+        cert: Any = None,
+        proxies: Any = None,
+    ) -> Response:
+        if request.method != "GET" or stream:
+            return super().send(request, stream, timeout, verify, cert, proxies)
+
+        key = self.cache.key(request)
+        cached = self.cache.get(key)
+        if cached is not None:
+            request = request.copy()
+            if cached.etag:
+                request.headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                request.headers["If-Modified-Since"] = cached.last_modified
+
+        response = super().send(request, stream, timeout, verify, cert, proxies)
+
+        if response.status_code == 304 and cached is not None:
+            headers = dict(cached.headers)
+            for name, value in response.headers.items():
+                if name.lower().startswith(FRESH_HEADERS):
+                    headers[name.lower()] = value
+            response.close()
+            return replay(request, cached.url, headers, cached.body)
+
+        if response.status_code == 200 and (
+            "etag" in response.headers or "last-modified" in response.headers
+        ):
+            self.cache.put(
+                key,
+                CachedResponse(
+                    response.url,
+                    {
+                        name.lower(): value
+                        for name, value in response.headers.items()
+                        if name.lower() not in WIRE_HEADERS
+                    },
+                    response.content,
+                ),
+            )
+        return response
+
+
+def replay(
+    request: PreparedRequest, url: str, headers: dict[str, str], body: bytes
+) -> Response:
+    """Build a 200 response with the given headers and body."""
+    response = Response()
+    response.status_code = 200
+    response.reason = "OK"
+    response.url = url
+    response.request = request
+    response.headers = CaseInsensitiveDict(headers)
+    response.encoding = get_encoding_from_headers(response.headers) or "utf-8"
+    response._content = body
+    return response
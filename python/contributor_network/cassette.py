@@ -0,0 +1,131 @@
+"""Recording Github API responses, to replay them without the network.
+
+A cassette is a directory with one recorded response per distinct request.
+Requests are identified by their method, path and query, and body (for
+GraphQL queries), but not by their host or headers, so responses recorded
+from ``api.github.com`` can be served by :class:`.replay.ReplayServer` from
+any address. Each response is stored as a ``<key>.json`` metadata file (the
+status, headers and URL) and a ``<key>.body`` file.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+from requests import PreparedRequest, Response
+from requests.adapters import BaseAdapter
+
+from .cache import WIRE_HEADERS
+from .files import write_atomic
+from .transport import ForwardingAdapter
+
+
+@dataclass
+class Interaction:
+    """A recorded request and its response."""
+
+    method: str
+    path: str
+    status: int
+    headers: dict[str, str]
+    url: str
+    body: bytes
+
+    @property
+    def origin(self) -> str:
+        """The scheme and host the response was recorded from."""
+        parts = urlsplit(self.url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+
+class Cassette:
+    """A directory of recorded responses."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+
+    @staticmethod
+    def key(method: str, path: str, body: bytes | None = None) -> str:
+        digest = hashlib.sha256(body).hexdigest() if body else ""
+        return hashlib.sha256(f"{method} {path} {digest}".encode()).hexdigest()
+
+    def get(self, method: str, path: str, body: bytes | None = None) -> Interaction:
+        """Read the response to a request, or raise ``KeyError``."""
+        key = self.key(method, path, body)
+        try:
+            return self._read(key)
+        except (OSError, ValueError) as error:
+            raise KeyError(f"{method} {path}") from error
+
+    def put(self, request: PreparedRequest, response: Response) -> None:
+        body = request.body
+        if isinstance(body, str):
+            body = body.encode()
+        elif not isinstance(body, bytes):
+            body = None
+        key = self.key(request.method or "GET", request.path_url, body)
+        meta = {
+            "method": request.method,
+            "path": request.path_url,
+            "status": response.status_code,
+            "url": response.url,
+            "headers": {
+                name.lower(): value
+                for name, value in response.headers.items()
+                if name.lower() not in WIRE_HEADERS
+            },
+        }
+        write_atomic(self.directory / f"{key}.body", response.content)
+        write_atomic(self.directory / f"{key}.json", json.dumps(meta, indent=2))
+
+    def interactions(self) -> list[Interaction]:
+        """All recorded responses, in no particular order."""
+        return [self._read(path.stem) for path in self.directory.glob("*.json")]
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.directory.glob("*.json"))
+
+    def _read(self, key: str) -> Interaction:
+        meta: dict[str, Any] = json.loads((self.directory / f"{key}.json").read_text())
+        return Interaction(
+            method=meta["method"],
+            path=meta["path"],
+            status=meta["status"],
+            headers=meta["headers"],
+            url=meta["url"],
+            body=(self.directory / f"{key}.body").read_bytes(),
+        )
+
+
+class RecordingAdapter(ForwardingAdapter):
+    """A transport adapter that records every response into a cassette.
+
+    Mounted in front of a response cache, it records the complete responses
+    the cache returns rather than the ``304 Not Modified`` answers to
+    conditional requests. A request that is repeated overwrites its earlier
+    recording, e.g. a ``202 Accepted`` from a statistics endpoint is replaced
+    by the statistics once Github has computed them.
+    """
+
+    def __init__(self, cassette: Cassette, inner: BaseAdapter | None = None) -> None:
+        super().__init__(inner)
+        self.cassette = cassette
+
+    def send(
+        self,
+        request: PreparedRequest,
+        stream: bool = False,
+        timeout: Any = None,
+        verify: bool | str = True,
+        cert: Any = None,
+        proxies: Any = None,
+    ) -> Response:
+        response = super().send(request, stream, timeout, verify, cert, proxies)
+        if not stream and response.status_code != 304:
+            self.cassette.put(request, response)
+        return response
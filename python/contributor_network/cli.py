@@ -1,38 +1,133 @@
+from __future__ import annotations
+
+import functools
+import hashlib
+import importlib.util
+import io
 import json
 import os
-from collections import defaultdict
+import time
+from concurrent.futures import ThreadPoolExecutor
 from csv import DictWriter
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, Literal
 
 import click
-from github import Auth, Github
-from jinja2 import Environment, FileSystemLoader, StrictUndefined
+from pydantic import BaseModel
 
-from .client import Client
+# The Github API client (PyGithub and requests) and Jinja are slow to import,
+# so the commands that use them import them, and the others start fast
+from . import (
+    analytics,
+    benchmark,
+    compact,
+    ingest,
+    layout,
+    query,
+    replay,
+    shards,
+    sites,
+    synthetic,
+    watch,
+)
 from .config import Config
+from .files import write_atomic, write_if_changed
+from .history import HISTORY_FIELDS, HISTORY_FILE, HISTORY_PATH, Export, History
 from .models import Link, Repository
+from .profiling import Profile
+from .records import RecordCache
+from .store import (
+    DATABASE_NAME,
+    JsonStore,
+    SqliteStore,
+    Store,
+    StoreFormat,
+    open_store,
+)
+
+if TYPE_CHECKING:
+    from jinja2 import Environment
+
+    from .cache import ResponseCache
+    from .client import Backend, LinkSource
 
 TEMPLATES_DIR = Path(__file__).absolute().parent / "templates"
+# github.Consts.DEFAULT_BASE_URL
+DEFAULT_BASE_URL = "https://api.github.com"
+# Resolved against cwd, outside public/ so that Vite does not copy the caches
+CACHE_DIR = Path(".cache")
 
 
-def render_index_html(config: Config) -> str:
-    """Render the index.html template from a Config."""
-    env = Environment(
+@functools.cache
+def template_environment() -> Environment:
+    """The Jinja environment, shared by all renders.
+
+    Templates are compiled once, and recompiled when their file changes.
+    """
+    from jinja2 import Environment, FileSystemLoader, StrictUndefined
+
+    return Environment(
         loader=FileSystemLoader(TEMPLATES_DIR),
         autoescape=True,
         undefined=StrictUndefined,
     )
-    template = env.get_template("index.html.j2")
-    return template.render(
-        organization_name=config.organization_name,
-        description=config.description,
-        og_url=config.og_url,
-        og_image=config.og_image,
-        theme_color=config.resolved_theme_color,
-    )
+
+
+def index_variables(config: Config) -> dict[str, Any]:
+    return {
+        "organization_name": config.organization_name,
+        "description": config.description,
+        "og_url": config.og_url,
+        "og_image": config.og_image,
+        "theme_color": config.resolved_theme_color,
+    }
+
+
+def render_index_html(config: Config) -> str:
+    """Render the index.html template from a Config."""
+    template = template_environment().get_template("index.html.j2")
+    return template.render(**index_variables(config))
+
+
+def cached_index_html(config: Config, path: Path) -> str:
+    """The index.html of a Config, rendered only if the templates or the
+    variables changed since the rendering kept in ``path``."""
+    digest = hashlib.sha256(json.dumps(index_variables(config)).encode())
+    for template in sorted(TEMPLATES_DIR.iterdir()):
+        digest.update(template.read_bytes())
+    try:
+        cached = json.loads(path.read_bytes())
+    except (OSError, ValueError):
+        cached = {}
+    if cached.get("key") == digest.hexdigest():
+        return cached["html"]
+    html = render_index_html(config)
+    write_atomic(path, json.dumps({"key": digest.hexdigest(), "html": html}))
+    return html
+
+
+def default_requests_per_minute() -> int:
+    # Only called by the commands using the option, which import requests anyway
+    from .ratelimit import DEFAULT_REQUESTS_PER_MINUTE
+
+    return DEFAULT_REQUESTS_PER_MINUTE
 
 
 DEFAULT_CONFIG_PATH = "config.toml"
+OutputFormat = Literal["csv", "compact"]
+# The outputs of a build, which can be written separately; analytics.json
+# (see build --analytics) is only written on request
+OUTPUTS = frozenset(
+    {
+        "top_contributors",
+        "repositories",
+        "links",
+        "layout",
+        "history",
+        "config",
+        "index",
+    }
+)
 directory = click.option(
     "--directory",
     type=click.Path(path_type=Path),
@@ -46,14 +141,137 @@ config = click.option(
     type=click.Path(),
     help="Path to the configuration file",
 )
+configs = click.option(
+    "-c",
+    "--config",
+    "config_paths",
+    type=click.Path(),
+    multiple=True,
+    help="Path to a configuration file, repeat to fetch for several sites at once",
+)
 github_token = click.option(
     "--github-token", envvar="GITHUB_TOKEN", help="GitHub token"
 )
+github_tokens = click.option(
+    "--github-token",
+    "github_tokens",
+    envvar="GITHUB_TOKEN",
+    multiple=True,
+    help="GitHub token, repeat (or separate with spaces in GITHUB_TOKEN) to "
+    "spread requests over the rate limits of several tokens",
+)
 all_contributors = click.option(
     "--all-contributors",
     is_flag=True,
     help="Include all contributor categories (not just core members)",
 )
+cache_dir = click.option(
+    "--cache-dir",
+    type=click.Path(path_type=Path),
+    help="Directory for cached Github API responses "
+    "(default: .cache/http, resolved against cwd)",
+)
+no_cache = click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Do not read or write cached Github API responses",
+)
+requests_per_minute = click.option(
+    "--requests-per-minute",
+    type=click.IntRange(min=1),
+    default=default_requests_per_minute,
+    help="Maximum number of Github API requests per minute",
+)
+wait = click.option(
+    "--wait/--no-wait",
+    default=True,
+    help="Pause until the rate limit resets when it runs out, or stop",
+)
+store_format = click.option(
+    "--store",
+    "store_format",
+    type=click.Choice(["json", "sqlite"]),
+    default="json",
+    help="Keep repositories and links as one JSON file each, or in a single "
+    f"SQLite database ({DATABASE_NAME} in the data directory)",
+)
+base_url = click.option(
+    "--base-url",
+    default=DEFAULT_BASE_URL,
+    show_default=True,
+    help="Root URL of the Github API, e.g. of a replay server",
+)
+record = click.option(
+    "--record",
+    type=click.Path(file_okay=False, path_type=Path),
+    help="Record every Github API response into this cassette directory",
+)
+output_format = click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["csv", "compact"]),
+    default="csv",
+    help="Write the data as CSVs, or as one dictionary-encoded JSON file with "
+    "precompressed copies and a content-hashed name",
+)
+with_layout = click.option(
+    "--layout",
+    "with_layout",
+    is_flag=True,
+    help="Precompute the initial positions of the network in layout.json "
+    "(requires numpy)",
+)
+with_analytics = click.option(
+    "--analytics",
+    "with_analytics",
+    is_flag=True,
+    help="Also write analytics.json: the contributor-repository adjacency, the "
+    "contributors shared by pairs of repositories, degrees and owner totals",
+)
+history_fields = click.option(
+    "--history",
+    "history_fields",
+    type=click.Choice(HISTORY_FIELDS),
+    multiple=True,
+    help=f"Export the time series of a field recorded by fetch to {HISTORY_FILE}, "
+    "repeat for several fields",
+)
+history_days = click.option(
+    "--history-days",
+    type=click.IntRange(min=1),
+    default=365,
+    show_default=True,
+    help="Days of history to export",
+)
+history_file = click.option(
+    "--history-file",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=HISTORY_PATH,
+    show_default=True,
+    help="The history of repository and link statistics, kept outside the data "
+    "directory so that the site does not ship it (resolved against cwd if relative)",
+)
+profile_report = click.option(
+    "--profile-report",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Write request and timing measurements to this JSON file",
+)
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    try:
+        return shards.parse(value)
+    except ValueError as error:
+        raise click.BadParameter(str(error)) from error
+
+
+def open_cache(cache_dir: Path | None, no_cache: bool) -> ResponseCache | None:
+    """Open the Github API response cache, unless disabled."""
+    if no_cache:
+        return None
+    from .cache import ResponseCache
+
+    return ResponseCache(cache_dir or CACHE_DIR / "http")
 
 
 @click.group()
@@ -63,15 +281,77 @@ def main():
 
 @main.command()
 @directory
-@config
-@github_token
+@configs
+@github_tokens
 @all_contributors
+@cache_dir
+@no_cache
+@requests_per_minute
+@wait
+@store_format
+@base_url
+@record
+@click.option(
+    "--concurrency",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of repositories (and links) to fetch in parallel",
+)
+@click.option(
+    "--backend",
+    type=click.Choice(["rest", "graphql"]),
+    default="rest",
+    help="API used for repository metadata (graphql batches many repos per query)",
+)
+@click.option(
+    "--links",
+    "link_source",
+    type=click.Choice(["commits", "stats", "authors"]),
+    default="commits",
+    help="Build links from each contributor's commits, from one weekly "
+    "contributor statistics request per repository, or from the configured "
+    "contributors' commits to all repositories in batched GraphQL queries",
+)
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="Only refresh repositories that changed since they were last fetched",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Skip the repositories and links completed by the last, interrupted, fetch",
+)
+@click.option(
+    "--shard",
+    callback=lambda ctx, param, value: value and parse_shard(value),
+    metavar="I/N",
+    help="Only fetch the I-th of N parts of the repositories, e.g. in one of N "
+    "CI jobs, then combine their data directories with merge",
+)
+@history_file
+@profile_report
 @click.argument("repos", nargs=-1)
 def fetch(
     directory: Path,
-    config_path: str | None,
-    github_token: str | None,
+    config_paths: tuple[str, ...],
+    github_tokens: tuple[str, ...],
     all_contributors: bool,
+    cache_dir: Path | None,
+    no_cache: bool,
+    requests_per_minute: int,
+    wait: bool,
+    store_format: StoreFormat,
+    base_url: str,
+    record: Path | None,
+    concurrency: int,
+    backend: Backend,
+    link_source: LinkSource,
+    incremental: bool,
+    resume: bool,
+    shard: tuple[int, int] | None,
+    history_file: Path,
+    profile_report: Path | None,
     repos: tuple[str, ...],
 ):
     """Fetch contributor network data from the Github API.
@@ -79,81 +359,453 @@ def fetch(
     Optionally pass one or more REPOS (e.g. owner/repo) to fetch only those
     repositories instead of all configured ones.
 
+    With several configs, the repositories and contributors of all of them are
+    fetched into the same data directory, each only once. Build each site
+    from it with build --source.
+
     This is an expensive operation that involves a lot of network calls to the
     Github API.
     """
+    from github import Auth
 
-    config = Config.from_toml(config_path or DEFAULT_CONFIG_PATH)
+    from .cassette import Cassette
+    from .client import Client
+    from .ratelimit import RateLimiter, RateLimitExhausted, TokenPool
+
+    configured, contributors = sites.merge(
+        [Config.from_toml(path) for path in config_paths or [DEFAULT_CONFIG_PATH]],
+        all_contributors,
+    )
 
     if repos:
         repositories = list(repos)
-        unknown = set(repositories) - set(config.repositories)
+        unknown = set(repositories) - set(configured)
         if unknown:
             raise click.UsageError(
                 f"Repositories not found in config: {', '.join(sorted(unknown))}"
             )
     else:
-        repositories = config.repositories
+        repositories = configured
+    if shard is not None:
+        repositories = shards.select(repositories, *shard)
+        print(
+            f"Fetching {len(repositories)} repositories of shard {shard[0]}/{shard[1]}"
+        )
 
-    if github_token:
-        auth: Auth.Auth = Auth.Token(github_token)
+    token_pool = None
+    if github_tokens:
+        auth: Auth.Auth = Auth.Token(github_tokens[0])
+        if len(github_tokens) > 1:
+            token_pool = TokenPool(list(github_tokens))
     else:
         auth = Auth.NetrcAuth()
 
-    client = Client(auth, directory)
-
-    contributors = (
-        config.all_contributors if all_contributors else config.core_contributors
+    profile = Profile()
+    store = open_store(directory, store_format)
+    client = Client(
+        auth,
+        directory,
+        concurrency=concurrency,
+        backend=backend,
+        link_source=link_source,
+        cache=open_cache(cache_dir, no_cache),
+        rate_limiter=RateLimiter(per_minute=requests_per_minute, wait=wait),
+        token_pool=token_pool,
+        profile=profile,
+        store=store,
+        base_url=base_url,
+        cassette=Cassette(record) if record else None,
     )
+
     print(f"Building data for {len(contributors)} contributors")
 
-    for repository in repositories:
-        print(f"Updating repository: {repository}")
-        repo = client.get_repo(repository)
-        client.update_repository(repo)
-        print(f"Updating links: {repository}")
-        client.update_links(repo, contributors)
+    try:
+        client.fetch(repositories, contributors, incremental=incremental, resume=resume)
+        # The history of sharded fetches is recorded by merge
+        if shard is None:
+            record_history(history_file, store)
+    except RateLimitExhausted as error:
+        raise click.ClickException(
+            f"{error}. Completed work is recorded in the journal, "
+            "run again with --resume after the reset to continue."
+        ) from error
+    finally:
+        store.close()
+        if profile_report:
+            write_profile(profile, profile_report)
 
 
 @main.command()
 @directory
 @config
 @all_contributors
-def build(directory: Path, config_path: str | None, all_contributors: bool) -> None:
+@store_format
+@output_format
+@with_layout
+@with_analytics
+@click.option(
+    "--watch",
+    "watch_inputs",
+    is_flag=True,
+    help="Keep running, and rebuild the affected outputs whenever the config, "
+    "the templates or the records change",
+)
+@click.option(
+    "--source",
+    type=click.Path(exists=True, file_okay=False, path_type=Path),
+    help="Shared data directory (see fetch) to take this config's repositories "
+    "and contributors from, instead of using all records of the data directory",
+)
+@history_fields
+@history_days
+@history_file
+@profile_report
+def build(
+    directory: Path,
+    config_path: str | None,
+    all_contributors: bool,
+    store_format: StoreFormat,
+    output_format: OutputFormat,
+    with_layout: bool,
+    with_analytics: bool,
+    watch_inputs: bool,
+    source: Path | None,
+    history_fields: tuple[str, ...],
+    history_days: int,
+    history_file: Path,
+    profile_report: Path | None,
+) -> None:
     """Generate CSVs and config.json for the contributor network site."""
+    check_layout(with_layout)
+    history = history_export(history_file, history_fields, history_days)
+    outputs = OUTPUTS | {"analytics"} if with_analytics else OUTPUTS
+    if watch_inputs:
+        with open_store(source or directory, store_format) as store:
+            watch_build(
+                directory,
+                config_path,
+                all_contributors,
+                store,
+                output_format,
+                with_layout,
+                shared=source is not None,
+                history=history,
+                outputs=outputs,
+            )
+        return
+    profile = Profile()
+    with (
+        profile.timer("build"),
+        open_store(source or directory, store_format) as store,
+    ):
+        _build(
+            directory,
+            config_path,
+            all_contributors,
+            store,
+            output_format,
+            with_layout,
+            profile,
+            shared=source is not None,
+            history=history,
+            outputs=outputs,
+        )
+    if profile_report:
+        write_profile(profile, profile_report)
+
+
+def history_export(path: Path, fields: tuple[str, ...], days: int) -> Export:
+    if fields and not path.exists():
+        raise click.UsageError(f"No history in {path}, it is recorded by fetch")
+    return Export(path, fields, days)
+
+
+def check_layout(with_layout: bool) -> None:
+    if with_layout and importlib.util.find_spec("numpy") is None:
+        raise click.UsageError(
+            "--layout requires numpy, install contributor-network[layout]"
+        )
+
+
+def _build(
+    directory: Path,
+    config_path: str | None,
+    all_contributors: bool,
+    store: Store,
+    output_format: OutputFormat,
+    with_layout: bool,
+    profile: Profile,
+    shared: bool = False,
+    history: Export | None = None,
+    outputs: frozenset[str] = OUTPUTS,
+) -> None:
     config = Config.from_toml(config_path or DEFAULT_CONFIG_PATH)
-    contributors = (
-        config.all_contributors if all_contributors else config.core_contributors
-    )
+    contributors = selected_contributors(config, all_contributors)
     authors = list(contributors.values())
-    print(f"Writing CSVs for {len(authors)} contributors")
+    print(f"Writing data for {len(authors)} contributors")
 
     directory.mkdir(parents=True, exist_ok=True)
-
-    (directory / "top_contributors.csv").write_text(
-        "\n".join(["author_name"] + authors)
+    repositories, links = load_rows(
+        directory, store, config, contributors, shared, profile
+    )
+    write_site(
+        directory,
+        config,
+        authors,
+        repositories,
+        links,
+        output_format,
+        with_layout,
+        profile,
+        outputs,
+        history,
     )
 
-    repositories = []
-    for path in (directory / "repositories").glob("**/*.json"):
-        repositories.append(
-            Repository.model_validate_json(path.read_text()).model_dump(mode="json")
+
+def selected_contributors(config: Config, all_contributors: bool) -> dict[str, str]:
+    return config.all_contributors if all_contributors else config.core_contributors
+
+
+def load_rows(
+    directory: Path,
+    store: Store,
+    config: Config,
+    contributors: dict[str, str],
+    shared: bool,
+    profile: Profile,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """The repository and link rows to build the site from."""
+    if shared:
+        with profile.timer("project shared records"):
+            repositories, links = sites.project(
+                store, config.repositories, contributors
+            )
+        print(f"Selected {len(repositories)} repositories and {len(links)} links")
+        return repositories, links
+
+    # Rows of unchanged repository and link files are reused from the last build
+    cache = RecordCache(CACHE_DIR / "build.json")
+    with profile.timer("parse repositories"):
+        repositories = store.repository_rows(cache)
+    with profile.timer("parse links"):
+        links = store.link_rows(cache)
+    cache.save()
+    if cache.hits or cache.misses:
+        print(f"Parsed {cache.misses} changed records, reused {cache.hits}")
+    return repositories, links
+
+
+def watch_build(
+    directory: Path,
+    config_path: str | None,
+    all_contributors: bool,
+    store: Store,
+    output_format: OutputFormat,
+    with_layout: bool,
+    shared: bool,
+    history: Export | None = None,
+    outputs: frozenset[str] = OUTPUTS,
+) -> None:
+    """Build, then rebuild the outputs affected by each change of the inputs.
+
+    Records are kept in memory; with the JSON store, only changed files are
+    read again.
+    """
+    profile = Profile()
+    config_file = Path(config_path or DEFAULT_CONFIG_PATH).absolute()
+    config = Config.from_toml(config_file)
+    contributors = selected_contributors(config, all_contributors)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    repository_records = link_records = None
+    if isinstance(store, JsonStore) and not shared:
+        repository_records = watch.Records(Repository, store.directory / "repositories")
+        link_records = watch.Records(Link, store.directory / "links")
+        cache = RecordCache(CACHE_DIR / "build.json")
+        repository_records.load(cache)
+        link_records.load(cache)
+        cache.save()
+        repositories, links = repository_records.rows, link_records.rows
+    else:
+        repositories, links = load_rows(
+            directory, store, config, contributors, shared, profile
         )
-    with open(directory / "repositories.csv", "w") as f:
-        fieldnames = list(Repository.model_json_schema()["properties"].keys())
-        writer = DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(repositories)
-
-    links = []
-    for path in (directory / "links").glob("**/*.json"):
-        links.append(Link.model_validate_json(path.read_text()).model_dump(mode="json"))
-    with open(directory / "links.csv", "w") as f:
-        fieldnames = list(Link.model_json_schema()["properties"].keys())
-        writer = DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(links)
+    store_paths = store_files(store)
+
+    write_site(
+        directory,
+        config,
+        list(contributors.values()),
+        repositories,
+        links,
+        output_format,
+        with_layout,
+        profile,
+        outputs,
+        history,
+    )
+    history_paths = [history.path] if history is not None and history.fields else []
+
+    def rebuild(changes: set[Path]) -> None:
+        nonlocal config, contributors, repositories, links
+        start = time.perf_counter()
+        affected: set[str] = set()
+        invalid: list[ValueError] = []
+        try:
+            if config_file in changes:
+                config = Config.from_toml(config_file)
+                contributors = selected_contributors(config, all_contributors)
+                affected |= outputs
+            if any(path.is_relative_to(TEMPLATES_DIR) for path in changes):
+                affected.add("index")
+            if repository_records is not None and link_records is not None:
+                for records, records_outputs in (
+                    (repository_records, {"repositories", "analytics"}),
+                    (link_records, {"links", "analytics", "layout"}),
+                ):
+                    try:
+                        if records.update(changes):
+                            affected |= records_outputs
+                    except ValueError as error:
+                        # The valid records changed with it are still built
+                        invalid.append(error)
+                        affected |= records_outputs
+                repositories, links = repository_records.rows, link_records.rows
+            elif (shared and config_file in changes) or any(
+                path.is_relative_to(store_path)
+                for path in changes
+                for store_path in store_paths
+            ):
+                repositories, links = load_rows(
+                    directory, store, config, contributors, shared, profile
+                )
+                affected |= {"repositories", "links", "analytics", "layout"}
+            if any(path in changes for path in history_paths):
+                affected.add("history")
+            write_site(
+                directory,
+                config,
+                list(contributors.values()),
+                repositories,
+                links,
+                output_format,
+                with_layout,
+                profile,
+                outputs & affected,
+                history,
+            )
+        except (OSError, ValueError) as error:
+            # e.g. a config or record with a typo, which the next change fixes
+            print(f"Error: {error}")
+            return
+        for invalid_error in invalid:
+            print(f"Error: {invalid_error}")
+        print(f"Rebuilt in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    print(f"Watching {config_file}, the templates and the records for changes")
+    try:
+        watch.poll([config_file, TEMPLATES_DIR, *store_paths, *history_paths], rebuild)
+    except KeyboardInterrupt:
+        pass
+
+
+def record_history(path: Path, store: Store) -> None:
+    """Append a snapshot of the store to a history."""
+    changed = History(path).append(store)
+    print(f"Recorded {changed} changed values in {path}")
+
+
+def store_files(store: Store) -> list[Path]:
+    """The files and directories a store keeps its records in."""
+    if isinstance(store, SqliteStore):
+        return [store.path, store.path.with_name(f"{store.path.name}-wal")]
+    if isinstance(store, JsonStore):
+        return [store.directory / "repositories", store.directory / "links"]
+    return []
+
+
+def write_site(
+    directory: Path,
+    config: Config,
+    authors: list[str],
+    repositories: list[dict[str, Any]],
+    links: list[dict[str, Any]],
+    output_format: OutputFormat,
+    with_layout: bool,
+    profile: Profile,
+    outputs: frozenset[str] = OUTPUTS,
+    history: Export | None = None,
+) -> None:
+    """Write the outputs of the site, or some of them (see ``OUTPUTS``)."""
+    data_file = None
+    if output_format == "compact":
+        # config.json names the data file
+        if outputs & {"top_contributors", "repositories", "links", "config"}:
+            with profile.timer("serialize compact data"):
+                data_file, changed = compact.write(
+                    directory, compact.encode(authors, repositories, links)
+                )
+            print(f"{'Generated' if changed else 'Unchanged'} {directory / data_file}")
+            outputs |= {"config"}
+    else:
+        if "top_contributors" in outputs:
+            write_output(
+                directory / "top_contributors.csv",
+                "\n".join(["author_name"] + authors),
+            )
+        if "repositories" in outputs:
+            with profile.timer("serialize repositories.csv"):
+                write_output(
+                    directory / "repositories.csv", csv_text(Repository, repositories)
+                )
+        if "links" in outputs:
+            with profile.timer("serialize links.csv"):
+                write_output(directory / "links.csv", csv_text(Link, links))
+
+    if "analytics" in outputs:
+        with profile.timer("analyze"):
+            write_output(
+                directory / "analytics.json",
+                json.dumps(
+                    analytics.analyze(repositories, links), separators=(",", ":")
+                ),
+            )
+
+    if with_layout and "layout" in outputs:
+        with profile.timer("layout"):
+            write_output(
+                directory / "layout.json",
+                json.dumps(layout.compute(authors, links), indent=1),
+            )
+
+    history_file = None
+    if history is not None and history.fields:
+        history_file = HISTORY_FILE
+        if "history" in outputs:
+            with profile.timer("export history"):
+                write_output(
+                    directory / HISTORY_FILE,
+                    json.dumps(history.data(), separators=(",", ":")),
+                )
 
+    if "config" in outputs:
+        write_config_json(directory, config, data_file, with_layout, history_file)
+
+    if "index" in outputs:
+        with profile.timer("render index.html"):
+            write_output(
+                Path("index.html"),
+                cached_index_html(config, CACHE_DIR / "index.json"),
+            )
+
+
+def write_config_json(
+    directory: Path,
+    config: Config,
+    data_file: str | None,
+    with_layout: bool,
+    history_file: str | None = None,
+) -> None:
     config_json = {
         "title": config.title,
         "description": config.description,
@@ -168,32 +820,469 @@ def build(directory: Path, config_path: str | None, all_contributors: bool) -> N
         },
         "plausible_id": os.environ.get("PLAUSIBLE_ID", ""),
     }
-    (directory / "config.json").write_text(
-        json.dumps(config_json, indent=2, ensure_ascii=False)
+    if data_file is not None:
+        # Read by the site instead of the CSVs
+        config_json["data"] = data_file
+    if with_layout:
+        config_json["layout"] = "layout.json"
+    if history_file is not None:
+        config_json["history"] = history_file
+    write_output(
+        directory / "config.json", json.dumps(config_json, indent=2, ensure_ascii=False)
     )
-    print(f"Generated config.json in {directory}")
 
-    index_html = Path("index.html")
-    index_html.write_text(render_index_html(config))
-    print(f"Generated index.html at {index_html}")
+
+@functools.cache
+def csv_fieldnames(model: type[BaseModel]) -> tuple[str, ...]:
+    """The columns of a model's CSV: its fields, in order."""
+    return tuple(model.model_fields)
+
+
+def csv_text(model: type[BaseModel], rows: list[dict[str, Any]]) -> str:
+    """Rows of a model as CSV, with the model's fields as columns."""
+    f = io.StringIO()
+    writer = DictWriter(f, fieldnames=csv_fieldnames(model))
+    writer.writeheader()
+    writer.writerows(rows)
+    return f.getvalue()
+
+
+def write_output(path: Path, text: str) -> None:
+    """Write a build output, leaving it untouched if its content is unchanged."""
+    if write_if_changed(path, text):
+        print(f"Generated {path}")
+    else:
+        print(f"Unchanged {path}")
+
+
+def write_profile(profile: Profile, path: Path) -> None:
+    """Write a profile report and print its summary."""
+    profile.write(path)
+    print()
+    print(profile.summary())
+    print(f"Wrote profile report to {path}")
 
 
 @main.command()
+@directory
+def migrate(directory: Path) -> None:
+    """Import the JSON files of the data directory into its SQLite database.
+
+    Afterwards, pass --store sqlite to fetch and build to use the database.
+    The JSON files are left in place.
+    """
+    with SqliteStore(directory / DATABASE_NAME) as store:
+        repositories, links = store.import_json(JsonStore(directory))
+    print(
+        f"Imported {repositories} repositories and {links} links "
+        f"into {directory / DATABASE_NAME}"
+    )
+
+
+@main.command("merge")
+@directory
+@store_format
+@history_file
+@click.argument(
+    "sources",
+    nargs=-1,
+    required=True,
+    type=click.Path(exists=True, file_okay=False, path_type=Path),
+)
+def merge_command(
+    directory: Path,
+    store_format: StoreFormat,
+    history_file: Path,
+    sources: tuple[Path, ...],
+) -> None:
+    """Combine the data directories SOURCES of sharded fetches into one.
+
+    Repositories and links fetched by several shards are taken from the most
+    recent fetch. Directories of fetches that did not complete are refused.
+    """
+    try:
+        repositories, links = shards.merge(list(sources), directory, store_format)
+    except shards.MergeError as error:
+        raise click.ClickException(str(error)) from error
+    print(
+        f"Merged {repositories} repositories and {links} links "
+        f"from {len(sources)} directories into {directory}"
+    )
+    with open_store(directory, store_format) as store:
+        record_history(history_file, store)
+
+
+@main.command("serve")
+@directory
+@config
+@all_contributors
+@store_format
+@click.option(
+    "--source",
+    type=click.Path(exists=True, file_okay=False, path_type=Path),
+    help="Shared data directory (see fetch) to take this config's repositories "
+    "and contributors from, instead of using all records of the data directory",
+)
+@click.option("--host", default="127.0.0.1", show_default=True, help="Address")
+@click.option(
+    "--port", type=int, default=query.DEFAULT_PORT, show_default=True, help="Port"
+)
+def serve(
+    directory: Path,
+    config_path: str | None,
+    all_contributors: bool,
+    store_format: StoreFormat,
+    source: Path | None,
+    host: str,
+    port: int,
+) -> None:
+    """Answer JSON queries about the network, e.g. for dashboards.
+
+    The records are loaded into memory once. Query the repositories of a
+    contributor (/contributors/NAME/repositories?since=2025-01-01), their
+    co-contributors (/contributors/NAME/co-contributors?limit=10), a
+    repository (/repositories/OWNER/REPO) or an owner (/owners/OWNER).
+    """
+    config = Config.from_toml(config_path or DEFAULT_CONFIG_PATH)
+    contributors = selected_contributors(config, all_contributors)
+    with open_store(source or directory, store_format) as store:
+        repositories, links = load_rows(
+            directory, store, config, contributors, source is not None, Profile()
+        )
+    server = query.QueryServer(query.Network(repositories, links), host=host, port=port)
+    print(
+        f"Serving {len(repositories)} repositories and {len(links)} links "
+        f"at {server.url}"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+@main.command("replay")
+@click.argument(
+    "cassette", type=click.Path(exists=True, file_okay=False, path_type=Path)
+)
+@click.option("--host", default="127.0.0.1", show_default=True, help="Address")
+@click.option("--port", type=int, default=8765, show_default=True, help="Port")
+@click.option(
+    "--latency",
+    type=click.FloatRange(min=0),
+    default=0.0,
+    help="Seconds to delay every response by",
+)
+@click.option(
+    "--rate-limit",
+    type=click.IntRange(min=0),
+    default=replay.DEFAULT_RATE_LIMIT,
+    show_default=True,
+    help="Requests allowed per resource until the budget resets",
+)
+@click.option(
+    "--reset-seconds",
+    type=click.FloatRange(min=0, min_open=True),
+    default=replay.DEFAULT_RESET_SECONDS,
+    show_default=True,
+    help="Seconds after which the rate limit budget resets",
+)
+@click.option(
+    "--page-size",
+    type=click.IntRange(min=1),
+    help="Serve lists in pages of this size, whatever the client asks for",
+)
+def replay_command(
+    cassette: Path,
+    host: str,
+    port: int,
+    latency: float,
+    rate_limit: int,
+    reset_seconds: float,
+    page_size: int | None,
+) -> None:
+    """Serve the Github API responses recorded in CASSETTE.
+
+    Record a cassette with fetch --record (or discover --record), then run
+    fetch against this server with --base-url to measure and test it without
+    network access. Any token is accepted.
+    """
+    from .cassette import Cassette
+
+    server = replay.ReplayServer(
+        Cassette(cassette),
+        host=host,
+        port=port,
+        latency=latency,
+        rate_limit=rate_limit,
+        reset_seconds=reset_seconds,
+        page_size=page_size,
+    )
+    print(f"Replaying {len(server.cassette)} responses at {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+@main.command("ingest-server")
+@directory
+@config
+@all_contributors
+@store_format
+@output_format
+@with_layout
+@with_analytics
+@history_fields
+@history_days
+@history_file
+@click.option("--host", default="127.0.0.1", show_default=True, help="Address")
+@click.option("--port", type=int, default=8766, show_default=True, help="Port")
+@click.option(
+    "--secret",
+    envvar="GITHUB_WEBHOOK_SECRET",
+    help="The webhook's secret, to reject deliveries without a valid signature",
+)
+@click.option(
+    "--batch-seconds",
+    type=click.FloatRange(min=0, min_open=True),
+    default=ingest.DEFAULT_BATCH_SECONDS,
+    show_default=True,
+    help="Seconds to collect changes for before writing them and building",
+)
+@click.option(
+    "--build/--no-build",
+    "rebuild",
+    default=True,
+    help="Build the site after each batch of changes",
+)
+def ingest_server(
+    directory: Path,
+    config_path: str | None,
+    all_contributors: bool,
+    store_format: StoreFormat,
+    output_format: OutputFormat,
+    with_layout: bool,
+    with_analytics: bool,
+    history_fields: tuple[str, ...],
+    history_days: int,
+    history_file: Path,
+    host: str,
+    port: int,
+    secret: str | None,
+    batch_seconds: float,
+    rebuild: bool,
+) -> None:
+    """Update links and repositories from Github push and pull request webhooks.
+
+    Point the webhooks of the fetched repositories (content type
+    application/json) at this server to keep the data current between
+    fetches, without API requests. Only the commits of the configured
+    contributors to repositories in the data directory are counted.
+
+    Pass the output options of the site's build, so that the outputs built
+    after each batch, and config.json, match it.
+    """
+    check_layout(with_layout)
+    history = history_export(history_file, history_fields, history_days)
+    outputs = frozenset({"repositories", "links", "layout"})
+    if with_analytics:
+        outputs |= {"analytics"}
+    config = Config.from_toml(config_path or DEFAULT_CONFIG_PATH)
+    contributors = selected_contributors(config, all_contributors)
+    profile = Profile()
+
+    with open_store(directory, store_format) as store:
+
+        def build_site(repositories: int, links: int) -> None:
+            start = time.perf_counter()
+            print(f"Updated {repositories} repositories and {links} links")
+            if not rebuild:
+                return
+            repository_rows, link_rows = load_rows(
+                directory, store, config, contributors, False, profile
+            )
+            write_site(
+                directory,
+                config,
+                list(contributors.values()),
+                repository_rows,
+                link_rows,
+                output_format,
+                with_layout,
+                profile,
+                outputs,
+                history,
+            )
+            print(f"Rebuilt in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        server = ingest.IngestServer(
+            ingest.Ingester(store, contributors),
+            host=host,
+            port=port,
+            secret=secret,
+            batch_seconds=batch_seconds,
+            on_flush=build_site,
+        )
+        print(f"Receiving webhooks at {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.stop()
+
+
+@main.command("benchmark")
+@click.option(
+    "--size",
+    "sizes",
+    type=click.Choice(list(synthetic.SIZES)),
+    multiple=True,
+    default=["small", "medium"],
+    help="Sizes of the synthetic datasets to build (repeatable)",
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["csv", "compact"]),
+    default="csv",
+    help="Output format to build",
+)
+@store_format
+@click.option(
+    "--repeat",
+    type=click.IntRange(min=1),
+    default=3,
+    help="Number of runs per dataset, of which the fastest is kept",
+)
+@click.option(
+    "--startup/--no-startup",
+    "measure_startup",
+    default=True,
+    help="Also measure the startup time of --help, list-contributors and a "
+    "build with nothing to do",
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Write the results to this JSON file",
+)
+@click.option(
+    "--baseline",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="Compare the results with those in this JSON file",
+)
+@click.option(
+    "--tolerance",
+    type=click.FloatRange(min=0),
+    default=0.25,
+    help="Fraction by which a result may exceed the baseline",
+)
+def benchmark_command(
+    sizes: tuple[str, ...],
+    output_format: OutputFormat,
+    store_format: StoreFormat,
+    repeat: int,
+    measure_startup: bool,
+    output: Path | None,
+    baseline: Path | None,
+    tolerance: float,
+) -> None:
+    """Measure build on synthetic datasets of increasing size.
+
+    Each dataset is built cold (without the record cache) and warm, in a new
+    process. The wall times, the peak memory and the size of the outputs are
+    printed, and optionally written to a JSON file. With --baseline, fails if
+    any of them got worse than in an earlier run by more than the tolerance.
+    """
+    startup = {}
+    if measure_startup:
+        startup = benchmark.startup(repeat=max(repeat, 5))
+        print(f"{'command':>18} {'startup s':>10}")
+        for name, seconds in startup.items():
+            print(f"{name:>18} {seconds:>10.3f}")
+        print()
+    results = []
+    print(
+        f"{'size':>8} {'repos':>7} {'links':>7} {'cold s':>8} {'warm s':>8} "
+        f"{'peak MB':>8} {'output kB':>10}"
+    )
+    for name in sizes:
+        result = benchmark.run(
+            synthetic.SIZES[name], output_format, store_format, repeat=repeat
+        )
+        results.append(result)
+        print(
+            f"{result.size:>8} {result.repositories:>7} {result.links:>7} "
+            f"{result.cold_seconds:>8.2f} {result.warm_seconds:>8.2f} "
+            f"{result.peak_memory_mb:>8.1f} "
+            f"{sum(result.output_bytes.values()) / 1000:>10.1f}"
+        )
+    if output:
+        write_atomic(
+            output, json.dumps(benchmark.report(results, startup), indent=2) + "\n"
+        )
+        print(f"Wrote benchmark results to {output}")
+    if baseline:
+        previous = json.loads(baseline.read_text())
+        regressions = benchmark.compare_startup(
+            startup, benchmark.load_startup(previous), tolerance
+        ) + benchmark.compare(results, benchmark.load(previous), tolerance)
+        if regressions:
+            raise click.ClickException(
+                "Regressions against the baseline:\n" + "\n".join(regressions)
+            )
+        print(f"No regressions against {baseline}")
+
+
+@main.command()
+@directory
 @config
 @github_token
+@cache_dir
+@no_cache
+@requests_per_minute
+@base_url
+@record
+@click.option(
+    "--concurrency",
+    type=click.IntRange(min=1),
+    default=4,
+    help="Number of contributors whose events are fetched in parallel",
+)
 @click.option(
     "--min-contributors", default=2, help="Minimum core contributors to show a repo"
 )
 @click.option("--limit", default=50, help="Maximum number of repos to display")
 def discover(
-    config_path: str | None, github_token: str | None, min_contributors: int, limit: int
+    directory: Path,
+    config_path: str | None,
+    github_token: str | None,
+    cache_dir: Path | None,
+    no_cache: bool,
+    requests_per_minute: int,
+    base_url: str,
+    record: Path | None,
+    concurrency: int,
+    min_contributors: int,
+    limit: int,
 ) -> None:
     """Discover repositories that core contributors contribute to.
 
     This command queries GitHub to find repositories that core contributors
     have contributed to, which are not currently in the configuration.
     Repos with more core contributors are likely more relevant to add.
+
+    The repositories found are kept in discovery.json in the data directory,
+    so that later runs only fetch events that are newer than the last run.
     """
+    from github import Auth, Github
+
+    from . import transport
+    from .cache import CachingAdapter
+    from .cassette import Cassette, RecordingAdapter
+    from .client import run_all
+    from .discovery import Discovery
+    from .ratelimit import RateLimiter
+
     config = Config.from_toml(config_path or DEFAULT_CONFIG_PATH)
 
     if github_token:
@@ -201,37 +1290,38 @@ def discover(
     else:
         auth = Auth.NetrcAuth()
 
-    github = Github(auth=auth)
+    github = Github(auth=auth, base_url=base_url, pool_size=concurrency)
+    transport.mount(github, RateLimiter(per_minute=requests_per_minute))
+    cache = open_cache(cache_dir, no_cache)
+    if cache is not None:
+        transport.mount(github, CachingAdapter(cache))
+    if record:
+        transport.mount(github, RecordingAdapter(Cassette(record)))
     known_repos = set(config.repositories)
-    discovered_repos: dict[str, list[str]] = defaultdict(list)
+    discovery_path = directory / "discovery.json"
+    discovery = Discovery.load(discovery_path)
 
     contributors = config.core_contributors
     print(f"Discovering repos for {len(contributors)} core contributors...")
     print(f"Known repos: {len(known_repos)}")
     print()
 
-    for username, name in contributors.items():
-        print(f"  Checking {name} ({username})...", end=" ", flush=True)
+    def update(username: str) -> None:
+        name = contributors[username]
         try:
-            user = github.get_user(username)
-
-            # Get repos via events (more accurate than get_repos)
-            repos_found = 0
-            for event in user.get_events():
-                if event.type in ("PushEvent", "PullRequestEvent", "IssuesEvent"):
-                    repo_name = event.repo.full_name
-                    if (
-                        repo_name not in known_repos
-                        and username not in discovered_repos[repo_name]
-                    ):
-                        discovered_repos[repo_name].append(username)
-                        repos_found += 1
-                # Limit events per user to avoid rate limiting
-                if repos_found > 100:
-                    break
-            print(f"found {repos_found} new repos")
+            events, repos_found = discovery.update(github, username)
+            print(
+                f"  {name} ({username}): {events} new events, {repos_found} new repos"
+            )
         except Exception as e:
-            print(f"error: {e}")
+            print(f"  {name} ({username}): error: {e}")
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        run_all(update, contributors, executor)
+    discovery.save(discovery_path)
+    discovered_repos = discovery.contributors_by_repository(
+        list(contributors), exclude=known_repos
+    )
 
     # Sort by number of core contributors (descending)
     sorted_repos = sorted(
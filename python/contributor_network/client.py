@@ -1,61 +1,635 @@
+import datetime
+import math
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import Any, Literal, TypeVar
 
-from github import Github
+from github import Consts, Github
 from github.Auth import Auth
 from github.NamedUser import NamedUser
 from github.Repository import Repository as Repo
+from github.StatsContributor import StatsContributor
 
+from . import graphql, transport
+from .cache import CachingAdapter, ResponseCache
+from .cassette import Cassette, RecordingAdapter
+from .journal import Journal
+from .manifest import Manifest, ManifestEntry
 from .models import Link, Repository
+from .profiling import Profile
+from .ratelimit import RateLimiter, TokenPool
+from .store import JsonStore, Store
+
+T = TypeVar("T")
+Backend = Literal["rest", "graphql"]
+LinkSource = Literal["commits", "stats", "authors"]
+
+# The contributor statistics endpoint only lists the top contributors
+STATS_CONTRIBUTORS_LIMIT = 100
+
+
+def run_all(
+    function: Callable[[T], object], items: Iterable[T], executor: Executor | None
+) -> None:
+    """Call a function on each item, on an executor if one is given.
+
+    The first exception raised by any call is re-raised once the remaining
+    pending calls have been cancelled.
+    """
+    if executor is None:
+        for item in items:
+            function(item)
+        return
+    futures: list[Future[object]] = [executor.submit(function, item) for item in items]
+    try:
+        for future in as_completed(futures):
+            future.result()
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
 
 
 class Client:
-    """A client for fetching repos and commit information from Github."""
+    """A client for fetching repos and commit information from Github.
+
+    With a concurrency greater than one, repositories and the links within
+    each repository are fetched on thread pools sharing a single pooled HTTP
+    connection to the Github API.
+
+    The "graphql" backend fetches repository metadata for all repositories in
+    a few batched GraphQL queries up front instead of per-repository REST calls.
+
+    The "stats" link source builds every link of a repository from one request
+    to its weekly contributor statistics instead of querying the commits of
+    each contributor.
+
+    The "authors" link source starts from the configured contributors rather
+    than from each repository's contributors: their commits to the default
+    branches of all repositories are counted up front in a few batched
+    GraphQL queries, so the cost of a fetch grows with the number of
+    configured contributors instead of the size of each repository's
+    community. Only the first commits of new links are queried separately.
 
-    def __init__(self, auth: Auth, directory: Path) -> None:
-        self.github = Github(auth=auth)
+    With a response cache, requests for previously fetched resources are sent
+    as conditional requests so that unchanged data costs no rate limit.
+
+    With a rate limiter, requests are paced to stay inside the rate limits, and
+    the cost of a fetch is estimated up front so that the most stale
+    repositories can be fetched first when the budget does not cover them all.
+    With a token pool, requests are spread over several tokens, and paced
+    against their combined budget.
+
+    Repositories and links are kept in a store, by default a JSON file for each
+    in the data directory.
+
+    With a cassette, every response is recorded into it, to be replayed later
+    by a :class:`.replay.ReplayServer` passed as ``base_url``.
+    """
+
+    def __init__(
+        self,
+        auth: Auth,
+        directory: Path,
+        concurrency: int = 1,
+        backend: Backend = "rest",
+        link_source: LinkSource = "commits",
+        cache: ResponseCache | None = None,
+        rate_limiter: RateLimiter | None = None,
+        token_pool: TokenPool | None = None,
+        profile: Profile | None = None,
+        store: Store | None = None,
+        base_url: str = Consts.DEFAULT_BASE_URL,
+        cassette: Cassette | None = None,
+    ) -> None:
+        # Repository and link workers may both have a request in flight
+        self.github = Github(
+            auth=auth, base_url=base_url, pool_size=max(2 * concurrency, 1)
+        )
+        self.profile = profile or Profile()
+        # Only requests that reach the network are metered, and cached responses
+        # are checked before spending rate limit budget
+        transport.mount(self.github, transport.MeteringAdapter(self.profile))
+        if token_pool is not None:
+            transport.mount(self.github, token_pool)
+        if rate_limiter is not None:
+            transport.mount(self.github, rate_limiter)
+        if cache is not None:
+            transport.mount(self.github, CachingAdapter(cache))
+        if cassette is not None:
+            transport.mount(self.github, RecordingAdapter(cassette))
+        self.rate_limiter = rate_limiter
+        self.token_pool = token_pool
         self.directory = directory.absolute()
+        self.store = store if store is not None else JsonStore(self.directory)
+        self.concurrency = concurrency
+        self.backend = backend
+        self.link_source = link_source
+        self._link_executor: Executor | None = None
+        self._manifest = Manifest()
+        self._fetched_at = datetime.datetime.now(datetime.UTC)
+        self._incremental = False
+        # Commit counts and newest commit times by repository and login
+        self._histories: dict[str, dict[str, tuple[int, int]]] = {}
+        # Outside of fetch, completed work is not journaled
+        self._journal = Journal(None)
 
     def get_repo(self, repository_name: str) -> Repo:
         """Get a Github repository by name."""
         return self.github.get_repo(repository_name)
 
-    def update_repository(self, repo: Repo) -> None:
-        """Update the data for a single repository."""
-        repository = Repository.from_github(repo)
-        path = self.directory / "repositories" / (repo.full_name + ".json")
-        path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_text(repository.model_dump_json())
+    def lazy_repo(self, repository_name: str) -> Repo:
+        """Get a Github repository by name without fetching it.
+
+        Its attributes are fetched on first use, except for the name and URL
+        which are enough to request the repository's contributors or commits.
+        """
+        return Repo(
+            self.github.requester,
+            attributes={"full_name": repository_name},
+            url=f"{self.github.requester.base_url}/repos/{repository_name}",
+            completed=False,
+        )
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.directory / "manifest.json"
+
+    @property
+    def journal_path(self) -> Path:
+        return self.directory / "journal.jsonl"
+
+    def fetch(
+        self,
+        repository_names: list[str],
+        contributors: dict[str, str],
+        incremental: bool = False,
+        resume: bool = False,
+    ) -> None:
+        """Update the repository data and links for many repositories.
+
+        Every fetched repository is recorded in the fetch manifest. When
+        incremental, repositories that have not changed since they were last
+        recorded are skipped, and only the links of contributors with commits
+        since then are updated in repositories with new pushes.
+
+        Completed repositories and links are recorded in a journal until the
+        fetch completes. When resuming, the work recorded by the last,
+        interrupted, fetch is skipped.
+        """
+        self._manifest = Manifest.load(self.manifest_path)
+        self._fetched_at = datetime.datetime.now(datetime.UTC)
+        self._incremental = incremental
+        self._journal = Journal(self.journal_path, resume=resume)
+        if self._journal.resumed:
+            print(f"Resuming, {self._journal.resumed} repositories already fetched")
+            repository_names = [
+                name for name in repository_names if not self._journal.is_done(name)
+            ]
+        try:
+            self._fetch(repository_names, contributors)
+        except BaseException:
+            self._journal.close()
+            raise
+        self._journal.finish()
+
+    def _fetch(self, repository_names: list[str], contributors: dict[str, str]) -> None:
+        if self.rate_limiter is not None:
+            repository_names = self.plan(repository_names, contributors)
+
+        nodes: dict[str, dict[str, Any]] = {}
+        if self.backend == "graphql":
+            print(f"Querying metadata for {len(repository_names)} repositories")
+            with self.profile.timer("graphql.fetch_repositories"):
+                nodes = graphql.fetch_repositories(self.github, repository_names)
+            if missing := [name for name in repository_names if name not in nodes]:
+                print(f"Skipping repositories not found: {', '.join(missing)}")
+                repository_names = [name for name in repository_names if name in nodes]
+        if self.link_source == "authors":
+            self._histories = self.fetch_author_histories(
+                repository_names, contributors
+            )
+
+        if self.concurrency <= 1:
+            for repository_name in repository_names:
+                self.fetch_repository(
+                    repository_name, contributors, nodes.get(repository_name)
+                )
+            return
+
+        with (
+            ThreadPoolExecutor(self.concurrency) as repository_executor,
+            ThreadPoolExecutor(self.concurrency) as link_executor,
+        ):
+            self._link_executor = link_executor
+            try:
+                run_all(
+                    lambda name: self.fetch_repository(
+                        name, contributors, nodes.get(name)
+                    ),
+                    repository_names,
+                    repository_executor,
+                )
+            finally:
+                self._link_executor = None
+
+    def plan(
+        self, repository_names: list[str], contributors: dict[str, str]
+    ) -> list[str]:
+        """Estimate the cost of a fetch and order repositories to fit the budget.
+
+        If the remaining rate limit does not cover the estimate, repositories are
+        ordered by when they were last fetched, so that the most stale ones are
+        fetched before the budget runs out.
+        """
+        estimate = sum(
+            self.estimate_requests(repository_name, contributors)
+            for repository_name in repository_names
+        )
+        if self.backend == "graphql":
+            estimate += math.ceil(len(repository_names) / graphql.DEFAULT_BATCH_SIZE)
+
+        if self.link_source == "authors":
+            estimate += math.ceil(len(contributors) / graphql.USER_BATCH_SIZE)
+            estimate += math.ceil(
+                len(repository_names) * len(contributors) / graphql.HISTORY_BATCH_SIZE
+            )
+
+        core = self.github.get_rate_limit().resources.core
+        remaining, limit, reset = core.remaining, core.limit, core.reset
+        if self.token_pool is not None:
+            # Each request goes to a token whose budget is not known yet
+            for _ in range(len(self.token_pool) - 1):
+                self.github.get_rate_limit()
+            budget = self.token_pool.budget("core")
+            if budget is not None:
+                remaining, limit = budget.remaining, budget.limit
+                reset = datetime.datetime.fromtimestamp(budget.reset, datetime.UTC)
+        print(
+            f"Estimated {estimate} requests for {len(repository_names)} repositories,"
+            f" {remaining} of {limit} remaining until {reset:%H:%M} UTC"
+        )
+        reserve = self.rate_limiter.reserve if self.rate_limiter else 0
+        if estimate <= remaining - reserve:
+            return repository_names
+
+        print("Not enough rate limit left, fetching the most stale repositories first")
+        return sorted(repository_names, key=self.last_fetched)
+
+    def last_fetched(self, repository_name: str) -> datetime.datetime:
+        """When a repository was last fetched, according to the manifest."""
+        entry = self._manifest.repositories.get(repository_name)
+        if entry is None:
+            return datetime.datetime.min.replace(tzinfo=datetime.UTC)
+        return entry.fetched_at
+
+    def estimate_requests(
+        self, repository_name: str, contributors: dict[str, str]
+    ) -> int:
+        """Roughly estimate the number of requests to fetch a repository.
+
+        The estimate is based on the data of the previous fetch, if any; cached
+        responses that turn out to be unchanged do not count against the rate
+        limit, so the actual cost may be much lower.
+        """
+        links = self.count_links(repository_name, contributors)
+        entry = self._manifest.repositories.get(repository_name)
+        if self._incremental and entry and entry.contributors == sorted(contributors):
+            # The repository, plus one commit query per link if it was pushed to
+            return 1 + links
+
+        repository = self.store.get_repository(repository_name)
+        if repository is not None:
+            total_contributors = repository.repo_total_contributors
+        else:
+            # Not fetched yet, so any configured contributor may have a link
+            total_contributors = links = len(contributors)
+
+        # The repository, its contributor and commit counts, languages and topics
+        requests = 1 if self.backend == "graphql" else 5
+        if self.link_source == "stats":
+            return requests + 1
+        if self.link_source == "authors":
+            # The oldest commits of new links; the counts are queried in batches
+            return requests + (2 * links if repository is None else 0)
+        # Pages of contributors, plus the newest and oldest commits of each link
+        pages = max(math.ceil(total_contributors / self.github.per_page), 1)
+        return requests + pages + 3 * links
+
+    def fetch_repository(
+        self,
+        repository_name: str,
+        contributors: dict[str, str],
+        node: dict[str, Any] | None = None,
+    ) -> None:
+        """Update the repository data and links for a single repository.
+
+        With the graphql backend, ``node`` holds the repository's metadata.
+        """
+        with self.profile.timer("fetch_repository", repository=repository_name):
+            self._fetch_repository(repository_name, contributors, node)
+
+    def _fetch_repository(
+        self,
+        repository_name: str,
+        contributors: dict[str, str],
+        node: dict[str, Any] | None,
+    ) -> None:
+        print(f"Updating repository: {repository_name}")
+        if node is None:
+            repo = self.get_repo(repository_name)
+            pushed_at, updated_at = repo.pushed_at, repo.updated_at
+        else:
+            repo = self.lazy_repo(repository_name)
+            pushed_at = node["pushedAt"] and datetime.datetime.fromisoformat(
+                node["pushedAt"]
+            )
+            updated_at = datetime.datetime.fromisoformat(node["updatedAt"])
+        entry = ManifestEntry(
+            pushed_at=pushed_at,
+            updated_at=updated_at,
+            fetched_at=self._fetched_at,
+            contributors=sorted(contributors),
+        )
+        previous = self._manifest.repositories.get(repository_name)
+        if not self._incremental or previous is None:
+            previous = None
+
+        # The repository is written once, with its metadata and community stats
+        repository = None
+        if previous is None or previous.metadata_changed(entry):
+            if node is None:
+                repository = self.repository_from_github(repo)
+            else:
+                repository = self.repository_from_graphql(repository_name, node)
+
+        if self.link_source == "authors" and (
+            previous is None
+            or previous.contributors_changed(entry)
+            or previous.links_changed(entry)
+        ):
+            # Counted up front, so all links are updated at no extra cost
+            print(f"Updating links: {repository_name}")
+            core_count = self.update_links_from_histories(repo, contributors)
+        elif previous is None or previous.contributors_changed(entry):
+            print(f"Updating links: {repository_name}")
+            if self.link_source == "stats":
+                core_count = self.update_links_from_stats(repo, contributors)
+            else:
+                core_count = self.update_links(repo, contributors)
+        elif previous.links_changed(entry):
+            print(f"Updating links since {previous.fetched_at}: {repository_name}")
+            core_count = self.update_links_since(
+                repo, contributors, previous.fetched_at
+            )
+        elif repository is not None:
+            core_count = self.count_links(repo.full_name, contributors)
+        else:
+            print(f"Unchanged since {previous.fetched_at}: {repository_name}")
+            core_count = None
+
+        if core_count is not None:
+            repository = repository or self.store.get_repository(repository_name)
+            if repository is not None:
+                repository.update_community_stats(core_count)
+        if repository is not None:
+            self.store.put_repository(repository)
+
+        self._manifest.record(repository_name, entry, self.manifest_path)
+        self._journal.repository_done(repository_name)
+
+    def repository_from_github(self, repo: Repo) -> Repository:
+        """Get the data of a single repository."""
+        with self.profile.timer("Repository.from_github"):
+            return Repository.from_github(repo)
+
+    def repository_from_graphql(
+        self, repository_name: str, node: dict[str, Any]
+    ) -> Repository:
+        """Get the data of a single repository from its GraphQL metadata."""
+        # Not available from GraphQL, but a single request with the REST API
+        total_contributors = (
+            self.lazy_repo(repository_name).get_contributors().totalCount
+        )
+        with self.profile.timer("Repository.from_graphql"):
+            return Repository.from_graphql(node, total_contributors)
+
+    def update_links(self, repo: Repo, contributors: dict[str, str]) -> int:
+        """Update the links for a single repository.
+
+        Returns the number of configured contributors with a link.
+        """
+        matches = [
+            (contributor, contributor_name)
+            for contributor in repo.get_contributors()
+            if (contributor_name := contributors.get(contributor.login))
+        ]
+        run_all(
+            lambda match: self.update_link(repo, *match),
+            [
+                match
+                for match in matches
+                if not self._journal.is_done(repo.full_name, match[0].login)
+            ],
+            self._link_executor,
+        )
+        return len(matches)
+
+    def update_links_from_stats(self, repo: Repo, contributors: dict[str, str]) -> int:
+        """Update the links for a single repository from its contributor statistics.
+
+        Falls back to :meth:`update_links` when the statistics are unavailable
+        or truncated to the top contributors. Returns the number of configured
+        contributors with a link.
+        """
+        with self.profile.timer("get_stats_contributors"):
+            stats = self.get_stats_contributors(repo)
+        if stats is None or len(stats) >= STATS_CONTRIBUTORS_LIMIT:
+            print(
+                f"Contributor statistics incomplete, querying commits: {repo.full_name}"
+            )
+            return self.update_links(repo, contributors)
 
-    def update_links(self, repo: Repo, contributors: dict[str, str]) -> None:
-        """Update the links for a single repository."""
         core_count = 0
-        for contributor in repo.get_contributors():
-            if contributor_name := contributors.get(contributor.login):
-                self.update_link(repo, contributor, contributor_name)
+        for contributor_stats in stats:
+            # The author is null for commits by deleted accounts
+            if contributor_stats.author is None:
+                continue
+            login = contributor_stats.author.login
+            if contributor_name := contributors.get(login):
+                if not self._journal.is_done(repo.full_name, login):
+                    self.update_link_from_stats(
+                        repo.full_name, login, contributor_stats, contributor_name
+                    )
                 core_count += 1
+        return core_count
 
-        # Update repository with community stats (Phase 2)
-        self.update_repository_community_stats(repo.full_name, core_count)
+    def fetch_author_histories(
+        self, repository_names: list[str], contributors: dict[str, str]
+    ) -> dict[str, dict[str, tuple[int, int]]]:
+        """Count the commits of the contributors to all repositories."""
+        print(
+            f"Querying the commits of {len(contributors)} contributors "
+            f"to {len(repository_names)} repositories"
+        )
+        with self.profile.timer("graphql.fetch_author_histories"):
+            user_ids = graphql.fetch_user_ids(self.github, list(contributors))
+            return graphql.fetch_author_histories(
+                self.github, repository_names, user_ids
+            )
 
-    def update_repository_community_stats(
-        self, repo_full_name: str, core_count: int
-    ) -> None:
-        """Update the community stats for a repository after processing contributors."""
-        path = self.directory / "repositories" / (repo_full_name + ".json")
-        if path.exists():
-            repository = Repository.model_validate_json(path.read_text())
-            repository.update_community_stats(core_count)
-            path.write_text(repository.model_dump_json())
+    def update_links_from_histories(
+        self, repo: Repo, contributors: dict[str, str]
+    ) -> int:
+        """Update the links for a single repository from the contributors' histories.
+
+        Returns the number of configured contributors with a link.
+        """
+        histories = self._histories.get(repo.full_name, {})
+        run_all(
+            lambda login: self.update_link_from_history(
+                repo, login, contributors[login], *histories[login]
+            ),
+            [
+                login
+                for login in histories
+                if not self._journal.is_done(repo.full_name, login)
+            ],
+            self._link_executor,
+        )
+        return len(histories)
+
+    def get_stats_contributors(
+        self, repo: Repo, attempts: int = 4, delay: float = 2.0
+    ) -> list[StatsContributor] | None:
+        """Get the contributor statistics of a repository.
+
+        Github answers with 202 and an empty body while it computes the
+        statistics in the background, for which PyGithub returns ``None``
+        without retrying, so repeat the request with exponential backoff.
+        """
+        for attempt in range(attempts):
+            stats = repo.get_stats_contributors()
+            if stats is not None:
+                return stats
+            if attempt < attempts - 1:
+                time.sleep(delay * 2**attempt)
+        return None
+
+    def update_links_since(
+        self, repo: Repo, contributors: dict[str, str], since: datetime.datetime
+    ) -> int:
+        """Update the existing links of a repository with commits made since a time.
+
+        Only one request per configured contributor is needed when they have no
+        new commits. Otherwise their commits are counted again, from the
+        repository's contributors like :meth:`update_links` does: adding the
+        new ones would count twice those made while the last fetch ran, and
+        miss those dated before it but merged after. Falls back to
+        :meth:`update_links` if a configured contributor without a link made
+        their first commits. Returns the number of configured contributors
+        with a link.
+
+        Commits are selected by date, so a link whose only new commits are
+        backdated before ``since`` is not updated until a later commit, and
+        the time of the first commit is never updated.
+        """
+        updates = []
+        done = 0
+        for login in contributors:
+            if self._journal.is_done(repo.full_name, login):
+                done += self.store.has_link(repo.full_name, login)
+                continue
+            commits = repo.get_commits(author=login, since=since)
+            if not self.store.has_link(repo.full_name, login):
+                if commits.totalCount > 0:
+                    print(
+                        f"New contributor {login}, updating all links: {repo.full_name}"
+                    )
+                    return self.update_links(repo, contributors)
+                continue
+            updates.append((login, commits))
+
+        changed = {login for login, commits in updates if commits.totalCount > 0}
+        contributions = {}
+        if changed:
+            for contributor in repo.get_contributors():
+                if contributor.login in changed:
+                    contributions[contributor.login] = contributor.contributions
+                    # Contributors are listed by contributions, most first
+                    if len(contributions) == len(changed):
+                        break
+        for login, commits in updates:
+            link = self.store.get_link(repo.full_name, login)
+            if link is not None and login in contributions:
+                link.update_from_commits_since(commits, contributions[login])
+                self.store.put_link(repo.full_name, login, link)
+            self._journal.link_done(repo.full_name, login)
+        return done + len(updates)
+
+    def count_links(self, repo_full_name: str, contributors: dict[str, str]) -> int:
+        """Count the configured contributors with a link to a repository."""
+        return sum(self.store.has_link(repo_full_name, login) for login in contributors)
 
     def update_link(
         self, repo: Repo, contributor: NamedUser, contributor_name: str
     ) -> None:
         """Update the link for a single contributor to a single repository."""
-        path = self.directory / "links" / repo.full_name / (contributor.login + ".json")
-        path.parent.mkdir(parents=True, exist_ok=True)
-        if path.exists():
-            link = Link.model_validate_json(path.read_text())
-            link.update_from_github(repo, contributor)
+        link = self.store.get_link(repo.full_name, contributor.login)
+        if link is not None:
+            with self.profile.timer("Link.update_from_github"):
+                link.update_from_github(repo, contributor)
+        else:
+            with self.profile.timer("Link.from_github"):
+                link = Link.from_github(repo, contributor, contributor_name)
+        self.store.put_link(repo.full_name, contributor.login, link)
+        self._journal.link_done(repo.full_name, contributor.login)
+
+    def update_link_from_history(
+        self,
+        repo: Repo,
+        login: str,
+        contributor_name: str,
+        commit_count: int,
+        last_commit_sec: int,
+    ) -> None:
+        """Update the link for a single contributor from their commit count.
+
+        The time of the first commit of a new link is queried, unless it is
+        the only commit.
+        """
+        link = self.store.get_link(repo.full_name, login)
+        if link is not None:
+            link.update_from_history(commit_count, last_commit_sec)
+        else:
+            first_commit_sec = last_commit_sec
+            if commit_count > 1:
+                first_commit = repo.get_commits(author=login).reversed[0]
+                first_commit_sec = int(first_commit.commit.author.date.timestamp())
+            link = Link.from_history(
+                repo.full_name,
+                contributor_name,
+                commit_count,
+                first_commit_sec,
+                last_commit_sec,
+            )
+        self.store.put_link(repo.full_name, login, link)
+        self._journal.link_done(repo.full_name, login)
+
+    def update_link_from_stats(
+        self,
+        repo_full_name: str,
+        login: str,
+        stats: StatsContributor,
+        contributor_name: str,
+    ) -> None:
+        """Update the link for a single contributor from their commit statistics."""
+        link = self.store.get_link(repo_full_name, login)
+        if link is not None:
+            link.update_from_stats(stats)
         else:
-            link = Link.from_github(repo, contributor, contributor_name)
-        path.write_text(link.model_dump_json())
+            link = Link.from_stats(repo_full_name, stats, contributor_name)
+        self.store.put_link(repo_full_name, login, link)
+        self._journal.link_done(repo_full_name, login)
@@ -0,0 +1,101 @@
+"""A compact, precompressed encoding of the site data.
+
+Instead of three CSV files, ``build --format compact`` writes a single JSON
+document in which:
+
+- authors and repositories are listed once and referenced by their index,
+- every repository and link field is a column (an array of values), so that
+  timestamps and counts are plain numeric arrays,
+
+next to gzip (and, if the optional ``brotli`` package is installed, brotli)
+compressed copies. The file name contains a hash of the content so that it can
+be cached indefinitely; ``config.json`` names the current file.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+from pathlib import Path
+from typing import Any
+
+from .files import write_if_changed
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+FORMAT_VERSION = 1
+PREFIX = "network."
+
+
+def encode(
+    authors: list[str],
+    repositories: list[dict[str, Any]],
+    links: list[dict[str, Any]],
+) -> dict[str, Any]:
+    """Encode top contributors, repository rows and link rows.
+
+    The top contributors come first in the author dictionary, followed by any
+    other link authors.
+    """
+    repositories = sorted(repositories, key=lambda row: row["repo"])
+    links = sorted(links, key=lambda row: (row["repo"], row["author_name"]))
+
+    author_names = list(dict.fromkeys(authors))
+    author_names += sorted({row["author_name"] for row in links} - set(author_names))
+    author_ids = {name: index for index, name in enumerate(author_names)}
+    repo_names = [row["repo"] for row in repositories]
+    repo_names += sorted({row["repo"] for row in links} - set(repo_names))
+    repo_ids = {name: index for index, name in enumerate(repo_names)}
+
+    return {
+        "version": FORMAT_VERSION,
+        "authors": author_names,
+        "repos": repo_names,
+        "top_contributors": [author_ids[name] for name in authors],
+        "repositories": columns(repositories, exclude=("repo",)),
+        "links": {
+            "author": [author_ids[row["author_name"]] for row in links],
+            "repo": [repo_ids[row["repo"]] for row in links],
+            **columns(links, exclude=("author_name", "repo")),
+        },
+    }
+
+
+def columns(
+    rows: list[dict[str, Any]], exclude: tuple[str, ...] = ()
+) -> dict[str, list[Any]]:
+    """Turn rows into columns, leaving out some fields."""
+    if not rows:
+        return {}
+    return {key: [row[key] for row in rows] for key in rows[0] if key not in exclude}
+
+
+def write(directory: Path, payload: dict[str, Any]) -> tuple[str, bool]:
+    """Write the encoded data with a content-hashed name and compressed copies.
+
+    The files of the previous data, which clients with a cached config.json
+    may still request, are kept, and older ones removed. Returns the file name
+    and whether it was newly written.
+    """
+    data = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode()
+    name = f"{PREFIX}{hashlib.sha256(data).hexdigest()[:12]}.json"
+    changed = write_if_changed(directory / name, data)
+    write_if_changed(directory / (name + ".gz"), gzip.compress(data, mtime=0))
+    if brotli is not None:
+        write_if_changed(directory / (name + ".br"), brotli.compress(data))
+
+    # Each data file is only written once, so the previous one is the newest
+    previous = max(
+        (path for path in directory.glob(f"{PREFIX}*.json") if path.name != name),
+        key=lambda path: path.stat().st_mtime_ns,
+        default=None,
+    )
+    keep = {name} if previous is None else {name, previous.name}
+    for path in directory.glob(f"{PREFIX}*.json*"):
+        if path.name.removesuffix(".gz").removesuffix(".br") not in keep:
+            path.unlink()
+    return name, changed
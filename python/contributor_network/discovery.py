@@ -0,0 +1,98 @@
+"""Discovering repositories from the public activity of contributors.
+
+The repositories each contributor pushed to or opened issues and pull requests
+in are collected from their event stream and kept in ``discovery.json`` in the
+data directory, together with the newest event seen. Later runs only page
+through events newer than that and merge them in. The first page is re-checked
+with a conditional request when the response cache is enabled, which costs no
+rate limit when there are no new events.
+"""
+
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from pydantic import BaseModel, PrivateAttr
+
+from .files import write_atomic
+
+if TYPE_CHECKING:
+    from github import Github
+
+# Events that mean a user contributed to a repository
+CONTRIBUTION_EVENTS = ("PushEvent", "PullRequestEvent", "IssuesEvent")
+
+
+class UserActivity(BaseModel):
+    """The repositories a user contributed to, as seen in their events.
+
+    Attributes:
+        last_event_id: Id of the newest event seen
+        repositories: Names (``owner/repo``) of the repositories contributed to
+    """
+
+    last_event_id: str | None = None
+    repositories: list[str] = []
+
+
+class Discovery(BaseModel):
+    """The activity of each user, keyed by login."""
+
+    users: dict[str, UserActivity] = {}
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @classmethod
+    def load(cls, path: Path) -> Discovery:
+        """Load the discovery state, or an empty one if the file does not exist."""
+        if not path.exists():
+            return cls()
+        return cls.model_validate_json(path.read_text())
+
+    def save(self, path: Path) -> None:
+        with self._lock:
+            self.users = dict(sorted(self.users.items()))
+            write_atomic(path, self.model_dump_json(indent=2) + "\n")
+
+    def update(self, github: Github, username: str) -> tuple[int, int]:
+        """Fetch the events of a user that are newer than the last one seen.
+
+        Returns the number of new events and of newly found repositories.
+        """
+        with self._lock:
+            activity = self.users.get(username, UserActivity())
+        last_event_id = activity.last_event_id
+
+        newest_event_id = None
+        events = 0
+        repositories: set[str] = set()
+        for event in github.get_user(username).get_events():
+            if last_event_id is not None and int(event.id) <= int(last_event_id):
+                break
+            newest_event_id = newest_event_id or event.id
+            events += 1
+            if event.type in CONTRIBUTION_EVENTS:
+                repositories.add(event.repo.full_name)
+
+        new_repositories = repositories - set(activity.repositories)
+        with self._lock:
+            self.users[username] = UserActivity(
+                last_event_id=newest_event_id or last_event_id,
+                repositories=sorted(new_repositories.union(activity.repositories)),
+            )
+        return events, len(new_repositories)
+
+    def contributors_by_repository(
+        self, usernames: list[str], exclude: set[str]
+    ) -> dict[str, list[str]]:
+        """The users that contributed to each repository, except excluded ones."""
+        contributors: dict[str, list[str]] = {}
+        for username in usernames:
+            activity = self.users.get(username)
+            if activity is None:
+                continue
+            for repository in activity.repositories:
+                if repository not in exclude:
+                    contributors.setdefault(repository, []).append(username)
+        return contributors
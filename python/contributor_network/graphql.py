@@ -0,0 +1,214 @@
+"""Batched repository metadata queries against the Github GraphQL API.
+
+The REST path in :meth:`Repository.from_github` needs one request per
+repository plus one for each of its commits, contributors, languages and
+topics. Here the metadata for many repositories is requested in a single
+GraphQL query by giving each repository its own alias.
+
+Likewise, the commits of the configured contributors to many repositories are
+counted in a few queries, one history of the default branch per repository
+and contributor, instead of paging through the contributors of each
+repository.
+"""
+
+from __future__ import annotations
+
+import datetime
+import json
+from collections.abc import Iterator
+from typing import Any
+
+from github import Github, GithubException
+
+DEFAULT_BATCH_SIZE = 25
+# Commit histories (repository and author pairs) per query
+HISTORY_BATCH_SIZE = 100
+USER_BATCH_SIZE = 100
+
+HISTORY_FIELDS = """
+fragment HistoryFields on CommitHistoryConnection {
+  totalCount
+  nodes {
+    authoredDate
+  }
+}
+"""
+
+REPOSITORY_FIELDS = """
+fragment RepositoryFields on Repository {
+  nameWithOwner
+  stargazerCount
+  forkCount
+  createdAt
+  updatedAt
+  pushedAt
+  url
+  description
+  defaultBranchRef {
+    name
+    target {
+      ... on Commit {
+        history {
+          totalCount
+        }
+      }
+    }
+  }
+  languages(first: 100, orderBy: {field: SIZE, direction: DESC}) {
+    nodes {
+      name
+    }
+  }
+  watchers {
+    totalCount
+  }
+  issues(states: OPEN) {
+    totalCount
+  }
+  pullRequests(states: OPEN) {
+    totalCount
+  }
+  licenseInfo {
+    spdxId
+  }
+  repositoryTopics(first: 100) {
+    nodes {
+      topic {
+        name
+      }
+    }
+  }
+  hasDiscussionsEnabled
+  hasWikiEnabled
+  isArchived
+}
+"""
+
+
+def build_query(repository_names: list[str]) -> str:
+    """Build a query selecting each repository under an alias ``r<index>``."""
+    selections = []
+    for index, repository_name in enumerate(repository_names):
+        owner, name = repository_name.split("/", 1)
+        selections.append(
+            f"  r{index}: repository(owner: {json.dumps(owner)}, "
+            f"name: {json.dumps(name)}) {{\n    ...RepositoryFields\n  }}"
+        )
+    return "query {\n" + "\n".join(selections) + "\n}\n" + REPOSITORY_FIELDS
+
+
+def batched(items: list[str], batch_size: int) -> Iterator[list[str]]:
+    for start in range(0, len(items), batch_size):
+        yield items[start : start + batch_size]
+
+
+def fetch_repositories(
+    github: Github,
+    repository_names: list[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> dict[str, dict[str, Any]]:
+    """Fetch the metadata nodes for many repositories, keyed by configured name.
+
+    Repositories that are not found (e.g. renamed or deleted) are left out.
+    """
+    nodes: dict[str, dict[str, Any]] = {}
+    for batch in batched(repository_names, batch_size):
+        data = query(github, build_query(batch))
+        for index, repository_name in enumerate(batch):
+            if node := data.get(f"r{index}"):
+                nodes[repository_name] = node
+    return nodes
+
+
+def query(github: Github, text: str) -> dict[str, Any]:
+    """Run a query, allowing some of its aliases to select missing objects.
+
+    Github answers with an error for each object that is not found, e.g. a
+    renamed user, and null for its alias.
+    """
+    try:
+        _, response = github.requester.graphql_query(text, {})
+    except GithubException as error:
+        response = error.data
+        if not isinstance(response, dict) or not all(
+            error.get("type") == "NOT_FOUND" for error in response.get("errors", [])
+        ):
+            raise
+    return response["data"]
+
+
+def fetch_user_ids(
+    github: Github, logins: list[str], batch_size: int = USER_BATCH_SIZE
+) -> dict[str, str]:
+    """The node IDs of users by login, without the logins that do not exist."""
+    ids: dict[str, str] = {}
+    for batch in batched(logins, batch_size):
+        selections = [
+            f"  u{index}: user(login: {json.dumps(login)}) {{\n    id\n  }}"
+            for index, login in enumerate(batch)
+        ]
+        data = query(github, "query {\n" + "\n".join(selections) + "\n}\n")
+        for index, login in enumerate(batch):
+            if user := data.get(f"u{index}"):
+                ids[login] = user["id"]
+    return ids
+
+
+def build_history_query(repository_names: list[str], user_ids: list[str]) -> str:
+    """Build a query selecting each author's history under ``r<repo>a<author>``.
+
+    Only the newest commit of each history is selected, with the count.
+    """
+    selections = []
+    for index, repository_name in enumerate(repository_names):
+        owner, name = repository_name.split("/", 1)
+        histories = "\n".join(
+            f"          a{author}: history(first: 1, author: {{id: "
+            f"{json.dumps(user_id)}}}) {{\n            ...HistoryFields\n"
+            "          }"
+            for author, user_id in enumerate(user_ids)
+        )
+        selections.append(
+            f"  r{index}: repository(owner: {json.dumps(owner)}, "
+            f"name: {json.dumps(name)}) {{\n"
+            "    defaultBranchRef {\n      target {\n        ... on Commit {\n"
+            f"{histories}\n"
+            "        }\n      }\n    }\n  }"
+        )
+    return "query {\n" + "\n".join(selections) + "\n}\n" + HISTORY_FIELDS
+
+
+def fetch_author_histories(
+    github: Github,
+    repository_names: list[str],
+    user_ids: dict[str, str],
+    batch_size: int = HISTORY_BATCH_SIZE,
+) -> dict[str, dict[str, tuple[int, int]]]:
+    """Count the commits of users to the default branch of many repositories.
+
+    Returns, by repository and login, the number of commits and the time of
+    the newest, for the users with commits.
+    """
+    logins = list(user_ids)
+    histories: dict[str, dict[str, tuple[int, int]]] = {}
+    if not logins:
+        return {repository_name: {} for repository_name in repository_names}
+    # Every query has the histories of all users, for as many repositories as fit
+    repositories_per_query = max(batch_size // len(logins), 1)
+    for batch in batched(repository_names, repositories_per_query):
+        data = query(github, build_history_query(batch, list(user_ids.values())))
+        for index, repository_name in enumerate(batch):
+            histories[repository_name] = {}
+            node = data.get(f"r{index}") or {}
+            target = (node.get("defaultBranchRef") or {}).get("target") or {}
+            for author, login in enumerate(logins):
+                history = target.get(f"a{author}")
+                if history and history["totalCount"] > 0:
+                    newest = datetime.datetime.fromisoformat(
+                        history["nodes"][0]["authoredDate"]
+                    )
+                    histories[repository_name][login] = (
+                        history["totalCount"],
+                        int(newest.timestamp()),
+                    )
+    return histories
@@ -0,0 +1,188 @@
+"""The history of repository and link statistics across fetches.
+
+Fetches overwrite the records of the store, so after each fetch a snapshot
+of the statistics in ``HISTORY_FIELDS`` is appended to a text file
+(``history.jsonl`` in the working directory, outside the data directory the
+site ships). Only the values that changed since the previous snapshot are
+written, one line per value, after a line with the time of the snapshot, so
+a snapshot of a mostly unchanged store takes a few lines, and the weekly
+commit of the data shows them as a plain diff.
+
+The file is read as a stream, in the order it was written: a time series
+(e.g. the stars of every repository over the last year) only keeps the last
+value of each record before the start of the range, and skips the lines of
+other fields without parsing them.
+"""
+
+from __future__ import annotations
+
+import datetime
+import json
+import os
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from .store import Store
+
+HISTORY_PATH = Path("history.jsonl")
+HISTORY_FILE = "history.json"
+
+REPOSITORY_FIELDS = (
+    "repo_stars",
+    "repo_forks",
+    "repo_watchers",
+    "repo_open_issues",
+    "repo_total_commits",
+    "repo_total_contributors",
+    "repo_core_contributors",
+    "repo_external_contributors",
+)
+LINK_FIELDS = ("commit_count", "commit_sec_max")
+HISTORY_FIELDS = REPOSITORY_FIELDS + LINK_FIELDS
+
+# A time and a value
+Point = tuple[int, int]
+
+
+class History:
+    """Snapshots of the statistics of repositories and links.
+
+    Repositories are keyed by name (``owner/repo``) and links by repository
+    and login (``owner/repo/login``). Times are Unix timestamps.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def snapshots(self) -> list[int]:
+        """The times of all snapshots."""
+        return [at for at, entry in self._entries(()) if entry is None]
+
+    def append(self, store: Store, at: datetime.datetime | None = None) -> int:
+        """Record a snapshot of a store. Returns the number of values changed."""
+        values: dict[tuple[str, str], int] = {}
+        for repository in store.repositories():
+            for field in REPOSITORY_FIELDS:
+                values[(field, repository.repo)] = getattr(repository, field)
+        for repo, login in store.link_logins():
+            link = store.get_link(repo, login)
+            if link is not None:
+                for field in LINK_FIELDS:
+                    values[(field, f"{repo}/{login}")] = getattr(link, field)
+
+        latest: dict[tuple[str, str], int] = {}
+        last = 0
+        for last, entry in self._entries(HISTORY_FIELDS):
+            if entry is not None:
+                latest[(entry["field"], entry["key"])] = entry["value"]
+        changes = sorted(
+            (field, key, value)
+            for (field, key), value in values.items()
+            if latest.get((field, key)) != value
+        )
+        timestamp = int((at or datetime.datetime.now(datetime.UTC)).timestamp())
+        # Snapshots in the same second are kept apart
+        timestamp = max(timestamp, last + 1)
+        lines = [json.dumps({"at": timestamp})]
+        lines.extend(
+            json.dumps({"field": field, "key": key, "value": value})
+            for field, key, value in changes
+        )
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a+b") as file:
+            if file.seek(0, os.SEEK_END):
+                file.seek(-1, os.SEEK_END)
+                if file.read(1) != b"\n":
+                    # After a line torn by a crash
+                    file.write(b"\n")
+            file.write(("\n".join(lines) + "\n").encode())
+        return len(changes)
+
+    def series(
+        self, field: str, since: int = 0, until: int | None = None
+    ) -> Iterator[tuple[str, list[Point]]]:
+        """The values of a field between two times, by key.
+
+        Each series starts with the value at ``since``, if there was one, and
+        has a point for every change after that.
+        """
+        return iter(self._series([field], since, until)[field].items())
+
+    def export(self, fields: list[str], since: int = 0) -> dict[str, Any]:
+        """The time series of some fields since a time, for the site."""
+        return {"since": since, "series": self._series(fields, since)}
+
+    def _series(
+        self, fields: list[str], since: int, until: int | None = None
+    ) -> dict[str, dict[str, list[Point]]]:
+        for field in fields:
+            if field not in HISTORY_FIELDS:
+                raise ValueError(f"{field} is not recorded in the history")
+        # The last value of each key before the range, then the points in it
+        before: dict[str, dict[str, int]] = {field: {} for field in fields}
+        points: dict[str, dict[str, list[Point]]] = {field: {} for field in fields}
+        for at, entry in self._entries(fields):
+            if until is not None and at > until:
+                break
+            if entry is None:
+                continue
+            field, key, value = entry["field"], entry["key"], entry["value"]
+            if at < since:
+                before[field][key] = value
+                continue
+            if at == since:
+                # Replaces the value before the range
+                before[field].pop(key, None)
+            points[field].setdefault(key, []).append((at, value))
+        return {
+            field: {
+                key: ([(since, before[field][key])] if key in before[field] else [])
+                + points[field].get(key, [])
+                for key in sorted(before[field].keys() | points[field].keys())
+            }
+            for field in fields
+        }
+
+    def _entries(
+        self, fields: Iterable[str]
+    ) -> Iterator[tuple[int, dict[str, Any] | None]]:
+        """The changes of some fields, with the time of their snapshot.
+
+        Snapshot lines come with ``None``. Lines of other fields are skipped
+        without parsing them, as every change line starts with its field.
+        """
+        if not self.path.exists():
+            return
+        prefixes = tuple(f'{{"field": "{field}"' for field in fields)
+        at = None
+        with self.path.open() as file:
+            for line in file:
+                if line.startswith('{"at"'):
+                    try:
+                        at = json.loads(line)["at"]
+                    except ValueError:
+                        # Torn by a crash while it was written
+                        continue
+                    yield at, None
+                elif at is not None and line.startswith(prefixes):
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    yield at, entry
+
+
+@dataclass(frozen=True)
+class Export:
+    """The time series to export with a site: some fields, for some days."""
+
+    path: Path
+    fields: tuple[str, ...] = ()
+    days: int = 365
+
+    def data(self) -> dict[str, Any]:
+        since = int(time.time()) - self.days * 86400
+        return History(self.path).export(list(self.fields), since)
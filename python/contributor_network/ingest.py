@@ -0,0 +1,287 @@
+"""Updating links and repositories from Github webhook deliveries.
+
+Between fetches, :class:`IngestServer` receives the ``push`` and
+``pull_request`` webhooks of the fetched repositories and applies them to the
+store without any API requests:
+
+- the commits of a push to a repository's default branch are added to the
+  links of the configured contributors who authored them, creating links for
+  first contributions;
+- the ``repository`` object of every payload updates the repository's
+  metadata (stars, forks, open issues and pull requests, ...).
+
+Merged pull requests also arrive as a push of the merge to the default
+branch, so pull request events do not count commits. Events of repositories
+that are not in the store are ignored until they have been fetched. Changes
+are collected in a batch that is written to the store every few seconds,
+followed by a build of the site.
+
+The counts are provisional: a push changes the repository's last push time,
+so the next fetch, incremental or not, fetches its metadata again and counts
+the commits of its updated links again rather than adding to them.
+"""
+
+from __future__ import annotations
+
+import datetime
+import hashlib
+import hmac
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs
+
+from .models import Link, Repository
+from .store import Store
+
+EVENTS = {"push", "pull_request"}
+DEFAULT_BATCH_SECONDS = 5.0
+# Deliveries remembered to ignore redeliveries
+DELIVERY_HISTORY = 1000
+
+
+def signature(secret: str, body: bytes) -> str:
+    """The ``X-Hub-Signature-256`` header of a delivery signed with a secret."""
+    digest = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def commit_timestamp(commit: dict[str, Any]) -> int:
+    return int(datetime.datetime.fromisoformat(commit["timestamp"]).timestamp())
+
+
+class Ingester:
+    """Applies webhook payloads to a batch of changes to a store.
+
+    ``contributors`` maps the logins of the configured contributors to their
+    names. Thread-safe.
+    """
+
+    def __init__(self, store: Store, contributors: dict[str, str]) -> None:
+        self.store = store
+        self.contributors = contributors
+        # Logins are case-insensitive
+        self._logins = {login.lower(): login for login in contributors}
+        self._repositories: dict[str, Repository] = {}
+        self._links: dict[tuple[str, str], Link] = {}
+        self._deliveries: OrderedDict[str, None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """The number of repositories and links changed since the last flush."""
+        with self._lock:
+            return len(self._repositories) + len(self._links)
+
+    def apply(
+        self, event: str, payload: dict[str, Any], delivery: str | None = None
+    ) -> bool:
+        """Apply the payload of an event. Returns whether anything changed.
+
+        An invalid payload raises before anything changes, and before its
+        delivery is marked as seen, so that a redelivery is applied.
+        """
+        if event not in EVENTS:
+            return False
+        with self._lock:
+            if delivery is not None and delivery in self._deliveries:
+                return False
+            name = payload["repository"]["full_name"]
+            repository = self._get_repository(name)
+            if repository is not None:
+                # Changes are made to copies, kept once the whole payload applies
+                repository = repository.model_copy(deep=True)
+                repository.update_from_webhook(payload["repository"])
+                links = self._apply_push(repository, payload) if event == "push" else {}
+                self._repositories[name] = repository
+                self._links.update(links)
+            if delivery is not None:
+                self._deliveries[delivery] = None
+                if len(self._deliveries) > DELIVERY_HISTORY:
+                    self._deliveries.popitem(last=False)
+            return repository is not None
+
+    def flush(self) -> tuple[int, int]:
+        """Write the batch to the store. Returns the repositories and links written."""
+        with self._lock:
+            repositories, self._repositories = self._repositories, {}
+            links, self._links = self._links, {}
+            for (repo, login), link in links.items():
+                self.store.put_link(repo, login, link)
+            for repository in repositories.values():
+                self.store.put_repository(repository)
+        return len(repositories), len(links)
+
+    def _apply_push(
+        self, repository: Repository, payload: dict[str, Any]
+    ) -> dict[tuple[str, str], Link]:
+        """Count the pushed commits. Returns copies of the updated links."""
+        if payload["ref"] != f"refs/heads/{repository.repo_default_branch}":
+            return {}
+        if payload.get("forced") or payload.get("deleted"):
+            # Rewritten history is counted again by the next fetch
+            return {}
+        commits = payload["commits"]
+        repository.repo_total_commits += len(commits)
+        timestamps: dict[str, list[int]] = {}
+        for commit in commits:
+            username = (commit.get("author") or {}).get("username")
+            login = self._logins.get((username or "").lower())
+            if login is not None:
+                timestamps.setdefault(login, []).append(commit_timestamp(commit))
+
+        links = {}
+        for login, pushed in timestamps.items():
+            link = self._get_link(repository.repo, login)
+            if link is not None:
+                link = link.model_copy()
+            else:
+                link = Link(
+                    author_name=self.contributors[login],
+                    repo=repository.repo,
+                    commit_count=0,
+                    commit_sec_min=0,
+                    commit_sec_max=0,
+                )
+                # A first contribution
+                repository.repo_total_contributors += 1
+                repository.update_community_stats(repository.repo_core_contributors + 1)
+            link.update_from_pushed_commits(pushed)
+            links[(repository.repo, login)] = link
+        return links
+
+    def _get_repository(self, name: str) -> Repository | None:
+        if name in self._repositories:
+            return self._repositories[name]
+        return self.store.get_repository(name)
+
+    def _get_link(self, repo: str, login: str) -> Link | None:
+        if (repo, login) in self._links:
+            return self._links[(repo, login)]
+        return self.store.get_link(repo, login)
+
+
+class IngestServer:
+    """Receives webhook deliveries over HTTP, in a background thread.
+
+    With a ``secret``, deliveries without a valid ``X-Hub-Signature-256``
+    are rejected. Every ``batch_seconds``, changes are flushed to the store and
+    ``on_flush`` is called with the numbers of repositories and links written.
+    """
+
+    def __init__(
+        self,
+        ingester: Ingester,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        secret: str | None = None,
+        batch_seconds: float = DEFAULT_BATCH_SECONDS,
+        on_flush: Callable[[int, int], None] | None = None,
+    ) -> None:
+        self.ingester = ingester
+        self.secret = secret
+        self.batch_seconds = batch_seconds
+        self.on_flush = on_flush
+        self._stopped = threading.Event()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._threads: list[threading.Thread] = []
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def start(self) -> IngestServer:
+        self._threads = [
+            threading.Thread(target=self._server.serve_forever, daemon=True),
+            threading.Thread(target=self._flush_periodically, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+        self._threads = [flusher]
+        flusher.start()
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        """Stop receiving, and flush the last batch."""
+        self._stopped.set()
+        self._server.shutdown()
+        self._server.server_close()
+        for thread in self._threads:
+            thread.join()
+        self.flush()
+
+    def __enter__(self) -> IngestServer:
+        return self.start()
+
+    def __exit__(self, *args: object) -> None:
+        self.stop()
+
+    def flush(self) -> None:
+        if not self.ingester.pending:
+            return
+        repositories, links = self.ingester.flush()
+        if self.on_flush is not None:
+            self.on_flush(repositories, links)
+
+    def receive(self, body: bytes, headers: Any) -> tuple[int, dict[str, Any]]:
+        """Answer a delivery with a status and a JSON body."""
+        if self.secret is not None and not hmac.compare_digest(
+            headers.get("X-Hub-Signature-256", ""), signature(self.secret, body)
+        ):
+            return 401, {"message": "Invalid signature"}
+        event = headers.get("X-GitHub-Event", "")
+        if event == "ping":
+            return 200, {"message": "pong"}
+        if event not in EVENTS:
+            return 202, {"message": f"Ignored {event or 'unknown'} event"}
+        try:
+            if headers.get("Content-Type", "").startswith(
+                "application/x-www-form-urlencoded"
+            ):
+                body = parse_qs(body.decode())["payload"][0].encode()
+            payload = json.loads(body)
+            applied = self.ingester.apply(
+                event, payload, headers.get("X-GitHub-Delivery")
+            )
+        except (KeyError, TypeError, ValueError) as error:
+            return 400, {"message": f"Invalid {event} payload: {error}"}
+        return 202, {"applied": applied}
+
+    def _flush_periodically(self) -> None:
+        while not self._stopped.wait(self.batch_seconds):
+            try:
+                self.flush()
+            except (OSError, ValueError) as error:
+                # e.g. a build that fails, which the next batch retries
+                print(f"Error: {error}")
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length) if length else b""
+                status, response = server.receive(body, self.headers)
+                content = json.dumps(response).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
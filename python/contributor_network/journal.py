@@ -0,0 +1,94 @@
+"""A journal of the work completed by a fetch, to resume it after a crash.
+
+``fetch`` appends a line to ``journal.jsonl`` in the data directory whenever
+it finishes a unit of work: the link of a contributor to a repository, or a
+whole repository. Each line is flushed to disk before the work continues, so
+the journal survives the process being killed at any point, and a torn last
+line is ignored when reading it back. A fetch that completes removes its
+journal; ``fetch --resume`` skips the work recorded in the journal of the
+last, unfinished, run.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import IO
+
+
+class Journal:
+    """An append-only log of completed repositories and links.
+
+    Without a path, the journal is only kept in memory.
+    """
+
+    def __init__(self, path: Path | None, resume: bool = False) -> None:
+        self.path = path
+        self.repositories: set[str] = set()
+        self.links: set[tuple[str, str]] = set()
+        self._torn = False
+        if path is not None and not resume:
+            # A new fetch starts a new journal
+            path.unlink(missing_ok=True)
+        elif path is not None and path.exists():
+            self._read(path)
+        # Repositories completed by earlier runs
+        self.resumed = len(self.repositories)
+        self._lock = threading.Lock()
+        self._file: IO[str] | None = None
+
+    def is_done(self, repo: str, login: str | None = None) -> bool:
+        if login is None:
+            return repo in self.repositories
+        return repo in self.repositories or (repo, login) in self.links
+
+    def link_done(self, repo: str, login: str) -> None:
+        self._append({"repo": repo, "login": login})
+
+    def repository_done(self, repo: str) -> None:
+        self._append({"repo": repo})
+
+    def finish(self) -> None:
+        """Close and remove the journal once the whole fetch has completed."""
+        self.close()
+        if self.path is not None:
+            self.path.unlink(missing_ok=True)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _append(self, entry: dict[str, str]) -> None:
+        line = json.dumps(entry) + "\n"
+        with self._lock:
+            if self.path is not None and self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = self.path.open("a")
+                if self._torn:
+                    self._file.write("\n")
+            if self._file is not None:
+                self._file.write(line)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            if "login" in entry:
+                self.links.add((entry["repo"], entry["login"]))
+            else:
+                self.repositories.add(entry["repo"])
+
+    def _read(self, path: Path) -> None:
+        content = path.read_text()
+        self._torn = bool(content) and not content.endswith("\n")
+        for line in content.splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # Torn by a crash while it was written
+                continue
+            if "login" in entry:
+                self.links.add((entry["repo"], entry["login"]))
+            else:
+                self.repositories.add(entry["repo"])
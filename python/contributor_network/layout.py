@@ -0,0 +1,131 @@
+"""A precomputed initial layout of the network, for the site to refine.
+
+The site places contributors on a ring and lets a force simulation settle the
+owners that several contributors committed to inside the ring. This module
+runs a similar, seeded simulation with NumPy so that the site can start from a
+converged state and only needs a few refinement ticks.
+
+The site spaces contributors by the size of their repository clouds, which is
+only known in the browser, so owner positions are not stored as coordinates.
+Instead, each owner has a position along the ring, as a fractional index into
+the contributors (``1.5`` is halfway between the second and third
+contributor), and a distance from the center relative to the ring radius.
+
+NumPy is an optional dependency (the ``layout`` extra).
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any
+
+FORMAT_VERSION = 1
+DEFAULT_SEED = 0
+ITERATIONS = 300
+
+# Mirror LAYOUT.innerRadiusFactor and LAYOUT.collaborationRadialFactor in
+# src/config/theme.ts, relative to the contributor ring radius
+INNER_RADIUS = 0.85
+RADIAL_RADIUS = 0.55
+LINK_DISTANCE = 0.35
+LINK_STRENGTH = 0.2
+RADIAL_STRENGTH = 0.05
+CHARGE = 2e-3
+VELOCITY_DECAY = 0.4
+
+
+def central_owners(links: list[dict[str, Any]]) -> dict[str, list[str]]:
+    """Owners with links from more than one contributor, and those contributors."""
+    contributors: dict[str, set[str]] = {}
+    for row in links:
+        owner = row["repo"].split("/", 1)[0]
+        contributors.setdefault(owner, set()).add(row["author_name"])
+    return {
+        owner: sorted(names)
+        for owner, names in sorted(contributors.items())
+        if len(names) > 1
+    }
+
+
+def compute(
+    authors: list[str], links: list[dict[str, Any]], seed: int = DEFAULT_SEED
+) -> dict[str, Any]:
+    """Lay out the owners shared by contributors, with contributors on a ring.
+
+    Contributors are evenly spaced on the unit circle, sorted by lowercased
+    name like the site sorts its contributor nodes (``src/data/prepare.ts``),
+    as it does when it falls back to even spacing.
+    """
+    import numpy as np
+
+    authors = sorted(authors, key=str.lower)
+    owners = {
+        owner: [name for name in names if name in authors]
+        for owner, names in central_owners(links).items()
+    }
+    owners = {owner: names for owner, names in owners.items() if len(names) > 1}
+    result: dict[str, Any] = {
+        "version": FORMAT_VERSION,
+        "seed": seed,
+        "contributors": authors,
+        "owners": {},
+    }
+    if not owners or not authors:
+        return result
+
+    count = len(authors)
+    angles = 2 * np.pi * (np.arange(count) + 0.5) / count - np.pi / 2
+    ring = np.column_stack([np.cos(angles), np.sin(angles)])
+
+    author_ids = {name: index for index, name in enumerate(authors)}
+    owner_names = list(owners)
+    edges = np.array(
+        [
+            (index, author_ids[name])
+            for index, owner in enumerate(owner_names)
+            for name in owners[owner]
+        ]
+    )
+    degree = np.bincount(edges[:, 0], minlength=len(owner_names))
+
+    rng = np.random.default_rng(seed)
+    positions = rng.uniform(-0.1, 0.1, size=(len(owner_names), 2))
+    velocities = np.zeros_like(positions)
+
+    # Like d3-force, the strength of all forces decays with alpha
+    alpha_decay = 1 - 0.001 ** (1 / ITERATIONS)
+    alpha = 1.0
+    for _ in range(ITERATIONS):
+        alpha += (0 - alpha) * alpha_decay
+        forces = np.zeros_like(positions)
+
+        # Springs from each owner to its contributors
+        delta = ring[edges[:, 1]] - positions[edges[:, 0]]
+        distance = np.maximum(np.linalg.norm(delta, axis=1, keepdims=True), 1e-9)
+        pull = (distance - LINK_DISTANCE) / distance * delta * LINK_STRENGTH
+        np.add.at(forces, edges[:, 0], pull / degree[edges[:, 0], None])
+
+        # Repulsion between owners
+        delta = positions[:, None, :] - positions[None, :, :]
+        squared = np.maximum(np.sum(delta**2, axis=2), 1e-6)
+        np.fill_diagonal(squared, np.inf)
+        forces += CHARGE * np.sum(delta / squared[:, :, None], axis=1)
+
+        # Towards a circle inside the ring
+        radius = np.maximum(np.linalg.norm(positions, axis=1, keepdims=True), 1e-9)
+        forces += (RADIAL_RADIUS - radius) / radius * positions * RADIAL_STRENGTH
+
+        velocities = (velocities + forces * alpha) * (1 - VELOCITY_DECAY)
+        positions += velocities
+
+        # Keep owners inside the ring
+        radius = np.linalg.norm(positions, axis=1, keepdims=True)
+        positions = np.where(
+            radius > INNER_RADIUS, positions / radius * INNER_RADIUS, positions
+        )
+
+    for owner, (x, y) in zip(owner_names, positions.tolist(), strict=True):
+        angle = math.atan2(y, x)
+        along = ((angle + math.pi / 2) / (2 * math.pi) * count - 0.5) % count
+        result["owners"][owner] = [round(along, 4), round(math.hypot(x, y), 4)]
+    return result
@@ -0,0 +1,68 @@
+"""A record of when each repository was last fetched.
+
+The manifest lives next to the ``repositories/`` directory and lets an
+incremental fetch skip repositories that have not changed since the last run.
+"""
+
+from __future__ import annotations
+
+import datetime
+import threading
+from pathlib import Path
+
+from pydantic import BaseModel, PrivateAttr
+
+from .files import write_atomic
+
+
+class ManifestEntry(BaseModel):
+    """The state of a repository when it was last fetched.
+
+    Attributes:
+        pushed_at: Time of the last push to the repository
+        updated_at: Time the repository was last updated (including metadata
+                    like stars or the description)
+        fetched_at: Time the repository was fetched
+        contributors: Logins of the configured contributors at fetch time
+    """
+
+    pushed_at: datetime.datetime | None
+    updated_at: datetime.datetime
+    fetched_at: datetime.datetime
+    contributors: list[str]
+
+    def metadata_changed(self, current: ManifestEntry) -> bool:
+        return (self.pushed_at, self.updated_at) != (
+            current.pushed_at,
+            current.updated_at,
+        )
+
+    def links_changed(self, current: ManifestEntry) -> bool:
+        return self.pushed_at != current.pushed_at
+
+    def contributors_changed(self, current: ManifestEntry) -> bool:
+        return self.contributors != current.contributors
+
+
+class Manifest(BaseModel):
+    """The fetch manifest, keyed by repository name (``owner/repo``)."""
+
+    repositories: dict[str, ManifestEntry] = {}
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @classmethod
+    def load(cls, path: Path) -> Manifest:
+        """Load a manifest, or return an empty one if the file does not exist."""
+        if not path.exists():
+            return cls()
+        return cls.model_validate_json(path.read_text())
+
+    def record(self, repository_name: str, entry: ManifestEntry, path: Path) -> None:
+        """Record a fetched repository and save the manifest."""
+        with self._lock:
+            self.repositories[repository_name] = entry
+            self.save(path)
+
+    def save(self, path: Path) -> None:
+        self.repositories = dict(sorted(self.repositories.items()))
+        write_atomic(path, self.model_dump_json(indent=2) + "\n")
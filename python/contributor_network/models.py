@@ -1,11 +1,18 @@
 from __future__ import annotations
 
 import datetime
+from typing import TYPE_CHECKING, Any
 
-from github.NamedUser import NamedUser
-from github.Repository import Repository as Repo
 from pydantic import BaseModel
 
+if TYPE_CHECKING:
+    # Only in annotations, so that reading records does not import PyGithub
+    from github.Commit import Commit
+    from github.NamedUser import NamedUser
+    from github.PaginatedList import PaginatedList
+    from github.Repository import Repository as Repo
+    from github.StatsContributor import StatsContributor
+
 
 class Link(BaseModel):
     author_name: str
@@ -22,33 +29,106 @@ class Link(BaseModel):
         commits = repo.get_commits(author=contributor.login)
         last_commit = commits[0]
         first_commit = commits.reversed[0]
-        commit_sec_min = int(first_commit.commit.author.date.timestamp())
-        commit_sec_max = int(last_commit.commit.author.date.timestamp())
+        link = cls(
+            author_name=author_name,
+            repo=repo.full_name,
+            commit_count=contributor.contributions,
+            commit_sec_min=int(first_commit.commit.author.date.timestamp()),
+            commit_sec_max=int(last_commit.commit.author.date.timestamp()),
+        )
+        link.update_derived_fields()
+        return link
 
-        # Compute derived fields
-        contribution_span_days = (commit_sec_max - commit_sec_min) // 86400
-        ninety_days_ago = int(
-            (datetime.datetime.now() - datetime.timedelta(days=90)).timestamp()
+    @classmethod
+    def from_stats(
+        cls, repo_full_name: str, stats: StatsContributor, author_name: str
+    ) -> Link:
+        """Build a link from a contributor's weekly commit statistics.
+
+        The statistics only have weekly resolution, so the first and last
+        commit times are the start of the first and last weeks with commits.
+        """
+        weeks = active_weeks(stats)
+        link = cls(
+            author_name=author_name,
+            repo=repo_full_name,
+            commit_count=stats.total,
+            commit_sec_min=weeks[0] if weeks else 0,
+            commit_sec_max=weeks[-1] if weeks else 0,
         )
-        is_recent = commit_sec_max > ninety_days_ago
+        link.update_derived_fields()
+        return link
 
-        return cls(
+    @classmethod
+    def from_history(
+        cls,
+        repo_full_name: str,
+        author_name: str,
+        commit_count: int,
+        first_commit_sec: int,
+        last_commit_sec: int,
+    ) -> Link:
+        """Build a link from the count and times of an author's commits."""
+        link = cls(
             author_name=author_name,
-            repo=repo.full_name,
-            commit_count=contributor.contributions,
-            commit_sec_min=commit_sec_min,
-            commit_sec_max=commit_sec_max,
-            contribution_span_days=contribution_span_days,
-            is_recent_contributor=is_recent,
+            repo=repo_full_name,
+            commit_count=commit_count,
+            commit_sec_min=first_commit_sec,
+            commit_sec_max=last_commit_sec,
         )
+        link.update_derived_fields()
+        return link
 
     def update_from_github(self, repo: Repo, contributor: NamedUser) -> None:
         commits = repo.get_commits(author=contributor.login)
         last_commit = commits[0]
         self.commit_count = contributor.contributions
         self.commit_sec_max = int(last_commit.commit.author.date.timestamp())
+        self.update_derived_fields()
 
-        # Recompute derived fields
+    def update_from_history(self, commit_count: int, last_commit_sec: int) -> None:
+        """Update from the count of an author's commits and the time of the newest."""
+        self.commit_count = commit_count
+        self.commit_sec_max = max(self.commit_sec_max, last_commit_sec)
+        self.update_derived_fields()
+
+    def update_from_commits_since(
+        self, commits: PaginatedList[Commit], commit_count: int
+    ) -> None:
+        """Update from the commits made since the link was last updated, and
+        the author's contributions to the repository."""
+        self.commit_count = commit_count
+        self.commit_sec_max = max(
+            self.commit_sec_max, int(commits[0].commit.author.date.timestamp())
+        )
+        self.update_derived_fields()
+
+    def update_from_stats(self, stats: StatsContributor) -> None:
+        """Update from weekly commit statistics, keeping any more precise times.
+
+        The start of the first week with commits is never later than the first
+        commit, so it only stands in for a link without a first commit time.
+        """
+        weeks = active_weeks(stats)
+        self.commit_count = stats.total
+        if weeks:
+            if self.commit_sec_min == 0:
+                self.commit_sec_min = weeks[0]
+            self.commit_sec_max = max(self.commit_sec_max, weeks[-1])
+        self.update_derived_fields()
+
+    def update_from_pushed_commits(self, timestamps: list[int]) -> None:
+        """Add the commits of a push to the default branch (see :mod:`.ingest`)."""
+        self.commit_count += len(timestamps)
+        if self.commit_sec_min == 0:
+            self.commit_sec_min = min(timestamps)
+        else:
+            self.commit_sec_min = min(self.commit_sec_min, *timestamps)
+        self.commit_sec_max = max(self.commit_sec_max, *timestamps)
+        self.update_derived_fields()
+
+    def update_derived_fields(self) -> None:
+        """Recompute the fields derived from the first and last commit times."""
         self.contribution_span_days = (
             self.commit_sec_max - self.commit_sec_min
         ) // 86400
@@ -58,6 +138,11 @@ class Link(BaseModel):
         self.is_recent_contributor = self.commit_sec_max > ninety_days_ago
 
 
+def active_weeks(stats: StatsContributor) -> list[int]:
+    """Start timestamps of the weeks in which a contributor made commits."""
+    return sorted(int(week.w.timestamp()) for week in stats.weeks if week.c > 0)
+
+
 class Repository(BaseModel):
     repo: str
     repo_stars: int
@@ -116,6 +201,67 @@ class Repository(BaseModel):
             repo_total_contributors=total_contributors,
         )
 
+    @classmethod
+    def from_graphql(cls, node: dict[str, Any], total_contributors: int) -> Repository:
+        """Build a repository from a GraphQL ``RepositoryFields`` node.
+
+        The contributor count is not exposed by the GraphQL API, so it is
+        passed in separately.
+        """
+        default_branch = node["defaultBranchRef"] or {}
+        history = (default_branch.get("target") or {}).get("history") or {}
+        license_info = node["licenseInfo"] or {}
+
+        return cls(
+            repo=node["nameWithOwner"],
+            repo_stars=node["stargazerCount"],
+            repo_forks=node["forkCount"],
+            repo_createdAt=node["createdAt"],
+            repo_updatedAt=node["updatedAt"],
+            repo_total_commits=history.get("totalCount", 0),
+            repo_url=node["url"],
+            repo_description=node["description"],
+            repo_languages=",".join(
+                language["name"] for language in node["languages"]["nodes"]
+            ),
+            # Phase 1 fields
+            repo_watchers=node["watchers"]["totalCount"],
+            # Like the REST API, open issues include open pull requests
+            repo_open_issues=node["issues"]["totalCount"]
+            + node["pullRequests"]["totalCount"],
+            repo_license=license_info.get("spdxId"),
+            repo_topics=",".join(
+                topic["topic"]["name"] for topic in node["repositoryTopics"]["nodes"]
+            ),
+            repo_has_discussions=node["hasDiscussionsEnabled"],
+            repo_has_wiki=node["hasWikiEnabled"],
+            repo_default_branch=default_branch.get("name", "main"),
+            repo_archived=node["isArchived"],
+            # Phase 2 fields
+            repo_total_contributors=total_contributors,
+        )
+
+    def update_from_webhook(self, repository: dict[str, Any]) -> None:
+        """Update from the ``repository`` object of a webhook payload.
+
+        Payloads have no languages, watchers (subscribers) or contributor
+        count, so these are left as fetched.
+        """
+        license_info = repository.get("license") or {}
+        self.repo_stars = repository["stargazers_count"]
+        self.repo_forks = repository["forks_count"]
+        self.repo_updatedAt = datetime.datetime.fromisoformat(repository["updated_at"])
+        self.repo_description = repository["description"]
+        self.repo_open_issues = repository["open_issues_count"]
+        self.repo_license = license_info.get("spdx_id")
+        self.repo_topics = ",".join(repository.get("topics", []))
+        self.repo_has_discussions = repository.get(
+            "has_discussions", self.repo_has_discussions
+        )
+        self.repo_has_wiki = repository["has_wiki"]
+        self.repo_default_branch = repository["default_branch"]
+        self.repo_archived = repository["archived"]
+
     def update_community_stats(self, core_count: int) -> None:
         """Update community metrics given the count of core contributors.
 
@@ -0,0 +1,202 @@
+"""Request and timing instrumentation for the fetch and build commands.
+
+A :class:`Profile` collects the Github API requests made (per endpoint, with a
+latency histogram and the bytes transferred, as recorded by
+:class:`.transport.MeteringAdapter`), the time spent in named steps, and the
+wall time and requests per repository. It can be written as a JSON report and
+summarized as a table.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from .files import write_atomic
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = (50, 100, 200, 500, 1000, 2000, 5000, float("inf"))
+
+REPOSITORY_PATH = re.compile(r"^/repos/([^/]+)/([^/]+)")
+# Path segments that identify an object rather than an endpoint
+PATH_PARAMETERS = (
+    (re.compile(r"^/repos/[^/]+/[^/]+"), "/repos/{owner}/{repo}"),
+    (re.compile(r"^/users/[^/]+"), "/users/{username}"),
+    (re.compile(r"/\d+(?=/|$)"), "/{id}"),
+)
+
+
+def endpoint(method: str, path: str) -> str:
+    """The endpoint of a request, e.g. ``GET /repos/{owner}/{repo}/commits``."""
+    path = path.split("?", 1)[0]
+    for pattern, replacement in PATH_PARAMETERS:
+        path = pattern.sub(replacement, path)
+    return f"{method} {path}"
+
+
+@dataclass
+class Timing:
+    """Durations of repeated occurrences of something, in seconds."""
+
+    count: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+
+@dataclass
+class EndpointStats(Timing):
+    """Requests to one endpoint."""
+
+    bytes: int = 0
+    statuses: dict[str, int] = field(default_factory=dict)
+    latency_ms: list[int] = field(default_factory=lambda: [0] * len(LATENCY_BUCKETS_MS))
+
+    def add_request(self, status: int, seconds: float, size: int) -> None:
+        self.add(seconds)
+        self.bytes += size
+        self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+        milliseconds = seconds * 1000
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if milliseconds <= bound:
+                self.latency_ms[index] += 1
+                break
+
+
+@dataclass
+class RepositoryStats:
+    """The cost of fetching one repository."""
+
+    seconds: float = 0.0
+    requests: int = 0
+    bytes: int = 0
+
+
+class Profile:
+    """Collects request and timing measurements; safe to use from many threads."""
+
+    def __init__(self) -> None:
+        self.started = time.time()
+        self.endpoints: dict[str, EndpointStats] = {}
+        self.timers: dict[str, Timing] = {}
+        self.repositories: dict[str, RepositoryStats] = {}
+        self._lock = threading.Lock()
+
+    def record_request(
+        self, method: str, path: str, status: int, seconds: float, size: int
+    ) -> None:
+        with self._lock:
+            key = endpoint(method, path)
+            self.endpoints.setdefault(key, EndpointStats()).add_request(
+                status, seconds, size
+            )
+            if match := REPOSITORY_PATH.match(path):
+                stats = self._repository(f"{match[1]}/{match[2]}")
+                stats.requests += 1
+                stats.bytes += size
+
+    @contextmanager
+    def timer(self, name: str, repository: str | None = None) -> Iterator[None]:
+        """Time a block of code under a name, and optionally for a repository."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            with self._lock:
+                self.timers.setdefault(name, Timing()).add(seconds)
+                if repository is not None:
+                    self._repository(repository).seconds += seconds
+
+    def _repository(self, name: str) -> RepositoryStats:
+        return self.repositories.setdefault(name, RepositoryStats())
+
+    def report(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "started_at": self.started,
+                "wall_seconds": time.time() - self.started,
+                "requests": {
+                    "count": sum(stats.count for stats in self.endpoints.values()),
+                    "bytes": sum(stats.bytes for stats in self.endpoints.values()),
+                    "latency_buckets_ms": [
+                        bound if bound != float("inf") else None
+                        for bound in LATENCY_BUCKETS_MS
+                    ],
+                    "endpoints": {
+                        key: asdict(stats)
+                        for key, stats in sorted(self.endpoints.items())
+                    },
+                },
+                "timers": {
+                    key: asdict(timing) for key, timing in sorted(self.timers.items())
+                },
+                "repositories": {
+                    key: asdict(stats)
+                    for key, stats in sorted(self.repositories.items())
+                },
+            }
+
+    def write(self, path: Path) -> None:
+        write_atomic(path, json.dumps(self.report(), indent=2) + "\n")
+
+    def summary(self, top: int = 10) -> str:
+        """A compact table of the most expensive endpoints, steps and repositories."""
+        report = self.report()
+        requests = report["requests"]
+        lines = [
+            f"{requests['count']} requests, {requests['bytes'] / 1e6:.1f} MB "
+            f"in {report['wall_seconds']:.1f}s"
+        ]
+
+        def table(title: str, rows: list[tuple[str, str, str]]) -> None:
+            if not rows:
+                return
+            width = max(len(row[0]) for row in rows)
+            lines.append("")
+            lines.append(title)
+            for name, first, second in rows:
+                lines.append(f"  {name:<{width}}  {first:>10}  {second:>10}")
+
+        endpoints = sorted(
+            self.endpoints.items(), key=lambda item: item[1].count, reverse=True
+        )
+        table(
+            "Endpoint (requests, seconds)",
+            [
+                (key, str(stats.count), f"{stats.seconds:.2f}")
+                for key, stats in endpoints[:top]
+            ],
+        )
+        timers = sorted(
+            self.timers.items(), key=lambda item: item[1].seconds, reverse=True
+        )
+        table(
+            "Step (count, seconds)",
+            [
+                (key, str(timing.count), f"{timing.seconds:.2f}")
+                for key, timing in timers[:top]
+            ],
+        )
+        repositories = sorted(
+            self.repositories.items(), key=lambda item: item[1].seconds, reverse=True
+        )
+        table(
+            "Repository (requests, seconds)",
+            [
+                (key, str(stats.requests), f"{stats.seconds:.2f}")
+                for key, stats in repositories[:top]
+            ],
+        )
+        return "\n".join(lines)
@@ -0,0 +1,275 @@
+"""A local JSON API answering queries about the network from memory.
+
+``serve`` loads the repository and link rows once into indexes by
+contributor, repository and owner, with each contributor's links sorted by
+the time of their last commit, and answers:
+
+- ``/contributors``: every contributor, with their number of repositories;
+- ``/contributors/<name>/repositories?since=<time>``: the repositories a
+  contributor committed to since a time (a Unix timestamp or ISO date),
+  most recent first;
+- ``/contributors/<name>/co-contributors?limit=<n>``: the contributors
+  sharing the most repositories with a contributor;
+- ``/repositories/<owner>/<repo>``: a repository and its contributors;
+- ``/owners`` and ``/owners/<owner>``: per-owner summaries.
+
+Encoded responses are cached, and carry an ETag for conditional requests.
+"""
+
+from __future__ import annotations
+
+import bisect
+import datetime
+import hashlib
+import json
+import threading
+from collections import Counter, OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from .analytics import Row, owner
+
+DEFAULT_PORT = 8767
+CACHE_SIZE = 1024
+DEFAULT_LIMIT = 10
+
+
+class QueryError(Exception):
+    """A query that cannot be answered, with the HTTP status to answer with."""
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def parse_time(value: str) -> int:
+    """A Unix timestamp, from itself or an ISO date or time (UTC if naive)."""
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        time = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        raise QueryError(400, f"Invalid time {value!r}") from None
+    if time.tzinfo is None:
+        time = time.replace(tzinfo=datetime.UTC)
+    return int(time.timestamp())
+
+
+class Network:
+    """Repository and link rows, indexed by contributor, repository and owner."""
+
+    def __init__(self, repositories: list[Row], links: list[Row]) -> None:
+        self.repositories = {row["repo"]: row for row in repositories}
+        self.repository_links: dict[str, list[Row]] = {}
+        by_contributor: dict[str, list[Row]] = {}
+        for link in links:
+            self.repository_links.setdefault(link["repo"], []).append(link)
+            by_contributor.setdefault(link["author_name"], []).append(link)
+        for repo_links in self.repository_links.values():
+            repo_links.sort(key=lambda link: -link["commit_count"])
+        # Each contributor's links, by the time of the last commit, and the times
+        self.contributor_links = {
+            name: sorted(contributor_links, key=lambda link: link["commit_sec_max"])
+            for name, contributor_links in by_contributor.items()
+        }
+        self.contributor_times = {
+            name: [link["commit_sec_max"] for link in contributor_links]
+            for name, contributor_links in self.contributor_links.items()
+        }
+        self.owner_repositories: dict[str, list[str]] = {}
+        for repo in sorted(self.repositories.keys() | self.repository_links.keys()):
+            self.owner_repositories.setdefault(owner(repo), []).append(repo)
+
+    def contributors(self) -> list[dict[str, Any]]:
+        return [
+            {"name": name, "repositories": len(links)}
+            for name, links in sorted(self.contributor_links.items())
+        ]
+
+    def contributor_repositories(self, name: str, since: int = 0) -> list[Row]:
+        """The links of a contributor with commits since a time, newest first."""
+        links = self._links(name)
+        start = bisect.bisect_left(self.contributor_times[name], since)
+        return links[start:][::-1]
+
+    def co_contributors(
+        self, name: str, limit: int = DEFAULT_LIMIT
+    ) -> list[dict[str, Any]]:
+        """The contributors sharing the most repositories with a contributor."""
+        shared: Counter[str] = Counter()
+        commits: Counter[str] = Counter()
+        for link in self._links(name):
+            for other in self.repository_links[link["repo"]]:
+                if other["author_name"] != name:
+                    shared[other["author_name"]] += 1
+                    commits[other["author_name"]] += other["commit_count"]
+        ranked = sorted(shared, key=lambda other: (-shared[other], -commits[other]))
+        return [
+            {"name": other, "shared_repositories": shared[other]}
+            for other in ranked[:limit]
+        ]
+
+    def repository(self, repo: str) -> dict[str, Any]:
+        if repo not in self.repositories and repo not in self.repository_links:
+            raise QueryError(404, f"Unknown repository {repo}")
+        return {
+            "repository": self.repositories.get(repo),
+            "contributors": self.repository_links.get(repo, []),
+        }
+
+    def owners(self) -> list[dict[str, Any]]:
+        return [self.owner(name) for name in self.owner_repositories]
+
+    def owner(self, name: str) -> dict[str, Any]:
+        """A summary of the repositories of an owner and their contributors."""
+        if name not in self.owner_repositories:
+            raise QueryError(404, f"Unknown owner {name}")
+        repos = self.owner_repositories[name]
+        rows = [self.repositories[repo] for repo in repos if repo in self.repositories]
+        commits: Counter[str] = Counter()
+        last_commit = 0
+        for repo in repos:
+            for link in self.repository_links.get(repo, []):
+                commits[link["author_name"]] += link["commit_count"]
+                last_commit = max(last_commit, link["commit_sec_max"])
+        return {
+            "owner": name,
+            "repositories": repos,
+            "stars": sum(row["repo_stars"] for row in rows),
+            "forks": sum(row["repo_forks"] for row in rows),
+            "contributors": len(commits),
+            "commits": commits.total(),
+            "last_commit_sec": last_commit,
+            "top_contributors": [
+                {"name": other, "commits": count}
+                for other, count in commits.most_common(DEFAULT_LIMIT)
+            ],
+        }
+
+    def answer(self, path: str) -> Any:
+        """Answer a query for a path, with its query string."""
+        parts = urlsplit(path)
+        params = dict(parse_qsl(parts.query))
+        segments = [unquote(segment) for segment in parts.path.strip("/").split("/")]
+        match segments:
+            case ["contributors"]:
+                return self.contributors()
+            case ["contributors", name, "repositories"]:
+                return self.contributor_repositories(
+                    name, parse_time(params.get("since", "0"))
+                )
+            case ["contributors", name, "co-contributors"]:
+                try:
+                    limit = int(params.get("limit", DEFAULT_LIMIT))
+                except ValueError:
+                    raise QueryError(400, "Invalid limit") from None
+                if limit < 1:
+                    raise QueryError(400, "The limit must be at least 1")
+                return self.co_contributors(name, limit)
+            case ["repositories", repo_owner, repo_name]:
+                return self.repository(f"{repo_owner}/{repo_name}")
+            case ["owners"]:
+                return self.owners()
+            case ["owners", name]:
+                return self.owner(name)
+        raise QueryError(404, f"Unknown query {parts.path}")
+
+    def _links(self, name: str) -> list[Row]:
+        if name not in self.contributor_links:
+            raise QueryError(404, f"Unknown contributor {name}")
+        return self.contributor_links[name]
+
+
+class QueryServer:
+    """Answers queries about a network over HTTP.
+
+    The most recently used ``cache_size`` responses are kept encoded.
+    """
+
+    def __init__(
+        self,
+        network: Network,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        cache_size: int = CACHE_SIZE,
+    ) -> None:
+        self.network = network
+        self.cache_size = cache_size
+        self.hits = self.misses = 0
+        self._cache: OrderedDict[str, tuple[int, bytes, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def start(self) -> QueryServer:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> QueryServer:
+        return self.start()
+
+    def __exit__(self, *args: object) -> None:
+        self.stop()
+
+    def respond(self, path: str) -> tuple[int, bytes, str]:
+        """The status, encoded body and ETag of the answer to a query."""
+        with self._lock:
+            if (cached := self._cache.get(path)) is not None:
+                self._cache.move_to_end(path)
+                self.hits += 1
+                return cached
+            self.misses += 1
+        try:
+            status, answer = 200, self.network.answer(path)
+        except QueryError as error:
+            status, answer = error.status, {"message": str(error)}
+        content = json.dumps(answer, separators=(",", ":")).encode()
+        response = (status, content, f'"{hashlib.sha256(content).hexdigest()[:32]}"')
+        with self._lock:
+            self._cache[path] = response
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return response
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                status, content, etag = server.respond(self.path)
+                if status == 200 and self.headers.get("If-None-Match") == etag:
+                    status, content = 304, b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(content)))
+                self.send_header("ETag", etag)
+                # For dashboards and a frontend served from elsewhere
+                self.send_header("Access-Control-Allow-Origin", "*")
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
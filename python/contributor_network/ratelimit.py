@@ -0,0 +1,257 @@
+"""Pacing Github API requests to stay inside the rate limits.
+
+Github enforces a primary rate limit (requests per hour, per resource such as
+``core`` for the REST API and ``graphql``) and secondary rate limits, which
+among other things cap the number of requests per minute. PyGithub retries
+requests rejected by either limit; the :class:`RateLimiter` avoids those
+rejections by spacing requests out and pausing before the budget runs out.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any
+
+from requests import PreparedRequest, Response
+from requests.adapters import BaseAdapter
+
+from .transport import ForwardingAdapter
+
+# Github allows 900 points per minute for the REST API, where a GET costs one
+DEFAULT_REQUESTS_PER_MINUTE = 900
+# Requests kept in reserve, e.g. for other tools sharing the same token
+DEFAULT_RESERVE = 50
+
+
+class RateLimitExhausted(Exception):
+    """Raised instead of waiting when the rate limit budget is used up."""
+
+    def __init__(self, resource: str, reset: float) -> None:
+        self.resource = resource
+        self.reset = reset
+        super().__init__(
+            f"The {resource} rate limit is used up until "
+            f"{time.strftime('%H:%M:%S', time.localtime(reset))}"
+        )
+
+
+@dataclass
+class Budget:
+    """The state of the primary rate limit for one resource."""
+
+    limit: int
+    remaining: int
+    reset: float
+
+    @classmethod
+    def from_headers(cls, headers: Any) -> Budget | None:
+        try:
+            return cls(
+                limit=int(headers["x-ratelimit-limit"]),
+                remaining=int(headers["x-ratelimit-remaining"]),
+                reset=float(headers["x-ratelimit-reset"]),
+            )
+        except (KeyError, ValueError):
+            return None
+
+
+def resource(request: PreparedRequest) -> str:
+    """The rate limit resource a request counts against."""
+    path = (request.path_url or "").split("?", 1)[0]
+    return "graphql" if path.endswith("/graphql") else "core"
+
+
+class RateLimiter(ForwardingAdapter):
+    """A transport adapter that paces requests and pauses for rate limit resets.
+
+    Requests are spread out so that no more than ``per_minute`` are sent in any
+    minute. The remaining primary budget of each resource is read from the
+    ``X-RateLimit-*`` response headers; once it drops to ``reserve`` the
+    limiter sleeps until the budget resets, or raises
+    :class:`RateLimitExhausted` if it should not ``wait``.
+    """
+
+    def __init__(
+        self,
+        per_minute: int = DEFAULT_REQUESTS_PER_MINUTE,
+        reserve: int = DEFAULT_RESERVE,
+        wait: bool = True,
+        inner: BaseAdapter | None = None,
+    ) -> None:
+        super().__init__(inner)
+        self.per_minute = per_minute
+        self.reserve = reserve
+        self.wait = wait
+        self.budgets: dict[str, Budget] = {}
+        self.requests = 0
+        self._sent: deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def send(
+        self,
+        request: PreparedRequest,
+        stream: bool = False,
+        timeout: Any = None,
+        verify: bool | str = True,
+        cert: Any = None,
+        proxies: Any = None,
+    ) -> Response:
+        name = resource(request)
+        self.acquire(name)
+        response = super().send(request, stream, timeout, verify, cert, proxies)
+        self.update(response.headers.get("x-ratelimit-resource", name), response)
+        return response
+
+    def acquire(self, name: str) -> None:
+        """Block until a request against a resource may be sent."""
+        while True:
+            with self._lock:
+                now = time.time()
+                delay = 0.0
+                budget = self.budgets.get(name)
+                if budget and budget.remaining <= self.reserve and budget.reset > now:
+                    if not self.wait:
+                        raise RateLimitExhausted(name, budget.reset)
+                    delay = budget.reset - now + 1
+                else:
+                    while self._sent and self._sent[0] <= now - 60:
+                        self._sent.popleft()
+                    if len(self._sent) < self.per_minute:
+                        self._sent.append(now)
+                        self.requests += 1
+                        if budget:
+                            budget.remaining -= 1
+                        return
+                    delay = self._sent[0] + 60 - now
+            if delay > 60:
+                print(f"Waiting {delay:.0f}s for the {name} rate limit to reset")
+            time.sleep(delay)
+
+    def update(self, name: str, response: Response) -> None:
+        """Update the budget of a resource from the headers of a response."""
+        budget = Budget.from_headers(response.headers)
+        if budget is not None:
+            with self._lock:
+                self.budgets[name] = budget
+
+    def remaining(self, name: str = "core") -> int | None:
+        """The remaining budget of a resource, if known."""
+        budget = self.budgets.get(name)
+        return None if budget is None else max(budget.remaining - self.reserve, 0)
+
+
+class TokenPool(ForwardingAdapter):
+    """A transport adapter that spreads requests over several tokens.
+
+    Each request is sent with the token that has the most budget left for its
+    resource, tokens whose budget is not known yet first. The budgets are read
+    from the ``X-RateLimit-*`` headers of the responses, which are then
+    rewritten to the budget of the whole pool, so that a :class:`RateLimiter`
+    mounted in front of the pool paces requests against the combined budget
+    and only pauses when every token is used up.
+    """
+
+    def __init__(self, tokens: list[str], inner: BaseAdapter | None = None) -> None:
+        super().__init__(inner)
+        if not tokens:
+            raise ValueError("A token pool needs at least one token")
+        self.tokens = list(dict.fromkeys(tokens))
+        self.budgets: dict[str, dict[str, Budget]] = {
+            token: {} for token in self.tokens
+        }
+        self.requests = dict.fromkeys(self.tokens, 0)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def send(
+        self,
+        request: PreparedRequest,
+        stream: bool = False,
+        timeout: Any = None,
+        verify: bool | str = True,
+        cert: Any = None,
+        proxies: Any = None,
+    ) -> Response:
+        name = resource(request)
+        token = self.choose(name)
+        request.headers["Authorization"] = f"token {token}"
+        response = super().send(request, stream, timeout, verify, cert, proxies)
+        if request.path_url.split("?", 1)[0].endswith("/rate_limit") and not stream:
+            self._update_all(token, response)
+        name = response.headers.get("x-ratelimit-resource", name)
+        budget = Budget.from_headers(response.headers)
+        if budget is not None:
+            with self._lock:
+                self.budgets[token][name] = budget
+            total = self.budget(name)
+            if total is not None:
+                response.headers["x-ratelimit-limit"] = str(total.limit)
+                response.headers["x-ratelimit-remaining"] = str(total.remaining)
+                response.headers["x-ratelimit-reset"] = str(int(total.reset))
+        return response
+
+    def choose(self, name: str) -> str:
+        """The token to send a request against a resource with."""
+        now = time.time()
+        with self._lock:
+
+            def left(token: str) -> float:
+                budget = self.budgets[token].get(name)
+                if budget is None:
+                    return float("inf")
+                return budget.limit if budget.reset <= now else budget.remaining
+
+            # The least used of the tokens with the most budget left
+            token = max(
+                self.tokens, key=lambda token: (left(token), -self.requests[token])
+            )
+            self.requests[token] += 1
+            budget = self.budgets[token].get(name)
+            if budget is not None and budget.reset > now:
+                budget.remaining -= 1
+            return token
+
+    def budget(self, name: str = "core") -> Budget | None:
+        """The combined budget of the tokens for a resource, if known.
+
+        It resets when the first of the tokens is reset.
+        """
+        now = time.time()
+        with self._lock:
+            budgets = [
+                budget
+                for budgets in self.budgets.values()
+                if (budget := budgets.get(name)) is not None
+            ]
+        if not budgets:
+            return None
+        return Budget(
+            limit=sum(budget.limit for budget in budgets),
+            remaining=sum(
+                budget.limit if budget.reset <= now else budget.remaining
+                for budget in budgets
+            ),
+            reset=min(budget.reset for budget in budgets),
+        )
+
+    def _update_all(self, token: str, response: Response) -> None:
+        """Read the budgets of all resources from a ``/rate_limit`` response."""
+        try:
+            resources = response.json()["resources"]
+            budgets = {
+                name: Budget(
+                    limit=int(values["limit"]),
+                    remaining=int(values["remaining"]),
+                    reset=float(values["reset"]),
+                )
+                for name, values in resources.items()
+            }
+        except (KeyError, TypeError, ValueError):
+            return
+        with self._lock:
+            self.budgets[token].update(budgets)
@@ -0,0 +1,132 @@
+"""A cache of validated records for incremental builds.
+
+Building the site validates every repository and link JSON file. The
+:class:`RecordCache` keeps the validated rows of the previous build keyed on
+each file's path, size and modification time, so that a rebuild only parses
+the files that changed since.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+import os
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel
+
+from .files import write_atomic
+from .models import Link, Repository
+
+# Below this many changed files, validating in other processes costs more
+# than it saves
+PARALLEL_THRESHOLD = 1000
+CHUNK_SIZE = 250
+
+Row = dict[str, Any]
+
+
+@functools.cache
+def schema_version() -> str:
+    """A fingerprint of the record models, which invalidates the cache on change."""
+    schemas = json.dumps(
+        [Repository.model_json_schema(), Link.model_json_schema()], sort_keys=True
+    )
+    return hashlib.sha256(schemas.encode()).hexdigest()[:16]
+
+
+def validate_files(model: type[BaseModel], paths: list[Path]) -> list[Row]:
+    """Validate JSON files with a model and dump them as rows."""
+    return [
+        model.model_validate_json(path.read_bytes()).model_dump(mode="json")
+        for path in paths
+    ]
+
+
+class RecordCache:
+    """Validated rows of JSON files, keyed on path, size and modification time."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.version = schema_version()
+        self.entries: dict[str, tuple[int, int, Row]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._seen: set[str] = set()
+        self._changed = False
+        if path.exists():
+            try:
+                data = json.loads(path.read_bytes())
+            except ValueError:
+                data = {}
+            if data.get("version") == self.version:
+                self.entries = {
+                    key: (mtime_ns, size, row)
+                    for key, (mtime_ns, size, row) in data["entries"].items()
+                }
+
+    def rows(self, model: type[BaseModel], paths: Iterable[Path]) -> list[Row]:
+        """The rows of JSON files, validating only those that changed.
+
+        With many changed files, they are validated on several processes.
+        """
+        rows = self.rows_by_path(model, paths)
+        return [rows[key] for key in sorted(rows)]
+
+    def rows_by_path(
+        self, model: type[BaseModel], paths: Iterable[Path]
+    ) -> dict[str, Row]:
+        """Like :meth:`rows`, keyed by absolute path."""
+        rows: dict[str, Row] = {}
+        misses: list[tuple[str, Path, int, int]] = []
+        for path in paths:
+            key = str(path.absolute())
+            stat = path.stat()
+            self._seen.add(key)
+            entry = self.entries.get(key)
+            if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+                rows[key] = entry[2]
+            else:
+                misses.append((key, path, stat.st_mtime_ns, stat.st_size))
+        self.hits += len(rows)
+        self.misses += len(misses)
+
+        miss_paths = [path for _, path, _, _ in misses]
+        if len(misses) >= PARALLEL_THRESHOLD:
+            chunks = [
+                miss_paths[start : start + CHUNK_SIZE]
+                for start in range(0, len(miss_paths), CHUNK_SIZE)
+            ]
+            with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+                validated = [
+                    row
+                    for chunk_rows in executor.map(
+                        validate_files, [model] * len(chunks), chunks
+                    )
+                    for row in chunk_rows
+                ]
+        else:
+            validated = validate_files(model, miss_paths)
+
+        for (key, _, mtime_ns, size), row in zip(misses, validated, strict=True):
+            self.entries[key] = (mtime_ns, size, row)
+            rows[key] = row
+            self._changed = True
+        return rows
+
+    def save(self) -> None:
+        """Save the cache, dropping entries of files that no longer exist."""
+        stale = self.entries.keys() - self._seen
+        if not self._changed and not stale:
+            return
+        for key in stale:
+            del self.entries[key]
+        write_atomic(
+            self.path,
+            json.dumps({"version": self.version, "entries": self.entries}),
+        )
+        self._changed = False
@@ -0,0 +1,292 @@
+"""A local stand-in for the Github API that serves recorded responses.
+
+Point PyGithub at a :class:`ReplayServer` (``Github(base_url=server.url)``)
+to run ``fetch`` or ``discover`` against a cassette without a network, and
+with reproducible timings:
+
+- every response is delayed by a fixed ``latency``;
+- lists are served in pages of the size the client asks for, or of a fixed
+  ``page_size``, whatever page size they were recorded with;
+- responses carry ``X-RateLimit-*`` headers for a budget of ``rate_limit``
+  requests per resource that resets every ``reset_seconds``. Requests beyond
+  it are rejected like Github does, with a 403;
+- responses have ETags, and conditional requests for unchanged responses are
+  answered with ``304 Not Modified`` without using rate limit budget.
+
+URLs in the recorded responses are rewritten to point at the server.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+if TYPE_CHECKING:
+    from .cassette import Cassette, Interaction
+
+DEFAULT_RATE_LIMIT = 5000
+DEFAULT_RESET_SECONDS = 3600
+# Github's page size when a request does not ask for one
+DEFAULT_PAGE_SIZE = 30
+PAGE_PARAMETERS = {"page", "per_page"}
+
+
+@dataclass
+class Bucket:
+    """The rate limit budget of one resource."""
+
+    remaining: int
+    reset: float
+
+
+def collection_key(path: str) -> tuple[str, tuple[tuple[str, str], ...]]:
+    """Identify a list across its pages: the path and the other parameters."""
+    parts = urlsplit(path)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    return parts.path, tuple(
+        sorted((name, value) for name, value in query if name not in PAGE_PARAMETERS)
+    )
+
+
+def page_number(path: str) -> int:
+    return int(dict(parse_qsl(urlsplit(path).query)).get("page", 1))
+
+
+class ReplayServer:
+    """Serves the responses of a cassette over HTTP, in a background thread.
+
+    Lists (JSON arrays) recorded in several pages are joined and re-paginated.
+    Statistics (``/stats/`` paths) are never paginated, like on Github.
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        rate_limit: int = DEFAULT_RATE_LIMIT,
+        reset_seconds: float = DEFAULT_RESET_SECONDS,
+        page_size: int | None = None,
+    ) -> None:
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.reset_seconds = reset_seconds
+        self.page_size = page_size
+        self.requests = 0
+        self._buckets: dict[str, Bucket] = {}
+        self._lock = threading.Lock()
+        self._interactions: dict[str, Interaction] = {}
+        pages: dict[Any, list[Interaction]] = {}
+        for interaction in cassette.interactions():
+            if interaction.method == "POST":
+                # Only their bodies tell GraphQL queries apart, so these are
+                # read from the cassette by the full key
+                continue
+            key = cassette.key(interaction.method, interaction.path)
+            self._interactions[key] = interaction
+            if (
+                interaction.method == "GET"
+                and interaction.status == 200
+                and "/stats/" not in interaction.path
+                and interaction.body.lstrip().startswith(b"[")
+            ):
+                pages.setdefault(collection_key(interaction.path), []).append(
+                    interaction
+                )
+        # The items of each list, and where they were recorded from
+        self._collections: dict[Any, tuple[str, list[Any]]] = {
+            key: (
+                recorded[0].origin,
+                [
+                    item
+                    for page in sorted(
+                        recorded, key=lambda page: page_number(page.path)
+                    )
+                    for item in json.loads(page.body)
+                ],
+            )
+            for key, recorded in pages.items()
+        }
+        self.cassette = cassette
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def start(self) -> ReplayServer:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> ReplayServer:
+        return self.start()
+
+    def __exit__(self, *args: object) -> None:
+        self.stop()
+
+    def send(
+        self, method: str, path: str, body: bytes, headers: Any
+    ) -> tuple[int, dict[str, str], bytes]:
+        """Answer a request with a status, headers and body."""
+        time.sleep(self.latency)
+        resource = "graphql" if urlsplit(path).path.endswith("/graphql") else "core"
+        if urlsplit(path).path == "/rate_limit":
+            return self._rate_limit_status()
+
+        status, response_headers, content = self._lookup(method, path, body)
+        etag = f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+        response_headers["etag"] = etag
+        with self._lock:
+            self.requests += 1
+            bucket = self._bucket(resource)
+            if headers.get("If-None-Match") == etag:
+                # Conditional requests that hit do not count against the limit
+                status, content = 304, b""
+            elif bucket.remaining == 0:
+                status, content = 403, self._error("API rate limit exceeded")
+            else:
+                bucket.remaining -= 1
+            response_headers |= {
+                "x-ratelimit-limit": str(self.rate_limit),
+                "x-ratelimit-remaining": str(bucket.remaining),
+                "x-ratelimit-reset": str(math.ceil(bucket.reset)),
+                "x-ratelimit-used": str(self.rate_limit - bucket.remaining),
+                "x-ratelimit-resource": resource,
+            }
+        return status, response_headers, content
+
+    def _lookup(
+        self, method: str, path: str, body: bytes
+    ) -> tuple[int, dict[str, str], bytes]:
+        if method == "GET" and collection_key(path) in self._collections:
+            return self._page(path, *self._collections[collection_key(path)])
+        try:
+            if method == "POST":
+                interaction = self.cassette.get(method, path, body)
+            else:
+                interaction = self._interactions[self.cassette.key(method, path)]
+        except KeyError:
+            return (
+                404,
+                {"content-type": "application/json; charset=utf-8"},
+                self._error(f"Not Found (no recording of {method} {path})"),
+            )
+        headers = {
+            name: self._rewrite(value, interaction.origin)
+            for name, value in interaction.headers.items()
+            if not name.startswith(("x-ratelimit-", "etag"))
+        }
+        content = self._rewrite(interaction.body, interaction.origin)
+        return interaction.status, headers, content
+
+    def _page(
+        self, path: str, origin: str, items: list[Any]
+    ) -> tuple[int, dict[str, str], bytes]:
+        parts = urlsplit(path)
+        query = parse_qsl(parts.query, keep_blank_values=True)
+        params = dict(query)
+        page = max(int(params.get("page", 1)), 1)
+        per_page = self.page_size or int(params.get("per_page", DEFAULT_PAGE_SIZE))
+        last = max(math.ceil(len(items) / per_page), 1)
+        other = [(name, value) for name, value in query if name not in PAGE_PARAMETERS]
+        if "per_page" in params:
+            other.append(("per_page", params["per_page"]))
+
+        def link(number: int, rel: str) -> str:
+            url = f"{self.url}{parts.path}?{urlencode([*other, ('page', number)])}"
+            return f'<{url}>; rel="{rel}"'
+
+        links = []
+        if page > 1:
+            links += [link(page - 1, "prev"), link(1, "first")]
+        if page < last:
+            links += [link(page + 1, "next"), link(last, "last")]
+        headers = {"content-type": "application/json; charset=utf-8"}
+        if links:
+            headers["link"] = ", ".join(links)
+        content = json.dumps(items[(page - 1) * per_page : page * per_page])
+        return 200, headers, self._rewrite(content.encode(), origin)
+
+    def _rate_limit_status(self) -> tuple[int, dict[str, str], bytes]:
+        with self._lock:
+            resources = {
+                name: {
+                    "limit": self.rate_limit,
+                    "remaining": bucket.remaining,
+                    "reset": math.ceil(bucket.reset),
+                    "used": self.rate_limit - bucket.remaining,
+                }
+                for name in ("core", "graphql", "search")
+                for bucket in [self._bucket(name)]
+            }
+        content = json.dumps({"resources": resources, "rate": resources["core"]})
+        return (
+            200,
+            {"content-type": "application/json; charset=utf-8"},
+            content.encode(),
+        )
+
+    def _bucket(self, resource: str) -> Bucket:
+        now = time.time()
+        bucket = self._buckets.get(resource)
+        if bucket is None or bucket.reset <= now:
+            bucket = Bucket(self.rate_limit, now + self.reset_seconds)
+            self._buckets[resource] = bucket
+        return bucket
+
+    def _error(self, message: str) -> bytes:
+        return json.dumps(
+            {"message": message, "documentation_url": "https://docs.github.com/rest"}
+        ).encode()
+
+    def _rewrite[T: (str, bytes)](self, value: T, origin: str) -> T:
+        if isinstance(value, bytes):
+            return value.replace(origin.encode(), self.url.encode())
+        return value.replace(origin, self.url)
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def handle_one(self) -> None:
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length) if length else b""
+                status, headers, content = replay.send(
+                    self.command, self.path, body, self.headers
+                )
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = handle_one
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
@@ -0,0 +1,130 @@
+"""Splitting a fetch across workers, and merging their data directories.
+
+``fetch --shard i/n`` fetches only the repositories of shard ``i`` out of
+``n``, so that separate processes or CI jobs, each with their own token and
+data directory, can share the work. Repositories are assigned to shards by a
+hash of their name, so each keeps its shard when repositories are added to
+or removed from the config, and with it the shard's cache and manifest.
+
+``merge`` then combines the repositories, links and manifests of the shards'
+data directories into one. A repository fetched by several shards (e.g.
+after the number of shards changed) is taken from the most recent fetch,
+according to the manifests, along with its links.
+"""
+
+from __future__ import annotations
+
+import datetime
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+
+from .manifest import Manifest
+from .models import Link, Repository
+from .store import StoreFormat, open_store
+
+JOURNAL_NAME = "journal.jsonl"
+
+
+class MergeError(Exception):
+    """Raised when data directories cannot be merged safely."""
+
+
+def parse(value: str) -> tuple[int, int]:
+    """Parse a shard as ``i/n``, numbered from 1."""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(f"Expected a shard like 1/4, got {value!r}") from None
+    if not 1 <= index <= count:
+        raise ValueError(f"Shard {index} is not between 1 and {count}")
+    return index, count
+
+
+def shard_of(repository_name: str, count: int) -> int:
+    """The shard of a repository, numbered from 1."""
+    digest = hashlib.sha256(repository_name.lower().encode()).digest()
+    return int.from_bytes(digest[:8]) % count + 1
+
+
+def select(repository_names: list[str], index: int, count: int) -> list[str]:
+    """The repositories of one shard, in their original order."""
+    return [name for name in repository_names if shard_of(name, count) == index]
+
+
+@dataclass
+class Source:
+    """Where a record is from: a data directory, fetched at some time."""
+
+    directory: Path
+    fetched_at: datetime.datetime | None
+
+
+def merge(
+    sources: list[Path], destination: Path, store_format: StoreFormat = "json"
+) -> tuple[int, int]:
+    """Merge the records of several data directories into another.
+
+    Returns the numbers of repositories and links written. Directories of a
+    fetch that did not complete (with a journal) are refused, as are records
+    that differ between directories when the manifests do not tell which was
+    fetched last.
+    """
+    for directory in sources:
+        if (directory / JOURNAL_NAME).exists():
+            raise MergeError(
+                f"The fetch into {directory} did not complete, "
+                "resume it with fetch --resume before merging"
+            )
+
+    manifest = Manifest.load(destination / "manifest.json")
+    repositories: dict[str, tuple[Source, Repository]] = {}
+    links: dict[tuple[str, str], tuple[Source, Link]] = {}
+    for directory in sources:
+        source_manifest = Manifest.load(directory / "manifest.json")
+        with open_store(directory, store_format) as store:
+            for repository in store.repositories():
+                entry = source_manifest.repositories.get(repository.repo)
+                source = Source(directory, entry.fetched_at if entry else None)
+                if keep(repositories.get(repository.repo), source, repository):
+                    repositories[repository.repo] = (source, repository)
+                    if entry is not None:
+                        manifest.repositories[repository.repo] = entry
+            for repo, login in store.link_logins():
+                link = store.get_link(repo, login)
+                if link is None:
+                    continue
+                entry = source_manifest.repositories.get(repo)
+                source = Source(directory, entry.fetched_at if entry else None)
+                if keep(links.get((repo, login)), source, link):
+                    links[(repo, login)] = (source, link)
+
+    with open_store(destination, store_format) as store:
+        for (repo, login), (_, link) in links.items():
+            store.put_link(repo, login, link)
+        for _, repository in repositories.values():
+            store.put_repository(repository)
+    manifest.save(destination / "manifest.json")
+    return len(repositories), len(links)
+
+
+def keep[T: (Repository, Link)](
+    current: tuple[Source, T] | None, source: Source, record: T
+) -> bool:
+    """Whether a record replaces the record of the same key from another source."""
+    if current is None:
+        return True
+    current_source, current_record = current
+    if current_record == record:
+        return False
+    if current_source.fetched_at is None or source.fetched_at is None:
+        name = (
+            record.repo
+            if isinstance(record, Repository)
+            else (f"The link of {record.author_name} to {record.repo}")
+        )
+        raise MergeError(
+            f"{name} differs between {current_source.directory} and "
+            f"{source.directory}, and their manifests do not tell which is newer"
+        )
+    return source.fetched_at > current_source.fetched_at
@@ -0,0 +1,69 @@
+"""Several sites sharing the data fetched for all of them.
+
+Sites with overlapping repositories and contributors (e.g. ``config.toml`` and
+``veda.toml``) can fetch into one shared data directory: repositories are kept
+by name and links by repository and contributor login, so a repository listed
+by several sites is stored, and fetched, once. Each site's build then projects
+the records of its own repositories and contributors out of the shared store.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from .config import Config
+from .store import Store
+
+
+def merge(
+    configs: list[Config], all_contributors: bool
+) -> tuple[list[str], dict[str, str]]:
+    """The repositories and contributors of several configs, without duplicates.
+
+    Repositories keep the order of the configs. A contributor named differently
+    by several configs gets the name of the first; builds use each site's own
+    names.
+    """
+    repositories: dict[str, None] = {}
+    contributors: dict[str, str] = {}
+    for config in configs:
+        repositories.update(dict.fromkeys(config.repositories))
+        selected = (
+            config.all_contributors if all_contributors else config.core_contributors
+        )
+        for login, name in selected.items():
+            contributors.setdefault(login, name)
+    return list(repositories), contributors
+
+
+def project(
+    store: Store, repositories: list[str], contributors: dict[str, str]
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """The repository and link rows of one site from a shared store.
+
+    Only the site's repositories and the links of its contributors (logins
+    mapped to names) are kept, links are named as in the site's config, and
+    the community stats of each repository are counted against the site's
+    contributors.
+    """
+    selected = set(repositories)
+    links = []
+    core_counts: dict[str, int] = {}
+    for repo, login in store.link_logins():
+        if repo not in selected or login not in contributors:
+            continue
+        link = store.get_link(repo, login)
+        if link is None:
+            continue
+        link.author_name = contributors[login]
+        links.append(link.model_dump(mode="json"))
+        core_counts[repo] = core_counts.get(repo, 0) + 1
+
+    repository_rows = []
+    for name in sorted(selected):
+        repository = store.get_repository(name)
+        if repository is None:
+            continue
+        repository.update_community_stats(core_counts.get(name, 0))
+        repository_rows.append(repository.model_dump(mode="json"))
+    return repository_rows, links
@@ -0,0 +1,283 @@
+"""Storage of fetched repositories and links.
+
+By default every repository and every link (a contributor's commits to a
+repository) is kept as a small JSON file in the data directory:
+
+- ``repositories/<owner>/<repo>.json``
+- ``links/<owner>/<repo>/<login>.json``
+
+With many repositories and contributors this means thousands of files, so the
+same records can instead be kept in a single SQLite database, which is read in
+bulk when building the site.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Literal, Self
+
+from pydantic import TypeAdapter
+
+from .files import write_atomic
+from .models import Link, Repository
+from .records import RecordCache
+
+StoreFormat = Literal["json", "sqlite"]
+
+DATABASE_NAME = "data.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS repositories (
+    name TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS links (
+    repo TEXT NOT NULL,
+    login TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (repo, login)
+);
+"""
+
+repository_list = TypeAdapter(list[Repository])
+link_list = TypeAdapter(list[Link])
+
+
+class Store(ABC):
+    """Repositories by name (``owner/repo``) and links by repository and login."""
+
+    @abstractmethod
+    def get_repository(self, name: str) -> Repository | None: ...
+
+    @abstractmethod
+    def put_repository(self, repository: Repository) -> None: ...
+
+    @abstractmethod
+    def get_link(self, repo: str, login: str) -> Link | None: ...
+
+    @abstractmethod
+    def put_link(self, repo: str, login: str, link: Link) -> None: ...
+
+    @abstractmethod
+    def has_link(self, repo: str, login: str) -> bool: ...
+
+    @abstractmethod
+    def repositories(self) -> list[Repository]:
+        """All repositories."""
+
+    @abstractmethod
+    def links(self) -> list[Link]:
+        """All links."""
+
+    @abstractmethod
+    def link_logins(self) -> list[tuple[str, str]]:
+        """The repository and login of every link."""
+
+    def repository_rows(self, cache: RecordCache | None = None) -> list[dict[str, Any]]:
+        """All repositories as CSV rows, reusing cached rows if possible."""
+        return [
+            repository.model_dump(mode="json") for repository in self.repositories()
+        ]
+
+    def link_rows(self, cache: RecordCache | None = None) -> list[dict[str, Any]]:
+        """All links as CSV rows, reusing cached rows if possible."""
+        return [link.model_dump(mode="json") for link in self.links()]
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+class JsonStore(Store):
+    """One JSON file per repository and link in the data directory."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+
+    def repository_path(self, name: str) -> Path:
+        return self.directory / "repositories" / (name + ".json")
+
+    def link_path(self, repo: str, login: str) -> Path:
+        return self.directory / "links" / repo / (login + ".json")
+
+    def get_repository(self, name: str) -> Repository | None:
+        path = self.repository_path(name)
+        if not path.exists():
+            return None
+        return Repository.model_validate_json(path.read_text())
+
+    def put_repository(self, repository: Repository) -> None:
+        write_atomic(
+            self.repository_path(repository.repo), repository.model_dump_json()
+        )
+
+    def get_link(self, repo: str, login: str) -> Link | None:
+        path = self.link_path(repo, login)
+        if not path.exists():
+            return None
+        return Link.model_validate_json(path.read_text())
+
+    def put_link(self, repo: str, login: str, link: Link) -> None:
+        write_atomic(self.link_path(repo, login), link.model_dump_json())
+
+    def has_link(self, repo: str, login: str) -> bool:
+        return self.link_path(repo, login).exists()
+
+    def repository_paths(self) -> list[Path]:
+        return list((self.directory / "repositories").glob("**/*.json"))
+
+    def link_paths(self) -> list[Path]:
+        return list((self.directory / "links").glob("**/*.json"))
+
+    def repositories(self) -> list[Repository]:
+        return [
+            Repository.model_validate_json(path.read_text())
+            for path in self.repository_paths()
+        ]
+
+    def links(self) -> list[Link]:
+        return [
+            Link.model_validate_json(path.read_text()) for path in self.link_paths()
+        ]
+
+    def repository_rows(self, cache: RecordCache | None = None) -> list[dict[str, Any]]:
+        if cache is None:
+            return super().repository_rows()
+        return cache.rows(Repository, self.repository_paths())
+
+    def link_rows(self, cache: RecordCache | None = None) -> list[dict[str, Any]]:
+        if cache is None:
+            return super().link_rows()
+        return cache.rows(Link, self.link_paths())
+
+    def link_logins(self) -> list[tuple[str, str]]:
+        directory = self.directory / "links"
+        return [
+            (str(path.parent.relative_to(directory)), path.stem)
+            for path in sorted(directory.glob("*/*/*.json"))
+        ]
+
+
+class SqliteStore(Store):
+    """All repositories and links in one SQLite database.
+
+    Records are kept as the same JSON documents as in the :class:`JsonStore`,
+    so that reading all of them takes a single query and a single validation.
+    The connection is shared between threads and guarded by a lock.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def _get(self, query: str, *parameters: str) -> str | None:
+        with self._lock:
+            row = self._connection.execute(query, parameters).fetchone()
+        return None if row is None else row[0]
+
+    def _put(self, query: str, *parameters: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(query, parameters)
+
+    def get_repository(self, name: str) -> Repository | None:
+        data = self._get("SELECT data FROM repositories WHERE name = ?", name)
+        return None if data is None else Repository.model_validate_json(data)
+
+    def put_repository(self, repository: Repository) -> None:
+        self._put(
+            "INSERT OR REPLACE INTO repositories (name, data) VALUES (?, ?)",
+            repository.repo,
+            repository.model_dump_json(),
+        )
+
+    def get_link(self, repo: str, login: str) -> Link | None:
+        data = self._get(
+            "SELECT data FROM links WHERE repo = ? AND login = ?", repo, login
+        )
+        return None if data is None else Link.model_validate_json(data)
+
+    def put_link(self, repo: str, login: str, link: Link) -> None:
+        self._put(
+            "INSERT OR REPLACE INTO links (repo, login, data) VALUES (?, ?, ?)",
+            repo,
+            login,
+            link.model_dump_json(),
+        )
+
+    def has_link(self, repo: str, login: str) -> bool:
+        return (
+            self._get("SELECT 1 FROM links WHERE repo = ? AND login = ?", repo, login)
+            is not None
+        )
+
+    def repositories(self) -> list[Repository]:
+        data = self._get(
+            "SELECT '[' || coalesce(group_concat(data, ','), '') || ']' "
+            "FROM (SELECT data FROM repositories ORDER BY name)"
+        )
+        return repository_list.validate_json(data or "[]")
+
+    def links(self) -> list[Link]:
+        data = self._get(
+            "SELECT '[' || coalesce(group_concat(data, ','), '') || ']' "
+            "FROM (SELECT data FROM links ORDER BY repo, login)"
+        )
+        return link_list.validate_json(data or "[]")
+
+    def link_logins(self) -> list[tuple[str, str]]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT repo, login FROM links ORDER BY repo, login"
+            ).fetchall()
+        return [(repo, login) for repo, login in rows]
+
+    def import_json(self, source: JsonStore) -> tuple[int, int]:
+        """Import all records of a JSON store in one transaction.
+
+        Returns the number of repositories and links imported.
+        """
+        repositories = source.repositories()
+        links = [
+            (repo, login, link)
+            for repo, login in source.link_logins()
+            if (link := source.get_link(repo, login)) is not None
+        ]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO repositories (name, data) VALUES (?, ?)",
+                [(r.repo, r.model_dump_json()) for r in repositories],
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO links (repo, login, data) VALUES (?, ?, ?)",
+                [(repo, login, link.model_dump_json()) for repo, login, link in links],
+            )
+        return len(repositories), len(links)
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+def open_store(directory: Path, store_format: StoreFormat = "json") -> Store:
+    """Open the store of a data directory."""
+    if store_format == "sqlite":
+        return SqliteStore(directory / DATABASE_NAME)
+    return JsonStore(directory)
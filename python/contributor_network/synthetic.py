@@ -0,0 +1,154 @@
+"""Synthetic data directories for benchmarks.
+
+Generates a config and the repositories and links fetched for it, shaped like
+real data: a few contributors take part in many repositories while most only
+appear in a few, and repositories are grouped into organizations. Generation
+is seeded, so the same sizes always produce the same data.
+"""
+
+from __future__ import annotations
+
+import datetime
+import itertools
+import json
+import random
+from dataclasses import dataclass
+from pathlib import Path
+
+from .models import Link, Repository
+from .store import StoreFormat, open_store
+
+LANGUAGES = ["Python", "TypeScript", "Rust", "JavaScript", "Go", "Jupyter Notebook"]
+TOPICS = ["stac", "cog", "zarr", "geospatial", "satellite", "tiles", "python"]
+LICENSES = ["MIT", "Apache-2.0", "BSD-3-Clause", None]
+# Timestamps are relative to this, rather than the current time
+REFERENCE_TIME = datetime.datetime(2026, 1, 1, tzinfo=datetime.UTC)
+DAY = 24 * 60 * 60
+
+
+@dataclass(frozen=True)
+class Size:
+    """The size of a synthetic dataset."""
+
+    name: str
+    repositories: int
+    contributors: int
+
+
+SIZES = {
+    size.name: size
+    for size in [
+        Size("tiny", 10, 5),
+        Size("small", 100, 50),
+        Size("medium", 1_000, 500),
+        Size("large", 10_000, 5_000),
+    ]
+}
+
+
+def generate(
+    directory: Path,
+    size: Size,
+    seed: int = 0,
+    store_format: StoreFormat = "json",
+) -> Path:
+    """Write a synthetic config and data directory.
+
+    The config is written to ``directory / "config.toml"`` and the data to
+    ``directory / "data"``. Returns the path of the config.
+    """
+    rng = random.Random(seed)
+    logins = [f"user{index}" for index in range(size.contributors)]
+    names = {login: f"User {index}" for index, login in enumerate(logins)}
+    # A few prolific contributors, and a long tail
+    weights = list(
+        itertools.accumulate(
+            1 / (index + 1) ** 0.8 for index in range(size.contributors)
+        )
+    )
+    organizations = max(size.repositories // 10, 1)
+    repositories = [
+        f"org{index % organizations}/repo{index}" for index in range(size.repositories)
+    ]
+    reference = int(REFERENCE_TIME.timestamp())
+
+    data = directory / "data"
+    with open_store(data, store_format) as store:
+        for name in repositories:
+            linked = min(int(rng.paretovariate(1.2)), size.contributors)
+            contributors: list[str] = []
+            while len(contributors) < linked:
+                [login] = rng.choices(logins, cum_weights=weights)
+                if login not in contributors:
+                    contributors.append(login)
+            for login in contributors:
+                store.put_link(
+                    name, login, synthetic_link(rng, name, names[login], reference)
+                )
+            store.put_repository(synthetic_repository(rng, name, linked, reference))
+
+    config = directory / "config.toml"
+    config.write_text(
+        "\n".join(
+            [
+                'title = "Synthetic Contributor Network"',
+                'description = "A generated dataset for benchmarks"',
+                'organization_name = "Synthetic"',
+                f"repositories = {json.dumps(repositories)}",
+                "",
+                "[contributors.core]",
+                *(f'{login} = "{names[login]}"' for login in logins),
+                "",
+            ]
+        )
+    )
+    return config
+
+
+def synthetic_link(
+    rng: random.Random, repo: str, author_name: str, reference: int
+) -> Link:
+    last = reference - int(rng.expovariate(1 / 200) * DAY)
+    first = last - int(rng.expovariate(1 / 400) * DAY)
+    return Link(
+        author_name=author_name,
+        repo=repo,
+        commit_count=min(int(rng.paretovariate(0.8)), 20_000),
+        commit_sec_min=first,
+        commit_sec_max=last,
+        contribution_span_days=(last - first) // DAY,
+        is_recent_contributor=last > reference - 90 * DAY,
+    )
+
+
+def synthetic_repository(
+    rng: random.Random, name: str, core_contributors: int, reference: int
+) -> Repository:
+    created = reference - rng.randrange(365, 12 * 365) * DAY
+    total_contributors = core_contributors + int(rng.paretovariate(0.9))
+    stars = min(int(rng.paretovariate(0.6)) - 1, 100_000)
+    return Repository(
+        repo=name,
+        repo_stars=stars,
+        repo_forks=stars // 5,
+        repo_createdAt=datetime.datetime.fromtimestamp(created, datetime.UTC),
+        repo_updatedAt=datetime.datetime.fromtimestamp(
+            reference - rng.randrange(0, 365) * DAY, datetime.UTC
+        ),
+        repo_total_commits=total_contributors
+        * min(int(rng.paretovariate(0.7)) + 5, 1000),
+        repo_url=f"https://github.com/{name}",
+        repo_description=f"Synthetic repository {name}",
+        repo_languages=",".join(rng.sample(LANGUAGES, rng.randint(1, 3))),
+        repo_watchers=stars // 10,
+        repo_open_issues=rng.randrange(0, 100),
+        repo_license=rng.choice(LICENSES),
+        repo_topics=",".join(rng.sample(TOPICS, rng.randint(0, 4))),
+        repo_has_wiki=rng.random() < 0.5,
+        repo_total_contributors=total_contributors,
+        repo_core_contributors=core_contributors,
+        repo_external_contributors=total_contributors - core_contributors,
+        repo_community_ratio=round(
+            (total_contributors - core_contributors) / total_contributors, 3
+        ),
+    )
@@ -0,0 +1,101 @@
+"""Hooks into the HTTP transport PyGithub uses to talk to the Github API.
+
+PyGithub sends every request through a single ``requests.Session``. Features
+like response caching are implemented as transport adapters that wrap the
+adapter mounted on that session and forward requests to it.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Any
+from urllib.parse import urlsplit
+
+from requests import PreparedRequest, Response
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+if TYPE_CHECKING:
+    from github import Github
+
+    from .profiling import Profile
+
+
+class ForwardingAdapter(BaseAdapter):
+    """A transport adapter that forwards requests to another adapter.
+
+    The adapter forwards to a plain HTTP adapter until it is mounted.
+    """
+
+    def __init__(self, inner: BaseAdapter | None = None) -> None:
+        super().__init__()
+        self.inner = inner if inner is not None else HTTPAdapter()
+
+    def send(
+        self,
+        request: PreparedRequest,
+        stream: bool = False,
+        timeout: Any = None,
+        verify: bool | str = True,
+        cert: Any = None,
+        proxies: Any = None,
+    ) -> Response:
+        return self.inner.send(
+            request,
+            stream=stream,
+            timeout=timeout,
+            verify=verify,
+            cert=cert,
+            proxies=proxies,
+        )
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+class MeteringAdapter(ForwardingAdapter):
+    """A transport adapter that records every request in a profile."""
+
+    def __init__(self, profile: Profile, inner: BaseAdapter | None = None) -> None:
+        super().__init__(inner)
+        self.profile = profile
+
+    def send(
+        self,
+        request: PreparedRequest,
+        stream: bool = False,
+        timeout: Any = None,
+        verify: bool | str = True,
+        cert: Any = None,
+        proxies: Any = None,
+    ) -> Response:
+        start = time.perf_counter()
+        response = super().send(request, stream, timeout, verify, cert, proxies)
+        if stream:
+            size = int(response.headers.get("content-length", 0))
+        else:
+            # Reads the body, so that its download counts towards the latency
+            size = len(response.content)
+        seconds = time.perf_counter() - start
+        self.profile.record_request(
+            request.method or "GET",
+            request.path_url,
+            response.status_code,
+            seconds,
+            size,
+        )
+        return response
+
+
+def mount(github: Github, adapter: ForwardingAdapter) -> None:
+    """Mount an adapter in front of the one PyGithub uses for API requests.
+
+    Adapters mounted later see requests first.
+    """
+    # PyGithub creates its connection (and session) lazily and keeps it for the
+    # lifetime of the requester, so create it now to reach the session.
+    create_connection = getattr(github.requester, "_Requester__createConnection")
+    session = create_connection().session
+    # Plain HTTP for a local stand-in API, see replay.py
+    prefix = f"{urlsplit(github.requester.base_url).scheme}://"
+    adapter.inner = session.get_adapter(prefix)
+    session.mount(prefix, adapter)
@@ -0,0 +1,123 @@
+"""Watching the inputs of a build for changes.
+
+Files are polled: every interval, the modification time and size of each
+watched file is compared with the previous poll. Only JSON records and
+regular files are considered, not the temporary files of atomic writes.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel
+
+from .records import RecordCache, validate_files
+
+POLL_INTERVAL = 0.2
+
+Snapshot = dict[Path, tuple[int, int]]
+
+
+def walk(path: Path) -> Iterator[os.DirEntry[str]]:
+    """The non-hidden files under a directory."""
+    try:
+        entries = list(os.scandir(path))
+    except OSError:
+        return
+    for entry in entries:
+        if entry.name.startswith("."):
+            continue
+        if entry.is_dir():
+            yield from walk(Path(entry.path))
+        else:
+            yield entry
+
+
+def scan(paths: list[Path]) -> Snapshot:
+    """The modification time and size of files, and of the files in directories."""
+    snapshot: Snapshot = {}
+    for path in paths:
+        if path.is_dir():
+            for entry in walk(path):
+                stat = entry.stat()
+                snapshot[Path(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+        elif path.exists():
+            stat = path.stat()
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def changed(before: Snapshot, after: Snapshot) -> set[Path]:
+    """Files added, modified or removed between two snapshots."""
+    return {
+        path
+        for path in before.keys() | after.keys()
+        if before.get(path) != after.get(path)
+    }
+
+
+def poll(
+    paths: list[Path],
+    callback: Callable[[set[Path]], None],
+    interval: float = POLL_INTERVAL,
+    polls: int | None = None,
+) -> None:
+    """Call back with the changed files whenever some of the paths change.
+
+    Runs until interrupted, or for a number of polls.
+    """
+    snapshot = scan(paths)
+    count = 0
+    while polls is None or count < polls:
+        time.sleep(interval)
+        count += 1
+        current = scan(paths)
+        if changes := changed(snapshot, current):
+            snapshot = current
+            callback(changes)
+
+
+class Records:
+    """The rows of the JSON records of a model in a directory, kept in memory."""
+
+    def __init__(self, model: type[BaseModel], directory: Path) -> None:
+        self.model = model
+        self.directory = directory.absolute()
+        self._rows: dict[str, dict[str, Any]] = {}
+
+    def load(self, cache: RecordCache) -> None:
+        """Read all records, reusing the rows of unchanged files in the cache."""
+        self._rows = cache.rows_by_path(self.model, self.directory.glob("**/*.json"))
+
+    def update(self, paths: set[Path]) -> bool:
+        """Re-read the records among changed paths. Returns whether any were.
+
+        Invalid records are dropped, and reported with a :class:`ValueError`
+        once the valid ones changed with them are read.
+        """
+        paths = {
+            path.absolute()
+            for path in paths
+            if path.suffix == ".json" and path.absolute().is_relative_to(self.directory)
+        }
+        invalid: list[Path] = []
+        for path in sorted(paths):
+            self._rows.pop(str(path), None)
+            if not path.exists():
+                continue
+            try:
+                (self._rows[str(path)],) = validate_files(self.model, [path])
+            except (OSError, ValueError):
+                invalid.append(path)
+        if invalid:
+            raise ValueError(f"Invalid records: {', '.join(map(str, invalid))}")
+        return bool(paths)
+
+    @property
+    def rows(self) -> list[dict[str, Any]]:
+        """The rows, ordered by path like :meth:`RecordCache.rows`."""
+        return [self._rows[key] for key in sorted(self._rows)]
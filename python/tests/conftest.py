@@ -0,0 +1,146 @@
+"""Stand-ins for the PyGithub objects used by the client and models."""
+
+from __future__ import annotations
+
+import datetime
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from contributor_network.client import Client
+from github.Auth import Token
+
+WEEK = 7 * 24 * 60 * 60
+
+
+def commit(timestamp: int) -> SimpleNamespace:
+    date = datetime.datetime.fromtimestamp(timestamp, datetime.UTC)
+    return SimpleNamespace(commit=SimpleNamespace(author=SimpleNamespace(date=date)))
+
+
+class Commits(list):
+    """A newest-first list of commits with PaginatedList's helpers."""
+
+    @property
+    def totalCount(self) -> int:
+        return len(self)
+
+    @property
+    def reversed(self) -> list:
+        return self[::-1]
+
+
+@dataclass
+class FakeContributor:
+    login: str
+    contributions: int
+
+
+@dataclass
+class FakeRepo:
+    full_name: str
+    # login -> commit timestamps, oldest first
+    commits: dict[str, list[int]] = field(default_factory=dict)
+    stargazers_count: int = 10
+    forks_count: int = 2
+    created_at: datetime.datetime = datetime.datetime(2020, 1, 1, tzinfo=datetime.UTC)
+    updated_at: datetime.datetime = datetime.datetime(2026, 1, 1, tzinfo=datetime.UTC)
+    pushed_at: datetime.datetime = datetime.datetime(2026, 1, 1, tzinfo=datetime.UTC)
+    description: str | None = "A repository"
+    subscribers_count: int = 3
+    open_issues_count: int = 4
+    license: Any = None
+    topics: list[str] = field(default_factory=lambda: ["python", "geo"])
+    languages: dict[str, int] = field(default_factory=lambda: {"Python": 100})
+    has_discussions: bool = False
+    has_wiki: bool = True
+    default_branch: str = "main"
+    archived: bool = False
+
+    @property
+    def html_url(self) -> str:
+        return f"https://github.com/{self.full_name}"
+
+    def get_contributors(self) -> Commits:
+        contributors = sorted(
+            (
+                FakeContributor(login, len(timestamps))
+                for login, timestamps in self.commits.items()
+            ),
+            key=lambda contributor: -contributor.contributions,
+        )
+        return Commits(contributors)
+
+    def get_commits(
+        self, author: str | None = None, since: datetime.datetime | None = None
+    ) -> Commits:
+        if author is None:
+            timestamps = sorted(t for ts in self.commits.values() for t in ts)
+        else:
+            timestamps = self.commits.get(author, [])
+        if since is not None:
+            timestamps = [t for t in timestamps if t >= since.timestamp()]
+        return Commits(commit(t) for t in reversed(timestamps))
+
+    def get_stats_contributors(self) -> list[SimpleNamespace] | None:
+        stats = []
+        for login, timestamps in self.commits.items():
+            weeks: dict[int, int] = {}
+            for timestamp in timestamps:
+                start = timestamp - timestamp % WEEK
+                weeks[start] = weeks.get(start, 0) + 1
+            stats.append(
+                SimpleNamespace(
+                    author=SimpleNamespace(login=login),
+                    total=len(timestamps),
+                    weeks=[
+                        SimpleNamespace(
+                            w=datetime.datetime.fromtimestamp(start, datetime.UTC),
+                            c=count,
+                        )
+                        for start, count in sorted(weeks.items())
+                    ],
+                )
+            )
+        return stats
+
+    def get_languages(self) -> dict[str, int]:
+        return self.languages
+
+    def get_topics(self) -> list[str]:
+        return self.topics
+
+
+@pytest.fixture
+def repos() -> dict[str, FakeRepo]:
+    return {
+        "org/alpha": FakeRepo(
+            "org/alpha",
+            commits={
+                "ada": [1_600_000_000, 1_650_000_000, 1_700_000_000],
+                "bob": [1_610_000_000],
+                "eve": [1_620_000_000, 1_630_000_000],
+            },
+        ),
+        "org/beta": FakeRepo(
+            "org/beta",
+            commits={"bob": [1_500_000_000, 1_700_000_000], "zed": [1_690_000_000]},
+        ),
+    }
+
+
+@pytest.fixture
+def contributors() -> dict[str, str]:
+    return {"ada": "Ada Lovelace", "bob": "Bob Builder"}
+
+
+@pytest.fixture
+def make_client(repos, monkeypatch):
+    def make_client(directory: Path, **kwargs) -> Client:
+        client = Client(Token("token"), directory, **kwargs)
+        monkeypatch.setattr(client, "get_repo", repos.__getitem__)
+        return client
+
+    return make_client
@@ -0,0 +1,38 @@
+from contributor_network.analytics import analyze
+
+
+def test_analyze() -> None:
+    repositories = [
+        {"repo": "org/alpha", "repo_stars": 10, "repo_forks": 2},
+        {"repo": "org/beta", "repo_stars": 3, "repo_forks": 1},
+        {"repo": "other/gamma", "repo_stars": 5, "repo_forks": 0},
+    ]
+    links = [
+        {"author_name": "Ada", "repo": "org/beta", "commit_count": 2},
+        {"author_name": "Ada", "repo": "org/alpha", "commit_count": 3},
+        {"author_name": "Ada", "repo": "other/gamma", "commit_count": 1},
+        {"author_name": "Bob", "repo": "org/alpha", "commit_count": 1},
+        {"author_name": "Bob", "repo": "org/beta", "commit_count": 4},
+    ]
+    result = analyze(repositories, links)
+    assert result["contributors"] == ["Ada", "Bob"]
+    assert result["repos"] == ["org/alpha", "org/beta", "other/gamma"]
+    assert result["owners"] == ["org", "other"]
+    assert result["adjacency"] == {
+        "indptr": [0, 3, 5],
+        "repo": [0, 1, 2, 0, 1],
+        "commit_count": [3, 2, 1, 1, 4],
+    }
+    assert result["shared_contributors"] == [[0, 1, 2], [0, 2, 1], [1, 2, 1]]
+    assert result["degrees"] == {
+        "contributors": [3, 2],
+        "repos": [2, 2, 1],
+        "owners": [2, 1],
+    }
+    assert result["repo_commits"] == [4, 6, 1]
+    assert result["owner_aggregates"] == {
+        "repos": [2, 1],
+        "stars": [13, 5],
+        "forks": [3, 0],
+        "commits": [10, 1],
+    }
@@ -0,0 +1,90 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from contributor_network import benchmark, synthetic
+from contributor_network.config import Config
+from contributor_network.store import JsonStore
+
+
+def test_generate(tmp_path: Path) -> None:
+    size = synthetic.SIZES["tiny"]
+    config = Config.from_toml(synthetic.generate(tmp_path, size))
+    assert len(config.repositories) == size.repositories
+    assert len(config.core_contributors) == size.contributors
+    store = JsonStore(tmp_path / "data")
+    assert len(store.repositories()) == size.repositories
+    links = store.links()
+    assert links
+    assert {link.repo for link in links} <= set(config.repositories)
+
+    # Generation is seeded
+    other = tmp_path / "other"
+    synthetic.generate(other, size)
+    assert (other / "config.toml").read_text() == (tmp_path / "config.toml").read_text()
+    assert JsonStore(other / "data").links() == links
+
+
+def test_run(tmp_path: Path) -> None:
+    result = benchmark.run(synthetic.SIZES["tiny"], repeat=1, work_dir=tmp_path)
+    assert result.size == "tiny"
+    assert result.links > 0
+    assert result.cold_seconds > 0 and result.warm_seconds > 0
+    assert result.peak_memory_mb > 0
+    assert {"repositories.csv", "links.csv", "config.json", "index.html"} <= set(
+        result.output_bytes
+    )
+    [loaded] = benchmark.load(benchmark.report([result]))
+    assert loaded == result
+
+
+def test_compare() -> None:
+    baseline = benchmark.Result(
+        size="small",
+        repositories=100,
+        contributors=50,
+        links=300,
+        output_format="csv",
+        store="json",
+        cold_seconds=1.0,
+        warm_seconds=0.5,
+        peak_memory_mb=100.0,
+        output_bytes={"links.csv": 1000},
+    )
+    result = benchmark.Result(
+        **{
+            **baseline.__dict__,
+            "cold_seconds": 1.1,
+            "warm_seconds": 1.0,
+            "output_bytes": {"links.csv": 1000},
+        }
+    )
+    [regression] = benchmark.compare([result], [baseline], tolerance=0.25)
+    assert regression.startswith("small/csv/json: warm_seconds 0.5 -> 1.0")
+    assert benchmark.compare([result], [baseline], tolerance=1.0) == []
+
+
+def test_startup(tmp_path: Path) -> None:
+    startup = benchmark.startup(repeat=1, work_dir=tmp_path)
+    assert set(startup) == {"help", "list-contributors", "build"}
+    assert all(seconds > 0 for seconds in startup.values())
+    assert benchmark.load_startup(benchmark.report([], startup)) == startup
+    [regression] = benchmark.compare_startup(
+        {"help": 0.3, "build": 0.5}, {"help": 0.2, "build": 0.5}, tolerance=0.25
+    )
+    assert regression == "startup help: 0.2 -> 0.3 (+50%)"
+
+
+def test_cli_imports_lazily() -> None:
+    # Commands that do not use the Github API or Jinja start without them
+    modules = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, contributor_network.cli; print(' '.join(sys.modules))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()
+    assert not {"github", "requests", "jinja2"} & set(modules)
@@ -0,0 +1,83 @@
+import os
+from pathlib import Path
+
+from contributor_network import transport
+from contributor_network.cache import CachedResponse, CachingAdapter, ResponseCache
+from github import Github
+from github.Auth import Token
+from requests import PreparedRequest, Request, Response
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+
+class Server(BaseAdapter):
+    """Answers with an ETag, and with 304 when the client has that ETag."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.requests: list[PreparedRequest] = []
+
+    def send(self, request, *args, **kwargs):  # type: ignore[no-untyped-def]
+        self.requests.append(request)
+        response = Response()
+        response._content_consumed = True
+        response.url = request.url
+        response.headers = CaseInsensitiveDict(
+            {"ETag": '"v1"', "X-RateLimit-Remaining": str(5000 - len(self.requests))}
+        )
+        if request.headers.get("If-None-Match") == '"v1"':
+            response.status_code = 304
+            response._content = b""
+        else:
+            response.status_code = 200
+            response._content = b'{"name": "alpha"}'
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+def get(url: str) -> PreparedRequest:
+    return Request("GET", url).prepare()
+
+
+def test_conditional_requests(tmp_path: Path) -> None:
+    server = Server()
+    adapter = CachingAdapter(ResponseCache(tmp_path), server)
+    url = "https://api.github.com/repos/org/alpha"
+
+    first = adapter.send(get(url))
+    assert first.status_code == 200
+    assert "If-None-Match" not in server.requests[0].headers
+
+    # A new cache instance reads the entries written by the previous one
+    adapter = CachingAdapter(ResponseCache(tmp_path), server)
+    second = adapter.send(get(url))
+    assert server.requests[1].headers["If-None-Match"] == '"v1"'
+    assert second.status_code == 200
+    assert second.json() == {"name": "alpha"}
+    assert second.headers["X-RateLimit-Remaining"] == "4998"
+
+
+def test_least_recently_used_eviction(tmp_path: Path) -> None:
+    cache = ResponseCache(tmp_path, max_bytes=250)
+    response = CachedResponse("https://example.com", {"etag": "x"}, b"0" * 50)
+    cache.put("a", response)
+    cache.put("b", response)
+    os.utime(tmp_path / "a.body", (0, 0))
+    os.utime(tmp_path / "b.body", (1, 1))
+    assert cache.get("a") is not None  # marks "a" as recently used
+    cache.put("c", response)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.size <= 250
+
+
+def test_mount(tmp_path: Path) -> None:
+    github = Github(auth=Token("token"))
+    transport.mount(github, CachingAdapter(ResponseCache(tmp_path)))
+    session = github.requester._Requester__createConnection().session  # type: ignore[attr-defined]
+    adapter = session.get_adapter("https://api.github.com")
+    assert isinstance(adapter, CachingAdapter)
+    assert isinstance(adapter.inner, HTTPAdapter)
@@ -0,0 +1,249 @@
+import datetime
+import re
+import time
+from pathlib import Path
+
+import pytest
+from contributor_network.files import write_atomic
+from contributor_network.journal import Journal
+from contributor_network.manifest import Manifest
+from contributor_network.models import Link
+
+WEEK = 7 * 24 * 60 * 60
+
+
+def read_tree(directory: Path) -> dict[str, str]:
+    return {
+        str(path.relative_to(directory)): path.read_text()
+        for path in sorted(directory.glob("*/**/*.json"))
+    }
+
+
+def test_write_atomic(tmp_path: Path) -> None:
+    path = tmp_path / "nested" / "file.json"
+    write_atomic(path, "first")
+    write_atomic(path, "second")
+    assert path.read_text() == "second"
+    assert [p.name for p in path.parent.iterdir()] == ["file.json"]
+
+
+def test_fetch(make_client, contributors, tmp_path: Path) -> None:
+    make_client(tmp_path).fetch(["org/alpha", "org/beta"], contributors)
+    assert sorted(read_tree(tmp_path)) == [
+        "links/org/alpha/ada.json",
+        "links/org/alpha/bob.json",
+        "links/org/beta/bob.json",
+        "repositories/org/alpha.json",
+        "repositories/org/beta.json",
+    ]
+
+
+def test_concurrent_fetch_matches_serial(
+    make_client, contributors, tmp_path: Path
+) -> None:
+    repositories = ["org/alpha", "org/beta"]
+    make_client(tmp_path / "serial").fetch(repositories, contributors)
+    make_client(tmp_path / "concurrent", concurrency=4).fetch(
+        repositories, contributors
+    )
+    assert read_tree(tmp_path / "serial") == read_tree(tmp_path / "concurrent")
+
+
+def test_links_from_stats_match_commits(
+    make_client, contributors, tmp_path: Path
+) -> None:
+    repositories = ["org/alpha", "org/beta"]
+    make_client(tmp_path / "commits").fetch(repositories, contributors)
+    make_client(tmp_path / "stats", link_source="stats").fetch(
+        repositories, contributors
+    )
+    from_commits = read_tree(tmp_path / "commits")
+    from_stats = read_tree(tmp_path / "stats")
+    assert from_commits.keys() == from_stats.keys()
+    for name in from_commits:
+        if name.startswith("links/"):
+            expected = Link.model_validate_json(from_commits[name])
+            link = Link.model_validate_json(from_stats[name])
+            assert link.commit_count == expected.commit_count
+            assert 0 <= expected.commit_sec_min - link.commit_sec_min < WEEK
+            assert 0 <= expected.commit_sec_max - link.commit_sec_max < WEEK
+        else:
+            assert from_commits[name] == from_stats[name]
+
+
+def test_links_from_stats_keep_first_commit_times(
+    make_client, contributors, tmp_path: Path
+) -> None:
+    make_client(tmp_path).fetch(["org/alpha"], contributors)
+    from_commits = read_tree(tmp_path)
+    make_client(tmp_path, link_source="stats").fetch(["org/alpha"], contributors)
+    for name, text in read_tree(tmp_path).items():
+        if name.startswith("links/"):
+            expected = Link.model_validate_json(from_commits[name])
+            link = Link.model_validate_json(text)
+            assert link.commit_sec_min == expected.commit_sec_min
+
+
+def test_links_from_stats_falls_back_to_commits(
+    make_client, repos, contributors, tmp_path: Path, monkeypatch
+) -> None:
+    monkeypatch.setattr(repos["org/alpha"], "get_stats_contributors", lambda: None)
+    client = make_client(tmp_path / "stats", link_source="stats")
+    client.get_stats_contributors = lambda repo: (
+        client.__class__.get_stats_contributors(client, repo, delay=0)
+    )
+    client.fetch(["org/alpha"], contributors)
+    make_client(tmp_path / "commits").fetch(["org/alpha"], contributors)
+    assert read_tree(tmp_path / "stats") == read_tree(tmp_path / "commits")
+
+
+def answer_graphql(repos, queries: list[str]):
+    """Answer the user and commit history queries of the "authors" link source."""
+
+    def graphql_query(query: str, variables: dict) -> tuple[dict, dict]:
+        queries.append(query)
+        if "history(" not in query:
+            users = re.findall(r'(u\d+): user\(login: "([^"]+)"\)', query)
+            return {}, {"data": {alias: {"id": f"U_{login}"} for alias, login in users}}
+        data = {}
+        for alias, owner, name, body in re.findall(
+            r'(r\d+): repository\(owner: "([^"]+)", name: "([^"]+)"\) \{(.*?)\n  \}',
+            query,
+            re.DOTALL,
+        ):
+            commits = repos[f"{owner}/{name}"].commits
+            target = {}
+            for author, login in re.findall(r'(a\d+): history\(.*?id: "U_(\w+)"', body):
+                timestamps = commits.get(login, [])
+                target[author] = {
+                    "totalCount": len(timestamps),
+                    "nodes": [
+                        {
+                            "authoredDate": datetime.datetime.fromtimestamp(
+                                timestamp, datetime.UTC
+                            ).isoformat()
+                        }
+                        for timestamp in timestamps[-1:]
+                    ],
+                }
+            data[alias] = {"defaultBranchRef": {"target": target}}
+        return {}, {"data": data}
+
+    return graphql_query
+
+
+def test_links_from_authors_match_commits(
+    make_client, repos, contributors, tmp_path: Path, monkeypatch
+) -> None:
+    repositories = ["org/alpha", "org/beta"]
+    make_client(tmp_path / "commits").fetch(repositories, contributors)
+    client = make_client(tmp_path / "authors", link_source="authors")
+    queries: list[str] = []
+    monkeypatch.setattr(
+        client.github.requester, "graphql_query", answer_graphql(repos, queries)
+    )
+    # The contributors of the repositories are not listed
+    monkeypatch.setattr(client, "update_links", None)
+    client.fetch(repositories, contributors)
+    assert len(queries) == 2
+    assert read_tree(tmp_path / "authors") == read_tree(tmp_path / "commits")
+
+
+def test_incremental_fetch(make_client, repos, contributors, tmp_path: Path) -> None:
+    repositories = ["org/alpha", "org/beta"]
+    make_client(tmp_path).fetch(repositories, contributors)
+    manifest = Manifest.load(tmp_path / "manifest.json")
+    assert sorted(manifest.repositories) == repositories
+    assert manifest.repositories["org/alpha"].contributors == ["ada", "bob"]
+
+    # Nothing changed, so nothing is fetched beyond the repositories themselves
+    before = read_tree(tmp_path)
+    for repo in repos.values():
+        repo.get_commits = repo.get_contributors = None  # type: ignore[method-assign]
+    make_client(tmp_path).fetch(repositories, contributors, incremental=True)
+    assert read_tree(tmp_path) == before
+
+    # A push to alpha updates its links with the new commits only, also
+    # counting those dated before the last fetch
+    del repos["org/alpha"].get_commits, repos["org/alpha"].get_contributors
+    pushed = int(time.time()) + 60
+    repos["org/alpha"].commits["ada"][:0] = [1_590_000_000]
+    repos["org/alpha"].commits["ada"].append(pushed)
+    repos["org/alpha"].pushed_at = datetime.datetime.fromtimestamp(pushed, datetime.UTC)
+    make_client(tmp_path).fetch(repositories, contributors, incremental=True)
+    after = read_tree(tmp_path)
+    ada = Link.model_validate_json(after["links/org/alpha/ada.json"])
+    assert ada.commit_count == 5
+    assert ada.commit_sec_max == pushed
+    assert after["links/org/alpha/bob.json"] == before["links/org/alpha/bob.json"]
+    assert after["repositories/org/beta.json"] == before["repositories/org/beta.json"]
+    assert '"repo_core_contributors":2' in after["repositories/org/alpha.json"]
+
+    # A new configured contributor refetches all links
+    make_client(tmp_path).fetch(
+        ["org/alpha"], {**contributors, "eve": "Eve"}, incremental=True
+    )
+    assert "links/org/alpha/eve.json" in read_tree(tmp_path)
+
+
+def test_incremental_fetch_counts_like_a_full_fetch(
+    make_client, repos, contributors, tmp_path: Path
+) -> None:
+    make_client(tmp_path / "incremental").fetch(["org/alpha"], contributors)
+    alpha = repos["org/alpha"]
+    pushed = int(time.time()) + 60
+    alpha.commits["ada"].append(pushed)
+    alpha.pushed_at = datetime.datetime.fromtimestamp(pushed, datetime.UTC)
+    # Contributions also count commits the author filter misses, e.g. made
+    # with another email address of the account
+    listed = alpha.get_contributors
+
+    def get_contributors():  # type: ignore[no-untyped-def]
+        contributors = listed()
+        for contributor in contributors:
+            contributor.contributions += 2
+        return contributors
+
+    alpha.get_contributors = get_contributors  # type: ignore[method-assign]
+    make_client(tmp_path / "incremental").fetch(
+        ["org/alpha"], contributors, incremental=True
+    )
+    make_client(tmp_path / "full").fetch(["org/alpha"], contributors)
+    incremental = read_tree(tmp_path / "incremental")
+    full = read_tree(tmp_path / "full")
+    assert incremental["links/org/alpha/ada.json"] == full["links/org/alpha/ada.json"]
+    assert Link.model_validate_json(full["links/org/alpha/ada.json"]).commit_count == 6
+
+
+def test_resume(make_client, repos, contributors, tmp_path: Path) -> None:
+    repositories = ["org/alpha", "org/beta"]
+    make_client(tmp_path / "expected").fetch(repositories, contributors)
+
+    def fail(**kwargs):  # type: ignore[no-untyped-def]
+        raise ConnectionError("network down")
+
+    directory = tmp_path / "resumed"
+    repos["org/beta"].get_commits = fail  # type: ignore[method-assign]
+    with pytest.raises(ConnectionError):
+        make_client(directory).fetch(repositories, contributors)
+    journal = Journal(directory / "journal.jsonl", resume=True)
+    assert journal.repositories == {"org/alpha"}
+
+    # Completed work is not repeated
+    del repos["org/beta"].get_commits
+    repos["org/alpha"].get_commits = fail  # type: ignore[method-assign]
+    make_client(directory).fetch(repositories, contributors, resume=True)
+    assert read_tree(directory) == read_tree(tmp_path / "expected")
+    assert not (directory / "journal.jsonl").exists()
+
+
+def test_journal_ignores_torn_lines(tmp_path: Path) -> None:
+    path = tmp_path / "journal.jsonl"
+    path.write_text('{"repo": "org/alpha", "login": "ada"}\n{"repo": "org/al')
+    journal = Journal(path, resume=True)
+    assert journal.is_done("org/alpha", "ada")
+    assert not journal.is_done("org/alpha")
+    journal.repository_done("org/beta")
+    assert Journal(path, resume=True).is_done("org/beta", "bob")
+    Journal(path)
+    assert not path.exists()
@@ -0,0 +1,57 @@
+import gzip
+import json
+import os
+from pathlib import Path
+
+from contributor_network import compact
+
+REPOSITORIES = [
+    {"repo": "org/beta", "repo_stars": 3, "repo_archived": True},
+    {"repo": "org/alpha", "repo_stars": 10, "repo_archived": False},
+]
+LINKS = [
+    {"author_name": "Zed", "repo": "org/beta", "commit_count": 1},
+    {"author_name": "Ada", "repo": "org/alpha", "commit_count": 3},
+    {"author_name": "Ada", "repo": "org/beta", "commit_count": 2},
+]
+
+
+def test_encode() -> None:
+    payload = compact.encode(["Ada", "Bob"], REPOSITORIES, LINKS)
+    assert payload["authors"] == ["Ada", "Bob", "Zed"]
+    assert payload["repos"] == ["org/alpha", "org/beta"]
+    assert payload["top_contributors"] == [0, 1]
+    assert payload["repositories"] == {
+        "repo_stars": [10, 3],
+        "repo_archived": [False, True],
+    }
+    assert payload["links"] == {
+        "author": [0, 0, 2],
+        "repo": [0, 1, 1],
+        "commit_count": [3, 2, 1],
+    }
+
+
+def test_write(tmp_path: Path) -> None:
+    payload = compact.encode(["Ada"], REPOSITORIES, LINKS)
+    name, changed = compact.write(tmp_path, payload)
+    assert changed
+    assert name.startswith("network.") and name.endswith(".json")
+    assert json.loads((tmp_path / name).read_bytes()) == payload
+    assert (
+        gzip.decompress((tmp_path / (name + ".gz")).read_bytes())
+        == (tmp_path / name).read_bytes()
+    )
+    assert compact.write(tmp_path, payload) == (name, False)
+
+    # The previous data is kept for clients with a cached config.json
+    new_name, _ = compact.write(tmp_path, compact.encode(["Bob"], REPOSITORIES, LINKS))
+    assert new_name != name
+    assert (tmp_path / name).exists()
+    assert (tmp_path / (name + ".gz")).exists()
+    # Written before, even on file systems with coarse modification times
+    os.utime(tmp_path / name, ns=(0, 0))
+    compact.write(tmp_path, compact.encode(["Cy"], REPOSITORIES, LINKS))
+    assert (tmp_path / new_name).exists()
+    assert not (tmp_path / name).exists()
+    assert not (tmp_path / (name + ".gz")).exists()
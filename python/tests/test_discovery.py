@@ -0,0 +1,50 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+from contributor_network.discovery import Discovery
+
+
+def event(id: int, type: str, repo: str) -> SimpleNamespace:
+    return SimpleNamespace(id=str(id), type=type, repo=SimpleNamespace(full_name=repo))
+
+
+class FakeGithub:
+    def __init__(self, events: dict[str, list[SimpleNamespace]]) -> None:
+        self.events = events
+        self.seen: list[str] = []
+
+    def get_user(self, login: str) -> SimpleNamespace:
+        def get_events():
+            # Newest first, like the Github API
+            for event in self.events[login]:
+                self.seen.append(event.id)
+                yield event
+
+        return SimpleNamespace(get_events=get_events)
+
+
+def test_discovery(tmp_path: Path) -> None:
+    github = FakeGithub(
+        {
+            "ada": [
+                event(3, "PushEvent", "org/alpha"),
+                event(2, "WatchEvent", "org/stars"),
+                event(1, "IssuesEvent", "org/known"),
+            ],
+            "bob": [event(4, "PullRequestEvent", "org/alpha")],
+        }
+    )
+    discovery = Discovery()
+    assert discovery.update(github, "ada") == (3, 2)  # type: ignore[arg-type]
+    assert discovery.update(github, "bob") == (1, 1)  # type: ignore[arg-type]
+    discovery.save(tmp_path / "discovery.json")
+
+    github.events["ada"].insert(0, event(5, "PushEvent", "org/gamma"))
+    github.seen.clear()
+    discovery = Discovery.load(tmp_path / "discovery.json")
+    assert discovery.update(github, "ada") == (1, 1)  # type: ignore[arg-type]
+    assert github.seen == ["5", "3"]
+    assert discovery.users["ada"].last_event_id == "5"
+    assert discovery.contributors_by_repository(
+        ["ada", "bob"], exclude={"org/known"}
+    ) == {"org/alpha": ["ada", "bob"], "org/gamma": ["ada"]}
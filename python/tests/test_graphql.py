@@ -0,0 +1,125 @@
+from types import SimpleNamespace
+from typing import Any
+
+from contributor_network import graphql
+from contributor_network.models import Repository
+from github import GithubException
+
+
+def node(repo) -> dict[str, Any]:
+    """The GraphQL ``RepositoryFields`` node Github returns for a fake repo."""
+    return {
+        "nameWithOwner": repo.full_name,
+        "stargazerCount": repo.stargazers_count,
+        "forkCount": repo.forks_count,
+        "createdAt": repo.created_at.isoformat().replace("+00:00", "Z"),
+        "updatedAt": repo.updated_at.isoformat().replace("+00:00", "Z"),
+        "pushedAt": repo.pushed_at.isoformat().replace("+00:00", "Z"),
+        "url": repo.html_url,
+        "description": repo.description,
+        "defaultBranchRef": {
+            "name": repo.default_branch,
+            "target": {"history": {"totalCount": repo.get_commits().totalCount}},
+        },
+        "languages": {"nodes": [{"name": name} for name in repo.get_languages()]},
+        "watchers": {"totalCount": repo.subscribers_count},
+        "issues": {"totalCount": repo.open_issues_count - 1},
+        "pullRequests": {"totalCount": 1},
+        "licenseInfo": {"spdxId": "MIT"},
+        "repositoryTopics": {
+            "nodes": [{"topic": {"name": name}} for name in repo.get_topics()]
+        },
+        "hasDiscussionsEnabled": repo.has_discussions,
+        "hasWikiEnabled": repo.has_wiki,
+        "isArchived": repo.archived,
+    }
+
+
+def test_rest_and_graphql_match(repos) -> None:
+    repo = repos["org/alpha"]
+    repo.license = SimpleNamespace(spdx_id="MIT")
+    rest = Repository.from_github(repo)
+    from_graphql = Repository.from_graphql(
+        node(repo), repo.get_contributors().totalCount
+    )
+    for field in Repository.model_fields:
+        assert getattr(from_graphql, field) == getattr(rest, field), field
+    assert from_graphql.model_dump_json() == rest.model_dump_json()
+
+
+def test_graphql_empty_repository(repos) -> None:
+    data = node(repos["org/beta"])
+    data["defaultBranchRef"] = None
+    data["licenseInfo"] = None
+    repository = Repository.from_graphql(data, 0)
+    assert repository.repo_total_commits == 0
+    assert repository.repo_license is None
+
+
+def test_fetch_repositories_in_batches(repos) -> None:
+    queries = []
+
+    def graphql_query(query: str, variables: dict) -> tuple[dict, dict]:
+        queries.append(query)
+        count = query.count("...RepositoryFields")
+        return {}, {"data": {f"r{i}": {"index": i} for i in range(count)}}
+
+    github = SimpleNamespace(requester=SimpleNamespace(graphql_query=graphql_query))
+    names = [f"org/repo-{i}" for i in range(5)]
+    nodes = graphql.fetch_repositories(github, names, batch_size=2)  # type: ignore[arg-type]
+    assert len(queries) == 3
+    assert 'r0: repository(owner: "org", name: "repo-4")' in queries[-1]
+    assert [nodes[name]["index"] for name in names] == [0, 1, 0, 1, 0]
+
+
+def test_fetch_repositories_without_missing_repositories() -> None:
+    def graphql_query(query: str, variables: dict) -> tuple[dict, dict]:
+        data = {
+            "data": {"r0": {"nameWithOwner": "org/alpha"}, "r1": None},
+            "errors": [{"type": "NOT_FOUND", "path": ["r1"]}],
+        }
+        raise GithubException(400, data)
+
+    github = SimpleNamespace(requester=SimpleNamespace(graphql_query=graphql_query))
+    nodes = graphql.fetch_repositories(github, ["org/alpha", "org/renamed"])  # type: ignore[arg-type]
+    assert nodes == {"org/alpha": {"nameWithOwner": "org/alpha"}}
+
+
+def test_fetch_user_ids_without_missing_users() -> None:
+    def graphql_query(query: str, variables: dict) -> tuple[dict, dict]:
+        data = {
+            "data": {"u0": {"id": "U_ada"}, "u1": None},
+            "errors": [{"type": "NOT_FOUND", "path": ["u1"]}],
+        }
+        raise GithubException(400, data)
+
+    github = SimpleNamespace(requester=SimpleNamespace(graphql_query=graphql_query))
+    ids = graphql.fetch_user_ids(github, ["ada", "renamed"])  # type: ignore[arg-type]
+    assert ids == {"ada": "U_ada"}
+
+
+def test_fetch_author_histories_in_batches() -> None:
+    queries = []
+
+    def graphql_query(query: str, variables: dict) -> tuple[dict, dict]:
+        queries.append(query)
+        history = {"totalCount": 2, "nodes": [{"authoredDate": "2026-01-01T00:00:00Z"}]}
+        target = {"a0": history, "a1": {"totalCount": 0, "nodes": []}}
+        data = {
+            f"r{i}": {"defaultBranchRef": {"target": target}}
+            for i in range(query.count("repository("))
+        }
+        return {}, {"data": data}
+
+    github = SimpleNamespace(requester=SimpleNamespace(graphql_query=graphql_query))
+    names = [f"org/repo-{i}" for i in range(5)]
+    histories = graphql.fetch_author_histories(
+        github,  # type: ignore[arg-type]
+        names,
+        {"ada": "U_ada", "bob": "U_bob"},
+        batch_size=4,
+    )
+    # Two repositories of two authors per query
+    assert len(queries) == 3
+    assert 'a1: history(first: 1, author: {id: "U_bob"})' in queries[0]
+    assert histories == dict.fromkeys(names, {"ada": (2, 1767225600)})
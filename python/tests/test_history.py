@@ -0,0 +1,105 @@
+import datetime
+from pathlib import Path
+
+import pytest
+from contributor_network.history import HISTORY_FIELDS, History
+from contributor_network.store import JsonStore
+
+
+def at(day: int) -> datetime.datetime:
+    return datetime.datetime(2026, 1, day, tzinfo=datetime.UTC)
+
+
+def timestamp(day: int) -> int:
+    return int(at(day).timestamp())
+
+
+def test_append_only_changes(make_client, repos, contributors, tmp_path: Path) -> None:
+    make_client(tmp_path).fetch(["org/alpha", "org/beta"], contributors)
+    store = JsonStore(tmp_path)
+    history = History(tmp_path / "history.jsonl")
+    # 2 repositories and 3 links
+    assert history.append(store, at(1)) == 2 * 8 + 3 * 2
+    assert history.append(store, at(2)) == 0
+
+    repos["org/alpha"].stargazers_count = 20
+    repos["org/alpha"].commits["ada"].append(1_710_000_000)
+    make_client(tmp_path).fetch(["org/alpha"], contributors)
+    # The stars and commits of the repository, and the commits of the link
+    assert history.append(store, at(3)) == 4
+    assert history.snapshots() == [timestamp(1), timestamp(2), timestamp(3)]
+
+    assert dict(history.series("repo_stars")) == {
+        "org/alpha": [(timestamp(1), 10), (timestamp(3), 20)],
+        "org/beta": [(timestamp(1), 10)],
+    }
+    # Series start with the value at the start of the range
+    assert dict(history.series("commit_count", since=timestamp(2))) == {
+        "org/alpha/ada": [(timestamp(2), 3), (timestamp(3), 4)],
+        "org/alpha/bob": [(timestamp(2), 1)],
+        "org/beta/bob": [(timestamp(2), 2)],
+    }
+    assert dict(history.series("repo_stars", until=timestamp(2))) == {
+        "org/alpha": [(timestamp(1), 10)],
+        "org/beta": [(timestamp(1), 10)],
+    }
+    export = history.export(["repo_stars", "commit_sec_max"], timestamp(3))
+    assert set(export["series"]) == {"repo_stars", "commit_sec_max"}
+    with pytest.raises(ValueError):
+        next(history.series("repo_url"))
+
+
+def test_snapshots_in_the_same_second(
+    make_client, contributors, tmp_path: Path
+) -> None:
+    make_client(tmp_path).fetch(["org/beta"], contributors)
+    history = History(tmp_path / "history.jsonl")
+    history.append(JsonStore(tmp_path), at(1))
+    history.append(JsonStore(tmp_path), at(1))
+    assert history.snapshots() == [timestamp(1), timestamp(1) + 1]
+    assert "repo_stars" in HISTORY_FIELDS
+
+
+def test_read_back(make_client, repos, contributors, tmp_path: Path) -> None:
+    make_client(tmp_path).fetch(["org/beta"], contributors)
+    path = tmp_path / "history.jsonl"
+    History(path).append(JsonStore(tmp_path), at(1))
+    repos["org/beta"].stargazers_count = 20
+    make_client(tmp_path).fetch(["org/beta"], contributors)
+    History(path).append(JsonStore(tmp_path), at(2))
+    # One line per snapshot and per changed value
+    assert len(path.read_text().splitlines()) == 1 + 8 + 2 + 1 + 1
+
+    # A snapshot torn by a crash
+    with path.open("a") as file:
+        file.write('{"at": ')
+    history = History(path)
+    assert history.snapshots() == [timestamp(1), timestamp(2)]
+    assert dict(history.series("repo_stars")) == {
+        "org/beta": [(timestamp(1), 10), (timestamp(2), 20)]
+    }
+    assert history.append(JsonStore(tmp_path), at(3)) == 0
+    assert History(path).snapshots() == [timestamp(1), timestamp(2), timestamp(3)]
+
+
+def test_export_streams_the_requested_fields(
+    make_client, repos, contributors, tmp_path: Path
+) -> None:
+    make_client(tmp_path).fetch(["org/beta"], contributors)
+    history = History(tmp_path / "history.jsonl")
+    for day, stars in [(1, 10), (2, 20), (3, 30)]:
+        repos["org/beta"].stargazers_count = stars
+        make_client(tmp_path).fetch(["org/beta"], contributors)
+        history.append(JsonStore(tmp_path), at(day))
+    # Only the last value before the range is kept
+    assert history.export(["repo_stars"], timestamp(3)) == {
+        "since": timestamp(3),
+        "series": {"repo_stars": {"org/beta": [(timestamp(3), 30)]}},
+    }
+    assert history.export(["repo_stars", "repo_forks"], timestamp(2) + 1) == {
+        "since": timestamp(2) + 1,
+        "series": {
+            "repo_stars": {"org/beta": [(timestamp(2) + 1, 20), (timestamp(3), 30)]},
+            "repo_forks": {"org/beta": [(timestamp(2) + 1, 2)]},
+        },
+    }
@@ -0,0 +1,178 @@
+import copy
+import datetime
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+import requests
+from contributor_network import ingest
+from contributor_network.store import JsonStore
+
+PAYLOADS = Path(__file__).parent / "payloads"
+
+
+@pytest.fixture
+def push() -> dict[str, Any]:
+    return json.loads((PAYLOADS / "push.json").read_text())
+
+
+@pytest.fixture
+def pull_request() -> dict[str, Any]:
+    return json.loads((PAYLOADS / "pull_request.json").read_text())
+
+
+@pytest.fixture
+def store(make_client, contributors, tmp_path: Path) -> JsonStore:
+    make_client(tmp_path).fetch(["org/alpha", "org/beta"], contributors)
+    return JsonStore(tmp_path)
+
+
+def test_push(store: JsonStore, contributors, push) -> None:
+    now = datetime.datetime.now(datetime.UTC).replace(microsecond=0)
+    push["commits"][2]["timestamp"] = now.isoformat()
+    ingester = ingest.Ingester(store, contributors)
+    assert ingester.apply("push", push, "delivery-1")
+    # Redeliveries are ignored
+    assert not ingester.apply("push", push, "delivery-1")
+    # Nothing is written before the batch is flushed
+    link = store.get_link("org/alpha", "ada")
+    assert link is not None and link.commit_count == 3
+    assert ingester.flush() == (1, 1)
+    assert ingester.flush() == (0, 0)
+
+    link = store.get_link("org/alpha", "ada")
+    assert link is not None
+    assert link.commit_count == 5
+    assert link.commit_sec_min == 1_600_000_000
+    assert link.commit_sec_max == int(now.timestamp())
+    assert link.contribution_span_days == (link.commit_sec_max - 1_600_000_000) // 86400
+    assert link.is_recent_contributor
+    # eve is not a configured contributor
+    assert not store.has_link("org/alpha", "eve")
+
+    repository = store.get_repository("org/alpha")
+    assert repository is not None
+    assert repository.repo_total_commits == 9
+    assert repository.repo_stars == 12
+    assert repository.repo_license == "MIT"
+    assert repository.repo_topics == "python,geo,formats"
+    assert repository.repo_languages == "Python"
+
+
+def test_invalid_push(store: JsonStore, contributors, push) -> None:
+    invalid = copy.deepcopy(push)
+    invalid["commits"][2]["timestamp"] = "yesterday"
+    ingester = ingest.Ingester(store, contributors)
+    with pytest.raises(ValueError):
+        ingester.apply("push", invalid, "delivery-1")
+    # Nothing of it is kept, and the delivery can be applied again
+    assert ingester.pending == 0
+    assert ingester.apply("push", push, "delivery-1")
+    ingester.flush()
+    repository = store.get_repository("org/alpha")
+    assert repository is not None and repository.repo_total_commits == 9
+    link = store.get_link("org/alpha", "ada")
+    assert link is not None and link.commit_count == 5
+
+
+def test_push_then_incremental_fetch(
+    make_client, repos, store: JsonStore, contributors, push, tmp_path: Path
+) -> None:
+    # After the last fetch started
+    pushed = datetime.datetime.now(datetime.UTC).replace(microsecond=0)
+    pushed += datetime.timedelta(minutes=1)
+    push["commits"][2]["timestamp"] = pushed.isoformat()
+    ingester = ingest.Ingester(store, contributors)
+    ingester.apply("push", push)
+    ingester.flush()
+
+    # The next fetch finds the ingested commits, and counts them once
+    for commit in push["commits"]:
+        login = commit["author"]["username"].lower()
+        repos["org/alpha"].commits[login].append(ingest.commit_timestamp(commit))
+    repos["org/alpha"].pushed_at = pushed
+    make_client(tmp_path).fetch(["org/alpha"], contributors, incremental=True)
+    make_client(tmp_path / "fresh").fetch(["org/alpha"], contributors)
+    fresh = JsonStore(tmp_path / "fresh")
+    assert store.get_link("org/alpha", "ada") == fresh.get_link("org/alpha", "ada")
+    assert store.get_repository("org/alpha") == fresh.get_repository("org/alpha")
+
+
+def test_push_first_contribution(store: JsonStore, contributors, push) -> None:
+    push["repository"]["full_name"] = "org/beta"
+    ingester = ingest.Ingester(store, contributors)
+    before = store.get_repository("org/beta")
+    assert before is not None and not store.has_link("org/beta", "ada")
+    assert ingester.apply("push", push)
+    ingester.flush()
+
+    link = store.get_link("org/beta", "ada")
+    assert link is not None
+    assert link.author_name == "Ada Lovelace"
+    assert link.commit_count == 2
+    assert link.commit_sec_min < link.commit_sec_max
+    repository = store.get_repository("org/beta")
+    assert repository is not None
+    assert repository.repo_core_contributors == before.repo_core_contributors + 1
+    assert repository.repo_total_contributors == before.repo_total_contributors + 1
+
+
+def test_push_ignored(store: JsonStore, contributors, push) -> None:
+    ingester = ingest.Ingester(store, contributors)
+    branch = copy.deepcopy(push)
+    branch["ref"] = "refs/heads/new-format"
+    forced = copy.deepcopy(push)
+    forced["forced"] = True
+    unknown = copy.deepcopy(push)
+    unknown["repository"]["full_name"] = "org/gamma"
+    assert ingester.apply("push", branch)
+    assert ingester.apply("push", forced)
+    assert not ingester.apply("push", unknown)
+    assert not ingester.apply("issues", push)
+    # Only the repository's metadata changed
+    assert ingester.flush() == (1, 0)
+    link = store.get_link("org/alpha", "ada")
+    assert link is not None and link.commit_count == 3
+
+
+def test_pull_request(store: JsonStore, contributors, pull_request) -> None:
+    ingester = ingest.Ingester(store, contributors)
+    assert ingester.apply("pull_request", pull_request)
+    assert ingester.flush() == (1, 0)
+    repository = store.get_repository("org/beta")
+    assert repository is not None
+    assert repository.repo_open_issues == 5
+    assert repository.repo_updatedAt == datetime.datetime(
+        2026, 10, 13, 10, 0, 1, tzinfo=datetime.UTC
+    )
+
+
+def test_server(store: JsonStore, contributors, push) -> None:
+    flushes = []
+    body = json.dumps(push).encode()
+    headers = {
+        "Content-Type": "application/json",
+        "X-GitHub-Event": "push",
+        "X-GitHub-Delivery": "delivery-1",
+    }
+    server = ingest.IngestServer(
+        ingest.Ingester(store, contributors),
+        secret="secret",
+        batch_seconds=60,
+        on_flush=lambda *counts: flushes.append(counts),
+    )
+    with server:
+        response = requests.post(server.url, data=body, headers=headers)
+        assert response.status_code == 401
+        headers["X-Hub-Signature-256"] = ingest.signature("secret", body)
+        response = requests.post(server.url, data=body, headers=headers)
+        assert response.status_code == 202
+        assert response.json() == {"applied": True}
+        ping = {**headers, "X-GitHub-Event": "ping"}
+        ping["X-Hub-Signature-256"] = ingest.signature("secret", b"{}")
+        assert requests.post(server.url, data=b"{}", headers=ping).status_code == 200
+    # The last batch is flushed when the server stops
+    assert flushes == [(1, 1)]
+    link = store.get_link("org/alpha", "ada")
+    assert link is not None and link.commit_count == 5
@@ -0,0 +1,48 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from contributor_network.layout import INNER_RADIUS, central_owners, compute  # noqa: E402
+
+AUTHORS = ["Ada", "Bob", "Cy", "Dee"]
+LINKS = [
+    {"author_name": "Ada", "repo": "org/alpha"},
+    {"author_name": "Bob", "repo": "org/beta"},
+    {"author_name": "Bob", "repo": "lab/gamma"},
+    {"author_name": "Cy", "repo": "lab/delta"},
+    {"author_name": "Dee", "repo": "solo/epsilon"},
+]
+
+
+def test_central_owners() -> None:
+    assert central_owners(LINKS) == {"lab": ["Bob", "Cy"], "org": ["Ada", "Bob"]}
+
+
+def test_compute() -> None:
+    layout = compute(AUTHORS, LINKS, seed=1)
+    assert layout == compute(AUTHORS, LINKS, seed=1)
+    assert layout["contributors"] == AUTHORS
+    assert sorted(layout["owners"]) == ["lab", "org"]
+    along, distance = layout["owners"]["org"]
+    # Between its contributors, the first and second on the ring
+    assert 0 < along < 1
+    assert 0 < distance <= INNER_RADIUS
+    along, _ = layout["owners"]["lab"]
+    assert 1 < along < 2
+
+
+def test_compute_without_shared_owners() -> None:
+    assert compute(AUTHORS, LINKS[:1])["owners"] == {}
+
+
+def test_compute_sorts_contributors_like_the_site() -> None:
+    # As in the config, not sorted, and in mixed case
+    names = {"Ada": "ada", "Dee": "dee"}
+    authors = ["dee", "Bob", "Cy", "ada"]
+    links = [
+        {**row, "author_name": names.get(row["author_name"], row["author_name"])}
+        for row in LINKS
+    ]
+    layout = compute(authors, links, seed=1)
+    assert layout["contributors"] == ["ada", "Bob", "Cy", "dee"]
+    assert layout["owners"] == compute(AUTHORS, LINKS, seed=1)["owners"]
@@ -0,0 +1,40 @@
+import json
+from pathlib import Path
+
+from contributor_network.profiling import Profile, endpoint
+
+
+def test_endpoint() -> None:
+    assert (
+        endpoint("GET", "/repos/pydata/xarray/commits?author=abc&page=2")
+        == "GET /repos/{owner}/{repo}/commits"
+    )
+    assert endpoint("GET", "/users/abc/events") == "GET /users/{username}/events"
+    assert endpoint("GET", "/repositories/123/contributors") == (
+        "GET /repositories/{id}/contributors"
+    )
+    assert endpoint("POST", "/graphql") == "POST /graphql"
+
+
+def test_report(tmp_path: Path) -> None:
+    profile = Profile()
+    profile.record_request("GET", "/repos/pydata/xarray", 200, 0.03, 1000)
+    profile.record_request("GET", "/repos/pydata/xarray/commits", 200, 0.3, 500)
+    profile.record_request("GET", "/repos/org/alpha/commits", 304, 7.0, 0)
+    with profile.timer("fetch_repository", repository="pydata/xarray"):
+        pass
+
+    profile.write(tmp_path / "report.json")
+    report = json.loads((tmp_path / "report.json").read_text())
+    assert report["requests"]["count"] == 3
+    assert report["requests"]["bytes"] == 1500
+    commits = report["requests"]["endpoints"]["GET /repos/{owner}/{repo}/commits"]
+    assert commits["count"] == 2
+    assert commits["statuses"] == {"200": 1, "304": 1}
+    assert commits["latency_ms"] == [0, 0, 0, 1, 0, 0, 0, 1]
+    assert report["repositories"]["pydata/xarray"]["requests"] == 2
+    assert report["timers"]["fetch_repository"]["count"] == 1
+
+    summary = profile.summary()
+    assert "GET /repos/{owner}/{repo}/commits" in summary
+    assert "pydata/xarray" in summary
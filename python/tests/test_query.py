@@ -0,0 +1,75 @@
+from pathlib import Path
+
+import pytest
+import requests
+from contributor_network.query import Network, QueryError, QueryServer
+from contributor_network.store import JsonStore
+
+
+@pytest.fixture
+def network(make_client, contributors, tmp_path: Path) -> Network:
+    make_client(tmp_path).fetch(["org/alpha", "org/beta"], contributors)
+    store = JsonStore(tmp_path)
+    return Network(store.repository_rows(), store.link_rows())
+
+
+def test_contributor_repositories(network: Network) -> None:
+    assert network.answer("/contributors") == [
+        {"name": "Ada Lovelace", "repositories": 1},
+        {"name": "Bob Builder", "repositories": 2},
+    ]
+    # Most recent first
+    links = network.answer("/contributors/Bob%20Builder/repositories")
+    assert [link["repo"] for link in links] == ["org/beta", "org/alpha"]
+    links = network.answer("/contributors/Bob%20Builder/repositories?since=1650000000")
+    assert [link["repo"] for link in links] == ["org/beta"]
+    assert network.answer(
+        "/contributors/Bob%20Builder/repositories?since=2023-11-15"
+    ) == network.answer("/contributors/Bob%20Builder/repositories?since=1700006400")
+    assert network.answer("/contributors/Ada%20Lovelace/co-contributors") == [
+        {"name": "Bob Builder", "shared_repositories": 1}
+    ]
+
+
+def test_repository_and_owner(network: Network) -> None:
+    answer = network.answer("/repositories/org/alpha")
+    assert answer["repository"]["repo"] == "org/alpha"
+    assert [link["author_name"] for link in answer["contributors"]] == [
+        "Ada Lovelace",
+        "Bob Builder",
+    ]
+    summary = network.answer("/owners/org")
+    assert summary["repositories"] == ["org/alpha", "org/beta"]
+    assert summary["stars"] == 20
+    assert summary["commits"] == 6
+    assert summary["top_contributors"] == [
+        {"name": "Ada Lovelace", "commits": 3},
+        {"name": "Bob Builder", "commits": 3},
+    ]
+    assert network.answer("/owners") == [summary]
+
+    for path in ["/owners/nobody", "/contributors/Eve/repositories", "/unknown"]:
+        with pytest.raises(QueryError) as error:
+            network.answer(path)
+        assert error.value.status == 404
+    for path in [
+        "/contributors/Bob%20Builder/repositories?since=yesterday",
+        "/contributors/Bob%20Builder/co-contributors?limit=ten",
+        "/contributors/Bob%20Builder/co-contributors?limit=-1",
+        "/contributors/Bob%20Builder/co-contributors?limit=0",
+    ]:
+        with pytest.raises(QueryError) as error:
+            network.answer(path)
+        assert error.value.status == 400
+
+
+def test_server(network: Network) -> None:
+    with QueryServer(network) as server:
+        url = f"{server.url}/owners/org"
+        response = requests.get(url)
+        assert response.status_code == 200
+        assert response.json() == network.answer("/owners/org")
+        cached = requests.get(url, headers={"If-None-Match": response.headers["ETag"]})
+        assert cached.status_code == 304
+        assert (server.hits, server.misses) == (1, 1)
+        assert requests.get(f"{server.url}/owners/nobody").status_code == 404
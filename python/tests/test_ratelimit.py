@@ -0,0 +1,160 @@
+import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from contributor_network.client import Client
+from contributor_network.manifest import Manifest, ManifestEntry
+from contributor_network.ratelimit import RateLimiter, RateLimitExhausted, TokenPool
+from github.Auth import Token
+from requests import PreparedRequest, Request, Response
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1_700_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class Server(BaseAdapter):
+    def __init__(self, remaining: int, reset: float) -> None:
+        super().__init__()
+        self.remaining = remaining
+        self.reset = reset
+
+    def send(self, request, *args, **kwargs):  # type: ignore[no-untyped-def]
+        self.remaining -= 1
+        response = Response()
+        response.status_code = 200
+        response.headers = CaseInsensitiveDict(
+            {
+                "X-RateLimit-Limit": "5000",
+                "X-RateLimit-Remaining": str(self.remaining),
+                "X-RateLimit-Reset": str(int(self.reset)),
+                "X-RateLimit-Resource": "core",
+            }
+        )
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+class Tokens(BaseAdapter):
+    """A server with a separate budget for each token."""
+
+    def __init__(self, budgets: dict[str, int], reset: float) -> None:
+        super().__init__()
+        self.servers = {
+            token: Server(remaining, reset) for token, remaining in budgets.items()
+        }
+        self.requests: list[str] = []
+
+    def send(self, request, *args, **kwargs):  # type: ignore[no-untyped-def]
+        token = request.headers["Authorization"].removeprefix("token ")
+        self.requests.append(token)
+        return self.servers[token].send(request)
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr("contributor_network.ratelimit.time.time", clock.time)
+    monkeypatch.setattr("contributor_network.ratelimit.time.sleep", clock.sleep)
+    return clock
+
+
+def get() -> PreparedRequest:
+    return Request("GET", "https://api.github.com/repos/org/alpha").prepare()
+
+
+def test_requests_per_minute(clock: Clock) -> None:
+    limiter = RateLimiter(per_minute=2, inner=Server(100, clock.now + 3600))
+    start = clock.now
+    for _ in range(5):
+        limiter.send(get())
+    assert clock.now - start == 120
+    assert limiter.requests == 5
+
+
+def test_waits_for_reset(clock: Clock) -> None:
+    reset = clock.now + 600
+    limiter = RateLimiter(reserve=2, inner=Server(4, reset))
+    limiter.send(get())
+    limiter.send(get())
+    assert clock.now < reset
+    limiter.send(get())
+    assert clock.now > reset
+
+
+def test_stops_without_waiting(clock: Clock) -> None:
+    limiter = RateLimiter(reserve=2, wait=False, inner=Server(3, clock.now + 600))
+    limiter.send(get())
+    with pytest.raises(RateLimitExhausted):
+        limiter.send(get())
+
+
+def test_plan_fetches_most_stale_first(
+    tmp_path: Path, contributors, monkeypatch
+) -> None:
+    manifest = Manifest()
+    for day, name in enumerate(["org/new", "org/old"], start=1):
+        manifest.record(
+            name,
+            ManifestEntry(
+                pushed_at=None,
+                updated_at=datetime.datetime(2026, 1, 1, tzinfo=datetime.UTC),
+                fetched_at=datetime.datetime(2026, 2, 3 - day, tzinfo=datetime.UTC),
+                contributors=sorted(contributors),
+            ),
+            tmp_path / "manifest.json",
+        )
+    client = Client(Token("token"), tmp_path, rate_limiter=RateLimiter(reserve=0))
+    client._manifest = Manifest.load(tmp_path / "manifest.json")
+
+    def rate_limit(remaining: int) -> SimpleNamespace:
+        core = SimpleNamespace(
+            remaining=remaining, limit=5000, reset=datetime.datetime.now()
+        )
+        return SimpleNamespace(resources=SimpleNamespace(core=core))
+
+    names = ["org/new", "org/unknown", "org/old"]
+    monkeypatch.setattr(client.github, "get_rate_limit", lambda: rate_limit(5000))
+    assert client.plan(names, contributors) == names
+    monkeypatch.setattr(client.github, "get_rate_limit", lambda: rate_limit(10))
+    assert client.plan(names, contributors) == ["org/unknown", "org/old", "org/new"]
+
+
+def test_token_pool(clock: Clock) -> None:
+    reset = clock.now + 600
+    tokens = Tokens({"a": 10, "b": 4, "c": 6}, reset)
+    pool = TokenPool(["a", "b", "c"], inner=tokens)
+    limiter = RateLimiter(reserve=2, inner=pool)
+    for _ in range(3):
+        limiter.send(get())
+    # Every token is tried once, then the one with the most budget left
+    assert tokens.requests == ["a", "b", "c"]
+    limiter.send(get())
+    assert tokens.requests[-1] == "a"
+    budget = pool.budget("core")
+    assert budget is not None
+    assert (budget.limit, budget.remaining) == (15000, 16)
+    # The limiter paces against the combined budget of the pool
+    assert limiter.budgets["core"].remaining == 16
+    for _ in range(14):
+        limiter.send(get())
+    assert clock.now < reset
+    # No token was used beyond its budget
+    assert all(server.remaining >= 0 for server in tokens.servers.values())
+    limiter.send(get())
+    assert clock.now > reset
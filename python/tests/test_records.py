@@ -0,0 +1,57 @@
+from pathlib import Path
+
+import pytest
+from contributor_network import records
+from contributor_network.files import write_if_changed
+from contributor_network.records import RecordCache
+from contributor_network.store import JsonStore
+
+
+@pytest.fixture
+def store(make_client, contributors, tmp_path: Path) -> JsonStore:
+    make_client(tmp_path).fetch(["org/alpha", "org/beta"], contributors)
+    return JsonStore(tmp_path)
+
+
+def test_record_cache(store: JsonStore, tmp_path: Path) -> None:
+    path = tmp_path / ".cache" / "build.json"
+    expected = sorted(
+        store.link_rows(), key=lambda row: (row["repo"], row["author_name"])
+    )
+
+    cache = RecordCache(path)
+    assert store.link_rows(cache) == expected
+    cache.save()
+    assert (cache.hits, cache.misses) == (0, 3)
+
+    link = store.get_link("org/alpha", "ada")
+    assert link is not None
+    link.commit_count = 42
+    store.put_link("org/alpha", "ada", link)
+    store.link_path("org/beta", "bob").unlink()
+
+    cache = RecordCache(path)
+    rows = store.link_rows(cache)
+    cache.save()
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert [row["commit_count"] for row in rows] == [42, 1]
+    assert len(RecordCache(path).entries) == 2
+
+
+def test_record_cache_in_parallel(
+    store: JsonStore, tmp_path: Path, monkeypatch
+) -> None:
+    monkeypatch.setattr(records, "PARALLEL_THRESHOLD", 2)
+    monkeypatch.setattr(records, "CHUNK_SIZE", 1)
+    cache = RecordCache(tmp_path / "build.json")
+    assert sorted(
+        store.link_rows(cache), key=lambda row: (row["repo"], row["author_name"])
+    ) == sorted(store.link_rows(), key=lambda row: (row["repo"], row["author_name"]))
+
+
+def test_write_if_changed(tmp_path: Path) -> None:
+    path = tmp_path / "links.csv"
+    assert write_if_changed(path, "a,b\r\n")
+    assert not write_if_changed(path, "a,b\r\n")
+    assert write_if_changed(path, "a,c\r\n")
+    assert path.read_bytes() == b"a,c\r\n"
@@ -0,0 +1,86 @@
+import json
+from pathlib import Path
+
+import requests
+from contributor_network.cassette import Cassette, RecordingAdapter
+from contributor_network.replay import ReplayServer
+from github import Github
+from github.Auth import Token
+from requests import PreparedRequest, Request, Response
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+API = "https://api.github.com"
+PAGES = {
+    "/repos/org/alpha": {"full_name": "org/alpha", "url": f"{API}/repos/org/alpha"},
+    "/repos/org/alpha/contributors": [
+        {"login": "ada", "contributions": 3},
+        {"login": "bob", "contributions": 2},
+    ],
+    "/repos/org/alpha/contributors?page=2": [{"login": "eve", "contributions": 1}],
+}
+
+
+class Api(BaseAdapter):
+    """Answers with the pages above, the first of two pages linking the second."""
+
+    def send(self, request, *args, **kwargs):  # type: ignore[no-untyped-def]
+        response = Response()
+        response.url = request.url
+        response.status_code = 200
+        response.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+        if request.path_url == "/repos/org/alpha/contributors":
+            response.headers["Link"] = (
+                f'<{API}/repos/org/alpha/contributors?page=2>; rel="next"'
+            )
+        response._content = json.dumps(PAGES[request.path_url]).encode()
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+def get(url: str) -> PreparedRequest:
+    return Request("GET", url).prepare()
+
+
+def record(directory: Path) -> Cassette:
+    cassette = Cassette(directory)
+    adapter = RecordingAdapter(cassette, Api())
+    for path in PAGES:
+        adapter.send(get(API + path))
+    return cassette
+
+
+def test_record(tmp_path: Path) -> None:
+    cassette = record(tmp_path)
+    assert len(cassette) == 3
+    interaction = cassette.get("GET", "/repos/org/alpha")
+    assert interaction.origin == API
+    assert json.loads(interaction.body) == PAGES["/repos/org/alpha"]
+
+
+def test_replay(tmp_path: Path) -> None:
+    with ReplayServer(record(tmp_path), page_size=1) as server:
+        github = Github(auth=Token("token"), base_url=server.url)
+        repo = github.get_repo("org/alpha")
+        assert repo.url == f"{server.url}/repos/org/alpha"
+        # Re-paginated into pages of one
+        contributors = [user.login for user in repo.get_contributors()]
+        assert contributors == ["ada", "bob", "eve"]
+        assert server.requests == 4
+        assert github.rate_limiting == (4996, 5000)
+        assert requests.get(f"{server.url}/repos/org/beta").status_code == 404
+
+
+def test_rate_limit_and_conditional_requests(tmp_path: Path) -> None:
+    with ReplayServer(record(tmp_path), rate_limit=1) as server:
+        url = f"{server.url}/repos/org/alpha"
+        first = requests.get(url)
+        assert first.status_code == 200
+        assert first.headers["x-ratelimit-remaining"] == "0"
+        unchanged = requests.get(url, headers={"If-None-Match": first.headers["etag"]})
+        assert unchanged.status_code == 304
+        exhausted = requests.get(url)
+        assert exhausted.status_code == 403
+        assert exhausted.json()["message"] == "API rate limit exceeded"
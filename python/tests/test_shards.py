@@ -0,0 +1,67 @@
+import json
+from pathlib import Path
+
+import pytest
+from contributor_network import shards
+from contributor_network.manifest import Manifest
+from contributor_network.store import JsonStore
+
+
+def read_tree(directory: Path) -> dict[str, str]:
+    return {
+        str(path.relative_to(directory)): path.read_text()
+        for path in sorted(directory.glob("*/**/*.json"))
+    }
+
+
+def test_select() -> None:
+    names = [f"org/repo-{i}" for i in range(100)]
+    selected = [shards.select(names, index, 4) for index in range(1, 5)]
+    assert sorted(sum(selected, [])) == sorted(names)
+    assert all(selected)
+    # Repositories keep their shard when others are added
+    assert shards.select([*names, "org/new"], 2, 4)[: len(selected[1])] == selected[1]
+    assert shards.parse("2/4") == (2, 4)
+    for value in ["0/4", "5/4", "2", "a/b"]:
+        with pytest.raises(ValueError):
+            shards.parse(value)
+
+
+def test_merge(make_client, contributors, tmp_path: Path) -> None:
+    repositories = ["org/alpha", "org/beta"]
+    make_client(tmp_path / "full").fetch(repositories, contributors)
+    make_client(tmp_path / "1").fetch(["org/alpha"], contributors)
+    make_client(tmp_path / "2").fetch(["org/beta"], contributors)
+    assert shards.merge([tmp_path / "1", tmp_path / "2"], tmp_path / "merged") == (
+        2,
+        3,
+    )
+    assert read_tree(tmp_path / "merged") == read_tree(tmp_path / "full")
+    manifest = Manifest.load(tmp_path / "merged" / "manifest.json")
+    assert sorted(manifest.repositories) == repositories
+
+
+def test_merge_takes_most_recent(
+    make_client, repos, contributors, tmp_path: Path
+) -> None:
+    make_client(tmp_path / "old").fetch(["org/alpha"], contributors)
+    repos["org/alpha"].stargazers_count = 50
+    make_client(tmp_path / "new").fetch(["org/alpha"], contributors)
+    for sources in [["old", "new"], ["new", "old"]]:
+        shards.merge([tmp_path / name for name in sources], tmp_path / "merged")
+        repository = JsonStore(tmp_path / "merged").get_repository("org/alpha")
+        assert repository is not None and repository.repo_stars == 50
+
+
+def test_merge_refuses_unsafe(make_client, repos, contributors, tmp_path: Path) -> None:
+    make_client(tmp_path / "1").fetch(["org/alpha"], contributors)
+    repos["org/alpha"].stargazers_count = 50
+    make_client(tmp_path / "2").fetch(["org/alpha"], contributors)
+    (tmp_path / "2" / "manifest.json").unlink()
+    with pytest.raises(shards.MergeError, match="do not tell which is newer"):
+        shards.merge([tmp_path / "1", tmp_path / "2"], tmp_path / "merged")
+
+    (tmp_path / "2" / "journal.jsonl").write_text(json.dumps({"repo": "org/alpha"}))
+    with pytest.raises(shards.MergeError, match="did not complete"):
+        shards.merge([tmp_path / "1", tmp_path / "2"], tmp_path / "merged")
+    assert not (tmp_path / "merged").exists()
@@ -0,0 +1,45 @@
+from pathlib import Path
+
+from contributor_network import sites
+from contributor_network.config import Config
+from contributor_network.store import JsonStore
+
+
+def config(repositories: list[str], core: dict[str, str]) -> Config:
+    return Config(
+        title="Site",
+        description="A site",
+        organization_name="Org",
+        repositories=repositories,
+        contributors={"core": core, "alumni": {"old": "Old Timer"}},
+    )
+
+
+def test_merge() -> None:
+    repositories, contributors = sites.merge(
+        [
+            config(["org/alpha", "org/beta"], {"ada": "Ada Lovelace"}),
+            config(["org/beta", "org/gamma"], {"ada": "Ada", "bob": "Bob"}),
+        ],
+        all_contributors=False,
+    )
+    assert repositories == ["org/alpha", "org/beta", "org/gamma"]
+    assert contributors == {"ada": "Ada Lovelace", "bob": "Bob"}
+
+
+def test_project(make_client, contributors, tmp_path: Path) -> None:
+    # Fetched once for all sites
+    make_client(tmp_path).fetch(["org/alpha", "org/beta"], contributors)
+    store = JsonStore(tmp_path)
+
+    repositories, links = sites.project(store, ["org/alpha"], {"bob": "Robert"})
+    assert [row["repo"] for row in repositories] == ["org/alpha"]
+    assert repositories[0]["repo_core_contributors"] == 1
+    link = store.get_link("org/alpha", "bob")
+    assert link is not None
+    assert links == [link.model_dump(mode="json") | {"author_name": "Robert"}]
+
+    # A site with the same repositories and contributors gets the same data
+    repositories, links = sites.project(store, ["org/alpha", "org/beta"], contributors)
+    assert repositories == store.repository_rows()
+    assert sorted(links, key=str) == sorted(store.link_rows(), key=str)
@@ -0,0 +1,35 @@
+from pathlib import Path
+
+from contributor_network.store import JsonStore, SqliteStore
+
+
+def test_sqlite_store_matches_json(make_client, contributors, tmp_path: Path) -> None:
+    repositories = ["org/alpha", "org/beta"]
+    json_store = JsonStore(tmp_path / "json")
+    make_client(tmp_path / "json", store=json_store).fetch(repositories, contributors)
+    with SqliteStore(tmp_path / "sqlite" / "data.sqlite") as sqlite_store:
+        make_client(tmp_path / "sqlite", concurrency=4, store=sqlite_store).fetch(
+            repositories, contributors
+        )
+        assert not (tmp_path / "sqlite" / "links").exists()
+        assert sqlite_store.repositories() == sorted(
+            json_store.repositories(), key=lambda repository: repository.repo
+        )
+        assert sqlite_store.links() == sorted(
+            json_store.links(), key=lambda link: (link.repo, link.author_name)
+        )
+        assert sqlite_store.has_link("org/beta", "bob")
+        assert not sqlite_store.has_link("org/beta", "ada")
+
+
+def test_import_json(make_client, contributors, tmp_path: Path) -> None:
+    make_client(tmp_path).fetch(["org/alpha", "org/beta"], contributors)
+    json_store = JsonStore(tmp_path)
+    with SqliteStore(tmp_path / "data.sqlite") as store:
+        assert store.import_json(json_store) == (2, 3)
+        assert store.get_link("org/alpha", "ada") == json_store.get_link(
+            "org/alpha", "ada"
+        )
+        assert store.get_repository("org/beta") == json_store.get_repository("org/beta")
+    with SqliteStore(tmp_path / "data.sqlite") as store:
+        assert len(store.links()) == 3
@@ -0,0 +1,70 @@
+import os
+from pathlib import Path
+
+import pytest
+from contributor_network import watch
+from contributor_network.models import Link
+from contributor_network.records import RecordCache
+from contributor_network.store import JsonStore
+
+
+def test_scan(tmp_path: Path) -> None:
+    (tmp_path / "links" / "org").mkdir(parents=True)
+    record = tmp_path / "links" / "org" / "ada.json"
+    record.write_text("{}")
+    config = tmp_path / "config.toml"
+    config.write_text("")
+    before = watch.scan([tmp_path / "links", config])
+    assert set(before) == {record, config}
+
+    # Temporary files of atomic writes are ignored
+    (record.parent / ".ada.json.1.2.tmp").write_text("{")
+    assert watch.scan([tmp_path / "links", config]) == before
+
+    os.utime(record, ns=(0, 0))
+    (tmp_path / "links" / "org" / "bob.json").write_text("{}")
+    config.unlink()
+    after = watch.scan([tmp_path / "links", config])
+    assert watch.changed(before, after) == {
+        record,
+        config,
+        tmp_path / "links" / "org" / "bob.json",
+    }
+
+
+def test_records(make_client, contributors, tmp_path: Path) -> None:
+    make_client(tmp_path).fetch(["org/alpha", "org/beta"], contributors)
+    store = JsonStore(tmp_path)
+    records = watch.Records(Link, tmp_path / "links")
+    records.load(RecordCache(tmp_path / "build.json"))
+    assert records.rows == store.link_rows(RecordCache(tmp_path / "other.json"))
+
+    link = store.get_link("org/alpha", "ada")
+    assert link is not None
+    link.commit_count = 100
+    store.put_link("org/alpha", "ada", link)
+    store.link_path("org/beta", "bob").unlink()
+    changes = {store.link_path("org/alpha", "ada"), store.link_path("org/beta", "bob")}
+    assert records.update(changes)
+    assert records.rows == store.link_rows(RecordCache(tmp_path / "new.json"))
+    assert not records.update({tmp_path / "repositories" / "org" / "alpha.json"})
+
+
+def test_records_with_an_invalid_file(
+    make_client, contributors, tmp_path: Path
+) -> None:
+    make_client(tmp_path).fetch(["org/alpha"], contributors)
+    store = JsonStore(tmp_path)
+    records = watch.Records(Link, tmp_path / "links")
+    records.load(RecordCache(tmp_path / "build.json"))
+
+    link = store.get_link("org/alpha", "ada")
+    assert link is not None
+    link.commit_count = 100
+    store.put_link("org/alpha", "ada", link)
+    store.link_path("org/alpha", "bob").write_text("{")
+    changes = {store.link_path("org/alpha", "ada"), store.link_path("org/alpha", "bob")}
+    with pytest.raises(ValueError, match="bob.json"):
+        records.update(changes)
+    # The valid record is read, the invalid one dropped
+    assert [row["commit_count"] for row in records.rows] == [100]
@@ -0,0 +1,56 @@
+import { describe, it, expect } from 'vitest';
+import { decodeCompact, type CompactData } from '../data/compact';
+
+const data: CompactData = {
+  version: 1,
+  authors: ['Ada Lovelace', 'Bob Builder'],
+  repos: ['org/alpha', 'org/beta'],
+  top_contributors: [0, 1],
+  repositories: {
+    repo_stars: [10, 3],
+    repo_license: ['MIT', null],
+    repo_archived: [false, true],
+  },
+  links: {
+    author: [0, 1, 1],
+    repo: [0, 0, 1],
+    commit_count: [3, 1, 2],
+    commit_sec_min: [1600000000, 1610000000, 1500000000],
+    is_recent_contributor: [true, false, false],
+  },
+};
+
+describe('decodeCompact', () => {
+  it('should restore the top contributors', () => {
+    const [contributors] = decodeCompact(data);
+    expect(contributors.columns).toEqual(['author_name']);
+    expect(contributors.map((d) => d.author_name)).toEqual(['Ada Lovelace', 'Bob Builder']);
+  });
+
+  it('should restore repository rows as CSV strings', () => {
+    const [, repos] = decodeCompact(data);
+    expect(repos.columns).toEqual(['repo', 'repo_stars', 'repo_license', 'repo_archived']);
+    expect(repos[1]).toEqual({
+      repo: 'org/beta',
+      repo_stars: '3',
+      repo_license: '',
+      repo_archived: 'True',
+    });
+  });
+
+  it('should resolve link authors and repos', () => {
+    const [, , links] = decodeCompact(data);
+    expect(links).toHaveLength(3);
+    expect(links[2]).toEqual({
+      author_name: 'Bob Builder',
+      repo: 'org/beta',
+      commit_count: '2',
+      commit_sec_min: '1500000000',
+      is_recent_contributor: 'False',
+    });
+  });
+
+  it('should reject unknown versions', () => {
+    expect(() => decodeCompact({ ...data, version: 2 })).toThrow();
+  });
+});
@@ -0,0 +1,43 @@
+import { describe, it, expect } from 'vitest';
+import { applyInitialLayout, type InitialLayout } from '../simulations/collaborationSimulation';
+import type { VisualizationNode } from '../types';
+
+function node(id: string, type: VisualizationNode['type'], angle?: number): VisualizationNode {
+  return { id, type, x: 0, y: 0, contributor_angle: angle } as VisualizationNode;
+}
+
+const layout: InitialLayout = {
+  version: 1,
+  contributors: ['Ada', 'Bob', 'Cy', 'Dee'],
+  owners: { org: [0.5, 0.5], lab: [3.5, 1] },
+};
+
+function ring(): VisualizationNode[] {
+  return ['Ada', 'Bob', 'Cy', 'Dee'].map((id, i) => node(id, 'contributor', (i * Math.PI) / 2));
+}
+
+describe('applyInitialLayout', () => {
+  it('should interpolate owner positions between contributor angles', () => {
+    const nodes = [...ring(), node('org', 'owner'), node('lab', 'owner')];
+    expect(applyInitialLayout(nodes, layout, 100)).toBe(true);
+    const [org, lab] = nodes.slice(4);
+    expect(org.x).toBeCloseTo(50 * Math.cos(Math.PI / 4));
+    expect(org.y).toBeCloseTo(50 * Math.sin(Math.PI / 4));
+    // Between the last and the first contributor
+    expect(lab.x).toBeCloseTo(100 * Math.cos((7 * Math.PI) / 4));
+    expect(lab.y).toBeCloseTo(100 * Math.sin((7 * Math.PI) / 4));
+  });
+
+  it('should match contributors by name', () => {
+    const nodes = [...ring().reverse(), node('org', 'owner')];
+    expect(applyInitialLayout(nodes, layout, 100)).toBe(true);
+    expect(nodes[4].x).toBeCloseTo(50 * Math.cos(Math.PI / 4));
+    expect(nodes[4].y).toBeCloseTo(50 * Math.sin(Math.PI / 4));
+  });
+
+  it('should ignore a layout for other contributors', () => {
+    const nodes = [...ring().slice(1), node('org', 'owner')];
+    expect(applyInitialLayout(nodes, layout, 100)).toBe(false);
+    expect(nodes[3].x).toBe(0);
+  });
+});
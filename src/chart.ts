@@ -46,6 +46,7 @@ import {
   runOwnerSimulation,
   runContributorSimulation,
   runCollaborationSimulation,
+  type InitialLayout,
 } from "./simulations/index";
 import {
   createFilterState,
@@ -101,6 +102,7 @@ interface ChartFunction {
   height(value: number): ChartFunction;
   resize(): void;
   rebuild(): ChartFunction;
+  initialLayout(layout: InitialLayout | null): ChartFunction;
   setFilter(organizationName: string, enabled: boolean): ChartFunction;
   setRepoFilter(metric: string, value: number | null): ChartFunction;
   getActiveFilters(): FilterState;
@@ -172,6 +174,7 @@ export const createContributorNetworkVisual = (
 
   const CENTRAL_RADIUS = LAYOUT.centralRadius;
   let RADIUS_CONTRIBUTOR: number;
+  let initialLayout: InitialLayout | null = null;
   let CONTRIBUTOR_RING_WIDTH: number;
 
   const INNER_RADIUS_FACTOR = LAYOUT.innerRadiusFactor;
@@ -311,6 +314,7 @@ export const createContributorNetworkVisual = (
       scale_link_distance,
       RADIUS_CONTRIBUTOR,
       INNER_RADIUS_FACTOR,
+      initialLayout,
     });
 
     links = resolveLinkReferences(links, nodes);
@@ -1208,6 +1212,11 @@ export const createContributorNetworkVisual = (
     return chart;
   };
 
+  chart.initialLayout = function (layout: InitialLayout | null): ChartFunction {
+    initialLayout = layout;
+    return chart;
+  };
+
   chart.rebuild = function (): ChartFunction {
     nodes = [];
     links = [];
@@ -1277,6 +1286,7 @@ export const createContributorNetworkVisual = (
       scale_link_distance,
       RADIUS_CONTRIBUTOR,
       INNER_RADIUS_FACTOR,
+      initialLayout,
     });
     links = resolveLinkReferences(links, nodes);
 
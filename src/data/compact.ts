@@ -0,0 +1,88 @@
+/**
+ * Decoding of the compact data format written by `contributor-network build --format compact`
+ *
+ * The compact file holds the same data as top_contributors.csv,
+ * repositories.csv and links.csv: authors and repos are dictionary-encoded as
+ * indices and every field is stored as a column. Decoding restores the rows
+ * as d3.csv would have parsed them from the CSVs (up to the formatting of
+ * numbers, e.g. "0" instead of "0.0").
+ */
+
+import type { DSVRowArray, DSVRowString } from "d3";
+
+type Value = string | number | boolean | null;
+
+export interface CompactData {
+  version: number;
+  authors: string[];
+  repos: string[];
+  top_contributors: number[];
+  repositories: Record<string, Value[]>;
+  links: { author: number[]; repo: number[] } & Record<string, Value[]>;
+}
+
+/**
+ * Format a value the way Python's csv module writes it
+ * @param {Value} value - A JSON value
+ * @returns {string} The CSV cell text
+ */
+function cell(value: Value): string {
+  if (value === null) return "";
+  if (typeof value === "boolean") return value ? "True" : "False";
+  return String(value);
+}
+
+function toRows(
+  columns: string[],
+  length: number,
+  get: (column: string, index: number) => string,
+): DSVRowArray<string> {
+  const rows: DSVRowString<string>[] = [];
+  for (let i = 0; i < length; i++) {
+    const row: DSVRowString<string> = {};
+    for (const column of columns) row[column] = get(column, i);
+    rows.push(row);
+  }
+  return Object.assign(rows, { columns }) as DSVRowArray<string>;
+}
+
+/**
+ * Decode compact data into top contributor, repository and link rows
+ * @param {CompactData} data - The parsed compact JSON document
+ * @returns {DSVRowArray<string>[]} The rows of the three CSV files
+ */
+export function decodeCompact(data: CompactData): DSVRowArray<string>[] {
+  if (data.version !== 1) {
+    throw new Error(`Unsupported compact data version: ${data.version}`);
+  }
+  const { authors, repos, repositories, links } = data;
+
+  const topContributors = toRows(
+    ["author_name"],
+    data.top_contributors.length,
+    (_, i) => authors[data.top_contributors[i]],
+  );
+
+  const repoColumns = Object.keys(repositories);
+  const repoRows = toRows(
+    ["repo", ...repoColumns],
+    repoColumns.length ? repositories[repoColumns[0]].length : 0,
+    (column, i) =>
+      column === "repo" ? repos[i] : cell(repositories[column][i]),
+  );
+
+  const linkColumns = Object.keys(links).filter(
+    (column) => column !== "author" && column !== "repo",
+  );
+  const linkRows = toRows(
+    ["author_name", "repo", ...linkColumns],
+    links.author.length,
+    (column, i) => {
+      if (column === "author_name") return authors[links.author[i]];
+      if (column === "repo") return repos[links.repo[i]];
+      return cell(links[column][i]);
+    },
+  );
+
+  return [topContributors, repoRows, linkRows];
+}
@@ -307,23 +307,31 @@ export function prepareData(
     } as VisualizationNode);
   });
 
+  // Index links and nodes by name once, instead of scanning all links for
+  // every node (the first node with a name wins, like Array.find)
+  const linksBySource = d3.group(links, (l) => getLinkNodeId(l.source));
+  const linksByTarget = d3.group(links, (l) => getLinkNodeId(l.target));
+  const repoByName = new Map<string, RepoData>();
+  repos.forEach((r) => {
+    if (!repoByName.has(r.repo)) repoByName.set(r.repo, r);
+  });
+  const contributorByName = new Map<string, ContributorData>();
+  contributors.forEach((c) => {
+    if (!contributorByName.has(c.contributor_name))
+      contributorByName.set(c.contributor_name, c);
+  });
+
   contributors.forEach((d) => {
-    d.links_original = links.filter(
-      (l) => getLinkNodeId(l.source) === d.contributor_name,
-    );
+    d.links_original = linksBySource.get(d.contributor_name) ?? [];
     d.repos = d.links_original
-      .map((l) => repos.find((r) => r.repo === l.repo))
+      .map((l) => repoByName.get(l.repo!))
       .filter((r): r is RepoData => r !== undefined);
   });
 
   repos.forEach((d) => {
-    d.links_original = links.filter(
-      (l) => getLinkNodeId(l.target) === d.repo,
-    );
+    d.links_original = linksByTarget.get(d.repo) ?? [];
     d.contributors = d.links_original
-      .map((l) =>
-        contributors.find((r) => r.contributor_name === l.contributor_name),
-      )
+      .map((l) => contributorByName.get(l.contributor_name!))
       .filter((c): c is ContributorData => c !== undefined);
     d.totalCommits = d.repo_total_commits ? +d.repo_total_commits : undefined;
     d.orgCommits = d3.sum(d.links_original, (l) => l.commit_count);
@@ -351,11 +359,9 @@ export function prepareData(
   });
 
   const beforeOwnerCount = owners.length;
+  const repoOwners = new Set(repoNodes.map((d) => d.owner));
   owners = owners.filter((owner) => {
-    const ownerRepos = nodes.filter(
-      (n) => n.type === "repo" && (n.data as RepoData).owner === owner.owner,
-    );
-    if (ownerRepos.length === 0) {
+    if (!repoOwners.has(owner.owner)) {
       debugWarn(`Filtering out owner with no repos: ${owner.owner}`);
       return false;
     }
@@ -373,11 +379,12 @@ export function prepareData(
     console.log("Contributors:", contributors);
   }
 
+  const ownerNames = new Set(owners.map((o) => o.owner));
   nodes
     .filter((d) => d.type === "repo")
     .forEach((d) => {
-      (d.data as RepoData).multi_repo_owner = owners.some(
-        (o) => o.owner === (d.data as RepoData).owner,
+      (d.data as RepoData).multi_repo_owner = ownerNames.has(
+        (d.data as RepoData).owner,
       );
     });
 
@@ -394,7 +401,7 @@ export function prepareData(
   let new_links_contributor_owner: LinkData[] = [];
 
   links.forEach((d) => {
-    if (owners.find((o) => o.owner === d.owner)) {
+    if (ownerNames.has(d.owner!)) {
       new_links_owner_repo.push({
         source: d.owner!,
         target: d.repo!,
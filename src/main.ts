@@ -1,5 +1,7 @@
 import * as d3 from "d3";
 import { createContributorNetworkVisual } from "./chart";
+import type { InitialLayout } from "./simulations/index";
+import { decodeCompact, type CompactData } from "./data/compact";
 import { MOBILE_BREAKPOINT, MOBILE_DRAWER_PEEK_HEIGHT, applyBranding, type BrandingColors } from './config/theme';
 import { createOrgDropdown } from './ui/orgDropdown';
 import type { OrgDropdown } from './ui/orgDropdown';
@@ -13,6 +15,10 @@ interface Config {
   description?: string;
   branding?: BrandingColors;
   plausible_id?: string;
+  /** File name of the compact data, written by `build --format compact` */
+  data?: string;
+  /** File name of the precomputed layout, written by `build --layout` */
+  layout?: string;
 }
 
 const configResponse = await fetch("data/config.json");
@@ -84,15 +90,26 @@ const contributorNetworkVisual = createContributorNetworkVisual(
 );
 contributorNetworkVisual.width(dims.width).height(dims.height);
 
-const promises = [
-  d3.csv("data/top_contributors.csv"),
-  d3.csv("data/repositories.csv"),
-  d3.csv("data/links.csv"),
-];
+const dataPromise: Promise<d3.DSVRowArray<string>[]> = config.data
+  ? d3.json<CompactData>(`data/${config.data}`).then((data) => decodeCompact(data!))
+  : Promise.all([
+      d3.csv("data/top_contributors.csv"),
+      d3.csv("data/repositories.csv"),
+      d3.csv("data/links.csv"),
+    ]);
+
+// The site works without the precomputed layout, it just takes longer to settle
+const layoutPromise: Promise<InitialLayout | null> = config.layout
+  ? d3.json<InitialLayout>(`data/${config.layout}`).then(
+      (layout) => layout ?? null,
+      () => null,
+    )
+  : Promise.resolve(null);
 
 document.fonts.ready.then(() => {
-  Promise.all(promises)
-    .then((values) => {
+  Promise.all([dataPromise, layoutPromise])
+    .then(([values, layout]) => {
+      contributorNetworkVisual.initialLayout(layout);
       const uniqueOrgs = new Set<string>();
       values[1].forEach((repo) => {
         const owner = repo.repo!.substring(0, repo.repo!.indexOf("/"));
@@ -3,6 +3,9 @@
  *
  * Runs a force simulation to position repositories that are shared between multiple contributors.
  * Uses bounding box collision detection to prevent label overlap.
+ * When an initial layout precomputed by `contributor-network build --layout`
+ * matches the contributors, owners start from it and only a few refinement
+ * ticks are run.
  *
  * @module simulations/collaborationSimulation
  */
@@ -15,11 +18,72 @@ import { sqrt, max } from '../utils/helpers';
 import { LAYOUT } from '../config/theme';
 import type { VisualizationNode, LinkData } from '../types';
 
+/** Owner positions precomputed by `contributor-network build --layout` */
+export interface InitialLayout {
+  version: number;
+  contributors: string[];
+  /**
+   * Owner id -> [position along the contributor ring as a fractional
+   * contributor index, distance from the center relative to the ring radius]
+   */
+  owners: Record<string, [number, number]>;
+}
+
 export interface CollaborationSimulationConfig {
   context: CanvasRenderingContext2D;
   scale_link_distance: d3.ScaleContinuousNumeric<number, number>;
   RADIUS_CONTRIBUTOR: number;
   INNER_RADIUS_FACTOR: number;
+  initialLayout?: InitialLayout | null;
+}
+
+const REFINEMENT_TICKS = 60;
+
+/**
+ * Place owner nodes at their precomputed positions
+ *
+ * Positions along the ring are interpolated between the angles of the
+ * contributors, which must be the same as when the layout was computed.
+ *
+ * @returns True if any node was placed
+ */
+export function applyInitialLayout(
+  nodes: VisualizationNode[],
+  layout: InitialLayout,
+  RADIUS_CONTRIBUTOR: number,
+): boolean {
+  if (layout.version !== 1) return false;
+  // Contributors are matched by name, in case the two sorts disagree
+  const angles = new Map<string, number>();
+  nodes.forEach((d) => {
+    if (d.type === "contributor" && d.contributor_angle !== undefined) {
+      angles.set(d.id, d.contributor_angle);
+    }
+  });
+  const n = layout.contributors.length;
+  if (
+    n === 0 ||
+    n !== nodes.filter((d) => d.type === "contributor").length ||
+    layout.contributors.some((id) => !angles.has(id))
+  ) {
+    return false;
+  }
+
+  let placed = false;
+  nodes.forEach((d) => {
+    const position = d.type === "owner" ? layout.owners[d.id] : undefined;
+    if (!position) return;
+    const [along, distance] = position;
+    const k = Math.floor(along) % n;
+    const start = angles.get(layout.contributors[k])!;
+    let end = angles.get(layout.contributors[(k + 1) % n])!;
+    while (end < start) end += Math.PI * 2;
+    const angle = start + (along - Math.floor(along)) * (end - start);
+    d.x = distance * RADIUS_CONTRIBUTOR * Math.cos(angle);
+    d.y = distance * RADIUS_CONTRIBUTOR * Math.sin(angle);
+    placed = true;
+  });
+  return placed;
 }
 
 /**
@@ -32,7 +96,7 @@ export function runCollaborationSimulation(
   links: LinkData[],
   config: CollaborationSimulationConfig,
 ): VisualizationNode[] {
-  const { context, scale_link_distance, RADIUS_CONTRIBUTOR, INNER_RADIUS_FACTOR } = config;
+  const { context, scale_link_distance, RADIUS_CONTRIBUTOR, INNER_RADIUS_FACTOR, initialLayout } = config;
 
   const simulation = d3
     .forceSimulation<VisualizationNode>()
@@ -119,7 +183,13 @@ export function runCollaborationSimulation(
   (simulation.force("link") as d3.ForceLink<VisualizationNode, LinkData>).links(links_central);
 
   const n_ticks = 300;
-  for (let i = 0; i < n_ticks; ++i) {
+  let first_tick = 0;
+  if (initialLayout && applyInitialLayout(nodes_central, initialLayout, RADIUS_CONTRIBUTOR)) {
+    // Continue the cooling schedule from where the precomputed layout left off
+    first_tick = n_ticks - REFINEMENT_TICKS;
+    simulation.alpha(Math.pow(1 - simulation.alphaDecay(), first_tick));
+  }
+  for (let i = first_tick; i < n_ticks; ++i) {
     simulation.tick();
     simulationPlacementConstraints(nodes_central, RADIUS_CONTRIBUTOR, INNER_RADIUS_FACTOR);
     (simulation.force("collide") as ReturnType<typeof bboxCollide>).strength(Math.pow(i / n_ticks, 2) * LAYOUT.collaborationCollideStrength);
@@ -8,5 +8,5 @@
 
 export { runOwnerSimulation } from './ownerSimulation';
 export { runContributorSimulation } from './contributorSimulation';
-export { runCollaborationSimulation } from './collaborationSimulation';
-export type { CollaborationSimulationConfig } from './collaborationSimulation';
+export { runCollaborationSimulation, applyInitialLayout } from './collaborationSimulation';
+export type { CollaborationSimulationConfig, InitialLayout } from './collaborationSimulation';